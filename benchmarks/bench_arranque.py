@@ -0,0 +1,52 @@
+"""Benchmark: arranque en frío (proceso nuevo) de la app, del modo sin Streamlit y del CLI.
+
+Uso: python -m benchmarks.bench_arranque [repeticiones]
+Cada caso se ejecuta en un intérprete nuevo; se informa la mediana.
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+CASOS = {
+    # Imports de mensajeria.py hasta la pantalla de login, antes: folium y fpdf al importar
+    'app (imports previos: mapa + PDF al inicio)': (
+        'import streamlit, pandas, streamlit.components.v1\n'
+        'from mensajeria_core import cache, compartido, config, indice, lote, mapa, memoria, reporte, rollup'
+    ),
+    # Ahora mapa/PDF/lote se importan al usarse
+    'app (imports actuales)': (
+        'import streamlit, pandas, streamlit.components.v1\n'
+        'from mensajeria_core import api, cache, compartido, config, indice, memoria, rollup'
+    ),
+    'librería: cargar + filtrar + resumir': 'from mensajeria_core import api',
+    'CLI: python -m mensajeria_core --help': None,
+}
+
+
+def _medir(codigo: str | None, repeticiones: int) -> float:
+    cmd = [sys.executable, '-m', 'mensajeria_core', '--help'] if codigo is None else [sys.executable, '-c', codigo]
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos)
+
+
+def _modulos_pesados(codigo: str | None) -> str:
+    sonda = (codigo or 'import mensajeria_core.__main__') + (
+        '\nimport sys\nprint(",".join(m for m in ("streamlit", "folium", "branca", "fpdf") if m in sys.modules))'
+    )
+    res = subprocess.run([sys.executable, '-c', sonda], check=True, capture_output=True, text=True)
+    return res.stdout.strip().splitlines()[-1] if res.stdout.strip() else ''
+
+
+def main(repeticiones: int) -> None:
+    for nombre, codigo in CASOS.items():
+        seg = _medir(codigo, repeticiones)
+        print(f'{nombre:<46} {seg:6.2f}s | cargados: {_modulos_pesados(codigo) or "-"}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
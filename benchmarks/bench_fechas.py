@@ -0,0 +1,72 @@
+"""Benchmark: parser de fechas vectorizado vs. el enfoque anterior de cargar_datos.
+
+Uso: python -m benchmarks.bench_fechas [filas ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from mensajeria_core.fechas import parsear_fechas
+
+
+def _parseo_anterior(serie: pd.Series) -> pd.Series:
+    """Réplica del parseo original: dayfirst=True y luego reintentos por formato con máscaras."""
+    df = pd.DataFrame({'Fecha de llenar': serie})
+    df['Fecha_original'] = df['Fecha de llenar'].copy()
+    df['Fecha de llenar'] = df['Fecha de llenar'].astype(str).str.strip()
+    df['Fecha de llenar'] = pd.to_datetime(df['Fecha de llenar'], dayfirst=True, errors='coerce')
+    if df['Fecha de llenar'].isna().any():
+        mask_na = df['Fecha de llenar'].isna()
+        formats = [
+            '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M',
+            '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M',
+            '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M',
+        ]
+        for fmt in formats:
+            if mask_na.any():
+                parsed = pd.to_datetime(df.loc[mask_na, 'Fecha_original'], format=fmt, errors='coerce')
+                update_mask = mask_na & parsed.notna()
+                df.loc[update_mask, 'Fecha de llenar'] = parsed[update_mask]
+                mask_na = df['Fecha de llenar'].isna()
+    return df['Fecha de llenar']
+
+
+def fechas_sinteticas(n: int, semilla: int = 0) -> tuple[pd.Series, pd.Series]:
+    """n fechas a precisión de minuto en formatos mixtos (+ valores esperados)."""
+    rng = np.random.default_rng(semilla)
+    base = np.datetime64('2025-01-01T07:00')
+    minutos = rng.integers(0, 300 * 24 * 60, size=n)
+    esperadas = pd.Series(base + minutos.astype('timedelta64[m]'))
+    con_seg = esperadas + pd.to_timedelta(rng.integers(0, 60, size=n), unit='s')
+    formato = rng.choice(4, size=n, p=[0.6, 0.25, 0.1, 0.05])
+    texto = np.where(
+        formato == 0, con_seg.dt.strftime('%d/%m/%Y %H:%M:%S'),
+        np.where(formato == 1, esperadas.dt.strftime('%d/%m/%Y %H:%M'),
+                 np.where(formato == 2, esperadas.dt.strftime('%Y-%m-%d %H:%M'),
+                          con_seg.dt.strftime('%m/%d/%Y %H:%M:%S'))))
+    esperadas = esperadas.where(~np.isin(formato, (0, 3)), con_seg)
+    return pd.Series(texto, dtype=object), esperadas
+
+
+def _medir(fn, *args) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return time.perf_counter() - t0, res
+
+
+def main(tamanos: list[int]) -> None:
+    for n in tamanos:
+        serie, esperadas = fechas_sinteticas(n)
+        t_ant, r_ant = _medir(_parseo_anterior, serie)
+        t_nuevo, (r_nuevo, informe) = _medir(parsear_fechas, serie)
+        err_ant = int((r_ant.to_numpy() != esperadas.to_numpy()).sum())
+        err_nuevo = int((r_nuevo.to_numpy() != esperadas.to_numpy()).sum())
+        print(f'{n:>9,} filas | anterior {t_ant:7.3f}s ({err_ant} errores) | '
+              f'nuevo {t_nuevo:7.3f}s ({err_nuevo} errores, {informe.ambiguas} ambiguas) | '
+              f'x{t_ant / t_nuevo:.1f}')
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [100_000, 1_000_000])
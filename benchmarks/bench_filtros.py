@@ -0,0 +1,71 @@
+"""Benchmark: filtro por máscaras booleanas + copia vs. DatasetIndexado (searchsorted).
+
+Uso: python -m benchmarks.bench_filtros [filas ...]
+"""
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from mensajeria_core.indice import DatasetIndexado
+
+REPETICIONES = 20
+
+
+def dataset_sintetico(n: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    empleados = [f'Mensajero {i}' for i in range(12)]
+    return pd.DataFrame({
+        'Empleado': rng.choice(empleados, size=n),
+        'Fecha de llenar': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 600 * 1440, n), unit='m'),
+        'Pago': rng.choice([25.0, 75.0], size=n),
+        'Dirección de envío': [f'Calle {i % 5000}' for i in range(n)],
+    })
+
+
+def _filtro_anterior(df: pd.DataFrame, fecha_inicio, fecha_fin, colab_sel: str) -> pd.DataFrame:
+    mask = pd.Series([True] * len(df))
+    fecha_mask = df['Fecha de llenar'].notna()
+    fecha_mask &= (df['Fecha de llenar'] >= fecha_inicio)
+    fecha_mask &= (df['Fecha de llenar'] <= fecha_fin)
+    mask &= fecha_mask
+    if colab_sel != 'Total':
+        mask &= (df['Empleado'] == colab_sel)
+    return df.loc[mask].copy()
+
+
+def _medir(fn) -> tuple[float, object]:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(REPETICIONES):
+        res = fn()
+    return (time.perf_counter() - t0) / REPETICIONES, res
+
+
+def main(tamanos: list[int]) -> None:
+    for n in tamanos:
+        df = dataset_sintetico(n)
+        t0 = time.perf_counter()
+        indice = DatasetIndexado(df)
+        t_indice = time.perf_counter() - t0
+        print(f'{n:,} filas | construcción del índice (una vez por carga): {t_indice * 1e3:.1f} ms')
+        casos = [
+            ('1 semana, Total', pd.Timestamp('2025-03-01'), 'Total'),
+            ('1 semana, 1 empleado', pd.Timestamp('2025-03-01'), 'Mensajero 3'),
+            ('todo, Total', pd.Timestamp('2024-01-01'), 'Total'),
+            ('todo, 1 empleado', pd.Timestamp('2024-01-01'), 'Mensajero 3'),
+        ]
+        for nombre, ini, colab in casos:
+            fin = ini + timedelta(days=7) - timedelta(seconds=1) if 'semana' in nombre else pd.Timestamp('2026-01-01')
+            t_ant, r_ant = _medir(lambda: _filtro_anterior(df, ini, fin, colab))
+            emp = None if colab == 'Total' else colab
+            t_idx, r_idx = _medir(lambda: indice.filtrar(ini, fin, emp))
+            assert len(r_ant) == len(r_idx) and r_ant['Pago'].sum() == r_idx['Pago'].sum()
+            print(f'  {nombre:<22} {len(r_idx):>9,} filas | máscaras {t_ant * 1e3:8.2f} ms | '
+                  f'índice {t_idx * 1e3:8.3f} ms | x{t_ant / t_idx:,.0f}')
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [1_000_000])
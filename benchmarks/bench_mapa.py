@@ -0,0 +1,48 @@
+"""Benchmark: tiempo de construcción y tamaño del HTML de crear_mapa por modo.
+
+Uso: python -m benchmarks.bench_mapa [puntos ...]
+El modo 'marcadores' solo se mide hasta 10k puntos y 'capa' hasta 100k
+(más allá tardan minutos o generan HTML inmanejable).
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from mensajeria_core.mapa import crear_mapa
+
+MAX_PUNTOS = {'marcadores': 10_000, 'capa': 100_000}
+
+
+def entregas_sinteticas(n: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'Empleado': rng.choice(['Juan Pérez', 'María Gómez', 'Pedro Ruiz'], size=n),
+        'Nombre del cliente (usuario/codigo)': [f'Cliente {i % 500}' for i in range(n)],
+        'Dirección de envío': [f'Av. Winston Churchill #{i}, Piantini, Santo Domingo' for i in range(n)],
+        'Fecha de llenar': pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 90 * 1440, n), unit='m'),
+        'Pago': rng.choice([25.0, 75.0, np.nan], size=n, p=[0.6, 0.35, 0.05]),
+        'Latitud': rng.uniform(18.42, 18.52, n),
+        'Longitud': rng.uniform(-69.99, -69.87, n),
+    })
+
+
+def medir(df: pd.DataFrame, modo: str) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    html = crear_mapa(df, modo=modo).get_root().render()
+    return time.perf_counter() - t0, len(html.encode('utf-8'))
+
+
+def main(tamanos: list[int]) -> None:
+    for n in tamanos:
+        df = entregas_sinteticas(n)
+        for modo in ('marcadores', 'capa', 'densidad'):
+            if n > MAX_PUNTOS.get(modo, n):
+                continue
+            seg, tam = medir(df, modo)
+            print(f'{n:>8,} puntos | {modo:<10} | {seg:7.2f}s | {tam / 1e6:7.2f} MB')
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
@@ -0,0 +1,160 @@
+"""Benchmark: generar_pdf anterior (iterrows + cell por valor + archivo temporal) vs. motor actual.
+
+Uso: python -m benchmarks.bench_pdf [filas ...]
+Verifica que ambos produzcan las mismas páginas, los mismos totales y el mismo
+contenido (operadores PDF de cada página, incluida la selección de fuente de la tabla).
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_mapa import entregas_sinteticas
+from mensajeria_core.config import COLUMNAS_TABLA
+from mensajeria_core.reporte import ReportPDF, generar_pdf, pdf_a_bytes
+
+MAX_FILAS_ANTERIOR = 50_000
+
+
+def _add_table_header_anterior(pdf, headers, widths):
+    pdf.set_font('Arial', 'B', 8)
+    for h, w in zip(headers, widths):
+        h_txt = (h[:28] + '...') if len(h) > 31 else h
+        pdf.cell(w, 8, h_txt, 1)
+    pdf.ln()
+
+
+def _add_row_anterior(pdf, values, widths):
+    pdf.set_font('Arial', '', 7)
+    for v, w in zip(values, widths):
+        txt = str(v) if v is not None else ''
+        if len(txt) > 45:
+            txt = txt[:45] + '...'
+        pdf.cell(w, 7, txt, 1)
+    pdf.ln()
+
+
+def _generar_pdf_anterior(df_filtrado, fecha_inicio, fecha_fin, colaborador):
+    """Copia del generar_pdf previo (sin cubo), para comparar tiempos."""
+    pdf = ReportPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 13)
+    pdf.cell(0, 10, 'REPORTE DETALLADO (Solo tabla)', 0, 1, 'C')
+    pdf.ln(2)
+    pdf.set_font('Arial', '', 10)
+    for line in (f"Período: {fecha_inicio.strftime('%d/%m/%Y')} - {fecha_fin.strftime('%d/%m/%Y')}",
+                 f"Colaborador: {'Todos' if colaborador == 'Total' else colaborador}",
+                 f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"):
+        pdf.cell(0, 7, line, 0, 1)
+    pdf.ln(4)
+    cols_presentes = [c for c in COLUMNAS_TABLA if c in df_filtrado.columns]
+    widths_map = {'Empleado': 25, 'Tipo': 16, 'Dirección de envío': 48, 'Fecha de llenar': 26,
+                  'Nombre del cliente (usuario/codigo)': 35,
+                  'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)': 40,
+                  'Pago': 16}
+    widths = [widths_map.get(c, 28) for c in cols_presentes]
+    # Orden estable (el original usaba quicksort): los empates salen en el mismo orden que el actual
+    df_filtrado = df_filtrado.sort_values('Fecha de llenar', kind='stable')
+    df_filtrado['__FechaD__'] = df_filtrado['Fecha de llenar'].dt.date
+    total_general, total_checkins = 0.0, 0
+    for fecha_dia, df_dia in df_filtrado.groupby('__FechaD__'):
+        titulo_dia = fecha_dia.strftime('%d/%m/%Y') if isinstance(fecha_dia, date) else 'Sin fecha'
+        pdf.set_font('Arial', 'B', 11)
+        pdf.cell(0, 8, f"Día: {titulo_dia}", 0, 1)
+        _add_table_header_anterior(pdf, cols_presentes, widths)
+        for _, r in df_dia.iterrows():
+            vals = []
+            for c in cols_presentes:
+                val = r.get(c, '')
+                if c == 'Fecha de llenar' and pd.notna(val):
+                    val = pd.to_datetime(val).strftime('%d/%m/%Y %H:%M')
+                vals.append(val)
+            _add_row_anterior(pdf, vals, widths)
+            if pdf.get_y() > 265:
+                pdf.add_page()
+                _add_table_header_anterior(pdf, cols_presentes, widths)
+        monto_dia = df_dia['Pago'].sum()
+        checkins_dia = len(df_dia)
+        total_general += float(monto_dia or 0)
+        total_checkins += int(checkins_dia)
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(sum(widths[:-2]), 8, 'Subtotal del día', 1)
+        pdf.cell(widths[-2], 8, str(checkins_dia), 1)
+        pdf.cell(widths[-1], 8, f"${monto_dia:,.2f}", 1)
+        pdf.ln(10)
+    pdf.ln(2)
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, 'TOTAL GENERAL DEL PERIODO', 0, 1)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(60, 8, 'Check-ins', 1)
+    pdf.cell(60, 8, 'Monto total', 1)
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(60, 8, str(total_checkins), 1)
+    pdf.cell(60, 8, f"${total_general:,.2f}", 1)
+    totales = _totales(pdf)
+    contenidos = _contenidos(pdf)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+        pdf.output(tmp.name)
+        with open(tmp.name, 'rb') as f:
+            data = f.read()
+    os.unlink(tmp.name)
+    return pdf, totales, contenidos, data
+
+
+def _contenidos(pdf) -> list[str]:
+    """Operadores de cada página (antes de output()), sin la línea 'Generado:' que depende de la hora."""
+    return [re.sub(r'\(Generado: [^)]*\)', '(Generado)', bytes(pdf.pages[p].contents).decode('latin-1'))
+            for p in range(1, pdf.page + 1)]
+
+
+def _totales(pdf) -> list[str]:
+    """Últimos dos textos de la última página: check-ins y monto total."""
+    contenido = bytes(pdf.pages[pdf.page].contents).decode('latin-1')
+    return re.findall(r'\((.*?)\) Tj', contenido)[-2:]
+
+
+def datos_reporte(n: int) -> pd.DataFrame:
+    df = entregas_sinteticas(n)
+    rng = np.random.default_rng(1)
+    df['Tipo'] = rng.choice(['Entrega', 'Retiro'], size=n)
+    df['Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)'] = rng.choice(
+        ['maria/secretaria', 'juan/asistente (recepción)', 'miguel ruiz/doctor'], size=n)
+    # ~1 mes de entregas, como el reporte mensual de todos los colaboradores
+    df['Fecha de llenar'] = pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 30 * 1440, n), unit='m')
+    return df[[c for c in COLUMNAS_TABLA if c in df.columns]].sort_values('Fecha de llenar', ignore_index=True)
+
+
+def main(tamanos: list[int]) -> None:
+    ini, fin = pd.Timestamp('2025-07-01'), pd.Timestamp('2025-07-31')
+    for n in tamanos:
+        df = datos_reporte(n)
+        t0 = time.perf_counter()
+        pdf = generar_pdf(df, ini, fin, 'Total')
+        totales = _totales(pdf)
+        contenidos = _contenidos(pdf) if n <= MAX_FILAS_ANTERIOR else None
+        data = pdf_a_bytes(pdf)
+        t_nuevo = time.perf_counter() - t0
+        linea = f'{n:>9,} filas | actual {t_nuevo:7.2f}s | {pdf.page:,} págs | {len(data) / 1e6:6.2f} MB'
+        if n <= MAX_FILAS_ANTERIOR:
+            t0 = time.perf_counter()
+            pdf_ant, totales_ant, contenidos_ant, _ = _generar_pdf_anterior(df, ini, fin, 'Total')
+            t_ant = time.perf_counter() - t0
+            assert pdf_ant.page == pdf.page, (pdf_ant.page, pdf.page)
+            assert totales_ant == totales, (totales_ant, totales)
+            # Única diferencia buscada: el motor anterior escribía 'nan' en las celdas vacías
+            contenidos_ant = [c.replace('Td (nan) Tj', 'Td () Tj') for c in contenidos_ant]
+            distintas = [p + 1 for p, (a, b) in enumerate(zip(contenidos_ant, contenidos)) if a != b]
+            assert not distintas, f'contenido distinto en las páginas {distintas[:10]}'
+            linea += f' | anterior {t_ant:7.2f}s | x{t_ant / t_nuevo:.1f} | totales {totales}'
+        print(linea)
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [5_000, 50_000, 200_000])
@@ -0,0 +1,59 @@
+"""Generador de hojas sintéticas con la forma del Google Sheet publicado.
+
+Columnas: exactamente COLUMNAS_TABLA + Latitud/Longitud, todo como texto (igual
+que el CSV de la hoja). Coordenadas dentro y alrededor de CUADRANTE_COORDS,
+fechas en formatos mixtos (ver bench_fechas.fechas_sinteticas) y algunos
+valores vacíos en Pago / coordenadas / Tipo.
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_fechas import fechas_sinteticas
+from mensajeria_core.config import COLUMNAS_TABLA, CUADRANTE_COORDS
+
+EMPLEADOS = ['Juan Pérez', 'María Gómez', 'Pedro Ruiz', 'Ana Martínez', 'Luis Fernández',
+             'Carmen Rosario', 'José Castillo', 'Rosa Almonte']
+TIPOS = ['Entrega', 'Retiro', 'Diligencia']
+SECTORES = ['Piantini', 'Naco', 'Evaristo Morales', 'Gazcue', 'Los Prados', 'Bella Vista',
+            'Arroyo Hondo', 'Los Mina', 'Herrera', 'Villa Mella']
+RECIBE = ['maria/secretaria', 'juan/asistente', 'miguel ruiz/doctor', 'recepción', 'portero']
+# Margen alrededor del cuadrante (fracción del ancho/alto) donde caen los puntos "fuera"
+MARGEN = 0.5
+
+
+def hoja_sintetica(n: int, semilla: int = 0, faltantes: float = 0.02) -> pd.DataFrame:
+    """n filas de texto como las del CSV publicado (fechas en formatos mixtos)."""
+    rng = np.random.default_rng(semilla)
+    coords = np.asarray(CUADRANTE_COORDS)
+    (lat0, lon0), (lat1, lon1) = coords.min(axis=0), coords.max(axis=0)
+    dlat, dlon = (lat1 - lat0) * MARGEN, (lon1 - lon0) * MARGEN
+    lat = rng.uniform(lat0 - dlat, lat1 + dlat, n)
+    lon = rng.uniform(lon0 - dlon, lon1 + dlon, n)
+    fechas, _ = fechas_sinteticas(n, semilla)
+
+    clientes = np.array([f'CLI-{i:05d}' for i in range(max(n // 20, 50))], dtype=object)
+    direcciones = np.array([f'Calle {i % 400 + 1} #{i % 97 + 1}, {SECTORES[i % len(SECTORES)]}, Santo Domingo'
+                            for i in range(max(n // 5, 100))], dtype=object)
+    hoja = pd.DataFrame({
+        'Empleado': rng.choice(EMPLEADOS, n),
+        'Tipo': rng.choice(TIPOS, n, p=[0.7, 0.2, 0.1]),
+        'Dirección de envío': direcciones[rng.integers(0, len(direcciones), n)],
+        'Fecha de llenar': fechas.to_numpy(),
+        'Nombre del cliente (usuario/codigo)': clientes[rng.integers(0, len(clientes), n)],
+        'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)': rng.choice(RECIBE, n),
+        'Pago': rng.choice(['25', '75'], n, p=[0.55, 0.45]),
+        'Latitud': np.char.mod('%.6f', lat),
+        'Longitud': np.char.mod('%.6f', lon),
+    }, columns=COLUMNAS_TABLA + ['Latitud', 'Longitud'])
+
+    for col in ('Pago', 'Latitud', 'Longitud', 'Tipo'):
+        hoja.loc[rng.random(n) < faltantes, col] = ''
+    return hoja
+
+
+def escribir_csv(n: int, ruta, semilla: int = 0) -> int:
+    """Escribe la hoja sintética como CSV; devuelve el tamaño en bytes."""
+    hoja = hoja_sintetica(n, semilla)
+    hoja.to_csv(ruta, index=False)
+    with open(ruta, 'rb') as f:
+        return f.seek(0, 2)
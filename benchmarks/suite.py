@@ -0,0 +1,192 @@
+"""Suite de benchmarks de los caminos calientes, con salida JSON comparable entre corridas.
+
+Uso:
+    python -m benchmarks.suite                                  # 1k, 100k, 1M filas
+    python -m benchmarks.suite --filas 1000 100000 --salida base.json
+    python -m benchmarks.suite --comparar base.json             # marca regresiones
+
+Por cada tamaño se genera una hoja sintética (benchmarks.generador), se sirve
+por HTTP local (http.server, con If-Modified-Since → 304 como Google Sheets) y
+se mide: carga en frío / sin cambios / incremental (sincronización + zonas +
+duplicados + esquema compacto, lo mismo que hace el dataset compartido de la
+app), detección de duplicados sola, índice y filtro, recorridos, mapa y PDF.
+La carga no mezcla hojas archivadas (MENSAJERIA_FUENTES_ARCHIVADAS) y geocodifica
+con una caché SQLite nueva en el directorio temporal y sin backend: las medidas
+no dependen de corridas anteriores ni tocan la caché del usuario.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.generador import escribir_csv, hoja_sintetica
+from mensajeria_core import api
+from mensajeria_core.duplicados import marcar_duplicados
+from mensajeria_core.geocodificacion import CacheGeocodigos, Geocodificador
+from mensajeria_core.indice import DatasetIndexado
+
+TAMANOS = [1_000, 100_000, 1_000_000]
+# El PDF crece ~30 págs por cada 1k filas: por encima de esto se mide sobre las primeras filas
+MAX_FILAS_PDF = 100_000
+REPETICIONES_RAPIDAS = 5
+# Tiempo relativo a la corrida base a partir del cual se marca regresión
+UMBRAL_REGRESION = 1.20
+# Diferencias absolutas menores que esto son ruido (etapas de sub-milisegundos)
+TOLERANCIA_SEGUNDOS = 0.005
+
+
+class _Silencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _servidor(directorio: str) -> ThreadingHTTPServer:
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), partial(_Silencioso, directory=directorio))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _cronometrar(fn, repeticiones: int = 1):
+    """(segundos, resultado): una corrida, o la mediana si repeticiones > 1 (con calentamiento)."""
+    if repeticiones > 1:
+        fn()
+    tiempos, res = [], None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        res = fn()
+        tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos), res
+
+
+def medir_tamano(n: int, semilla: int = 0) -> list[dict]:
+    resultados = []
+
+    def anotar(etapa: str, segundos: float, **detalle):
+        resultados.append({'etapa': etapa, 'filas': n, 'segundos': round(segundos, 6), 'detalle': detalle})
+        print(f'{n:>10,} | {etapa:<24} {segundos:9.4f}s  {detalle or ""}', flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / 'hoja.csv'
+        tam = escribir_csv(n, ruta, semilla)
+        servidor = _servidor(tmp)
+        url = f'http://127.0.0.1:{servidor.server_address[1]}/hoja.csv'
+        cache = str(Path(tmp) / 'cache')
+        geo = Geocodificador(CacheGeocodigos(str(Path(tmp) / 'geocodigos.sqlite')), backend=None)
+        cargar = partial(api.cargar, url, cache, archivadas=(), geo=geo)
+        try:
+            seg, df = _cronometrar(cargar)
+            anotar('carga_frio', seg, bytes_csv=tam)
+            seg, _ = _cronometrar(cargar)
+            anotar('carga_sin_cambios', seg)
+            # ~1% de filas nuevas al final, como una hoja que sigue recibiendo entregas
+            extra = hoja_sintetica(max(n // 100, 1), semilla + 1)
+            time.sleep(1.1)  # Last-Modified tiene resolución de segundos
+            extra.to_csv(ruta, mode='a', header=False, index=False)
+            seg, df = _cronometrar(cargar)
+            anotar('carga_incremental', seg, filas_nuevas=len(extra))
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    seg, marcado = _cronometrar(lambda: marcar_duplicados(df))
+    anotar('duplicados', seg, marcados=int(marcado['Duplicado'].sum()))
+    seg, indice = _cronometrar(lambda: DatasetIndexado(df))
+    anotar('indice', seg)
+    ini = indice.fecha_min + (indice.fecha_max - indice.fecha_min) / 2
+    ini, fin = api.rango_dias(ini, ini + timedelta(days=6))
+    seg, semana = _cronometrar(lambda: indice.filtrar(ini, fin), REPETICIONES_RAPIDAS)
+    anotar('filtro_semana', seg, filas_resultado=len(semana))
+    empleado = indice.empleados()[0]
+    seg, res = _cronometrar(lambda: indice.filtrar(ini, fin, empleado), REPETICIONES_RAPIDAS)
+    anotar('filtro_semana_empleado', seg, filas_resultado=len(res))
+    seg, _ = _cronometrar(lambda: api.resumir(df, ini, fin))
+    anotar('cubo_resumen', seg)
+    seg, tabla_rutas = _cronometrar(lambda: api.rutas(indice.df))
+    anotar('rutas_historial', seg, jornadas=len(tabla_rutas))
+
+    seg, html = _cronometrar(lambda: api.mapa_html(indice.df))
+    anotar('mapa_todo_auto', seg, bytes_html=len(html))
+    seg, html = _cronometrar(lambda: api.mapa_html(semana, modo='puntos'))
+    anotar('mapa_semana_puntos', seg, bytes_html=len(html), puntos=len(semana))
+
+    filas_pdf = indice.df.iloc[:MAX_FILAS_PDF]
+    f_ini, f_fin = filas_pdf['Fecha de llenar'].min(), filas_pdf['Fecha de llenar'].max()
+    seg, pdf = _cronometrar(lambda: api.reporte_pdf(filas_pdf, f_ini, f_fin))
+    anotar('pdf', seg, filas_pdf=len(filas_pdf), bytes_pdf=len(pdf))
+    return resultados
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual: dict, base: dict, umbral: float = UMBRAL_REGRESION) -> list[str]:
+    """Líneas de comparación por (etapa, filas); devuelve las que empeoraron más que el umbral."""
+    previos = {(r['etapa'], r['filas']): r['segundos'] for r in base['resultados']}
+    regresiones = []
+    print(f"\nComparación contra {base['meta'].get('commit')} ({base['meta'].get('fecha')}):")
+    for r in actual['resultados']:
+        antes = previos.get((r['etapa'], r['filas']))
+        if not antes:
+            continue
+        razon = r['segundos'] / antes
+        marca = '  ⚠️ regresión' if razon > umbral and r['segundos'] - antes > TOLERANCIA_SEGUNDOS else ''
+        linea = f"{r['filas']:>10,} | {r['etapa']:<24} {antes:9.4f}s → {r['segundos']:9.4f}s  x{razon:5.2f}{marca}"
+        print(linea)
+        if marca:
+            regresiones.append(linea)
+    return regresiones
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    p.add_argument('--filas', type=int, nargs='+', default=TAMANOS)
+    p.add_argument('--salida', default=None, help='JSON de resultados (por defecto bench_<fecha>.json)')
+    p.add_argument('--comparar', default=None, help='JSON de una corrida anterior')
+    p.add_argument('--umbral', type=float, default=UMBRAL_REGRESION)
+    args = p.parse_args(argv)
+
+    # Los imports perezosos (folium, fpdf) no deben cargarse a la primera medición
+    import mensajeria_core.mapa  # noqa: F401
+    import mensajeria_core.reporte  # noqa: F401
+
+    informe = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'resultados': [r for n in args.filas for r in medir_tamano(n)],
+    }
+    salida = Path(args.salida or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'\nResultados: {salida}')
+
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text(encoding='utf-8'))
+        if comparar(informe, base, args.umbral):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
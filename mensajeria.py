@@ -1,73 +1,39 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta, date
-import folium
-from streamlit_folium import st_folium
-from fpdf import FPDF
-import tempfile
-import os
-import requests
+from datetime import datetime, timedelta
+import hmac
 import io
-from branca.element import Element
-
-# ==============================
-# CONFIGURACIÓN
-# ==============================
-# URL pública del Google Sheet (publicada como CSV)
-SHEET_URL = "https://docs.google.com/spreadsheets/d/1pXvN1PdQKfU8N5b8G5kPY5K8uhgCEbyt5EhKQt1-5ik/export?format=csv"
-
-# NUEVO cuadrante (Gran Santo Domingo)
-CUADRANTE_COORDS = [
-    [18.470910, -69.881842],
-    [18.467871, -69.889721],
-    [18.464781, -69.893714],
-    [18.461370, -69.899534],
-    [18.460956, -69.902208],
-    [18.456405, -69.913385],
-    [18.446481, -69.924817],
-    [18.435420, -69.943950],
-    [18.426873, -69.971667],
-    [18.426485, -69.981364],
-    [18.424306, -69.989173],
-    [18.428616, -69.990499],
-    [18.442414, -69.977843],
-    [18.451322, -69.974168],
-    [18.461973, -69.969014],
-    [18.484094, -69.967227],
-    [18.486417, -69.969167],
-    [18.489507, -69.969121],
-    [18.494270, -69.964476],
-    [18.507445, -69.960890],
-    [18.520477, -69.936902],
-    [18.509636, -69.915537],
-    [18.513721, -69.896844],
-    [18.507693, -69.878878],
-    [18.500750, -69.875250],
-    [18.494284, -69.877883],
-    [18.488074, -69.883216],
-    [18.471752, -69.881296],
-]
-
-# Columnas esperadas para la tabla
-COLUMNAS_TABLA = [
-    'Empleado',
-    'Tipo',
-    'Dirección de envío',
-    'Fecha de llenar',
-    'Nombre del cliente (usuario/codigo)',
-    'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)',
-    'Pago',
-]
+import threading
+import uuid
+
+from mensajeria_core import api
+from mensajeria_core.cache import CacheLRU, huella
+from mensajeria_core.cache_reportes import CacheReportes, PrerenderReportes, clave_reporte
+from mensajeria_core.compartido import DatasetCompartido
+from mensajeria_core.config import (SHEET_URL, COLUMNAS_TABLA, CACHE_VISTAS_MAX_MB, CACHE_VISTAS_MAX_ENTRADAS,
+                                    ADMIN_CLAVE, ADMIN_USUARIOS, FUENTES_ARCHIVADAS, RUTA_PAUSA_MIN, TAMANOS_PAGINA)
+from mensajeria_core.exportacion import MIME_EXPORTACION, TrabajoExportacion, estimar, limpiar_temporales
+from mensajeria_core.indice import DatasetIndexado, largo
+from mensajeria_core.instrumentacion import (Corrida, Instrumentacion, cerrar_perfil, iniciar_perfil,
+                                             tabla_corrida)
+from mensajeria_core.memoria import informe_memoria, memoria_por_columna
+from mensajeria_core.rollup import CuboDiario, actualizar_cubo
+from mensajeria_core.sincronizacion import SincronizadorFuentes, SincronizadorHoja, crear_sincronizador
 
 # ==============================
 # AUTENTICACIÓN SIMPLE
 # ==============================
 def check_password() -> bool:
-    """Login básico en sidebar: idemefa / idemefa"""
+    """Login básico en sidebar: idemefa / idemefa (administradores: ADMIN_USUARIOS / ADMIN_CLAVE)"""
     def _password_entered():
-        user_ok = st.session_state.get("username", "") == "idemefa"
-        pass_ok = st.session_state.get("password", "") == "idemefa"
-        st.session_state["password_correct"] = bool(user_ok and pass_ok)
+        usuario = st.session_state.get("username", "")
+        clave = st.session_state.get("password", "")
+        user_ok = usuario == "idemefa"
+        pass_ok = clave == "idemefa"
+        # Administración: credencial propia, nunca el login compartido
+        admin_ok = bool(ADMIN_CLAVE) and usuario in ADMIN_USUARIOS and hmac.compare_digest(clave, ADMIN_CLAVE)
+        st.session_state["password_correct"] = bool(user_ok and pass_ok) or admin_ok
+        st.session_state["es_admin"] = admin_ok
         # por seguridad, no guardamos credenciales en estado si es correcto
         if st.session_state["password_correct"]:
             del st.session_state["username"]
@@ -90,304 +56,87 @@ def check_password() -> bool:
 # ==============================
 # UTILIDADES
 # ==============================
-@st.cache_data(ttl=300)
+@st.cache_resource
+def _sincronizador(url: str) -> SincronizadorHoja | SincronizadorFuentes:
+    """Un sincronizador por URL compartido entre sesiones (snapshot en disco, + hojas archivadas)."""
+    return crear_sincronizador(url, FUENTES_ARCHIVADAS)
+
+
+@st.cache_resource
+def _limpieza_exportaciones() -> int:
+    """Una vez por proceso: borra exportaciones temporales viejas que dejaron sesiones anteriores."""
+    return limpiar_temporales()
+
+
+@st.cache_resource
+def _reportes() -> PrerenderReportes:
+    """Caché de reportes en disco + hilo que pre-genera los períodos estándar."""
+    return PrerenderReportes(CacheReportes())
+
+
+@st.cache_resource
+def _dataset_compartido(url: str) -> DatasetCompartido:
+    """Un dataset por proceso para todas las sesiones, refrescado por un hilo de fondo."""
+    compartido = DatasetCompartido(_sincronizador(url))
+    # Cada versión nueva del dataset dispara la pre-generación de los reportes estándar
+    compartido.suscribir(_reportes().programar)
+    compartido.iniciar()
+    return compartido
+
+
 def cargar_datos(url: str) -> pd.DataFrame:
-    """Descarga el CSV publicado del Google Sheet y normaliza columnas clave."""
-    try:
-        resp = requests.get(url, timeout=20)
-        resp.raise_for_status()
-        df = pd.read_csv(io.StringIO(resp.text))
-
-        # MEJOR MANEJO DE FECHAS - Manejar múltiples formatos
-        if 'Fecha de llenar' in df.columns:
-            # Guardar una copia original para debug
-            df['Fecha_original'] = df['Fecha de llenar'].copy()
-            
-            # Primero: limpiar y estandarizar formatos
-            # Reemplazar múltiples espacios y normalizar
-            df['Fecha de llenar'] = df['Fecha de llenar'].astype(str).str.strip()
-            
-            # Intentar parsing flexible con dayfirst=True para formato día/mes/año
-            df['Fecha de llenar'] = pd.to_datetime(
-                df['Fecha de llenar'], 
-                dayfirst=True,  # Importante: interpretar 24/07/2025 como día 24, mes 7
-                errors='coerce'
-            )
-            
-            # Si todavía hay NaT, intentar formato específico
-            if df['Fecha de llenar'].isna().any():
-                # Para registros problemáticos, intentar formato específico
-                mask_na = df['Fecha de llenar'].isna()
-                problematic_dates = df.loc[mask_na, 'Fecha_original']
-                
-                # Intentar diferentes formatos
-                formats = [
-                    '%d/%m/%Y %H:%M:%S',  # 24/07/2025 10:36:26
-                    '%d/%m/%Y %H:%M',     # 03/10/2025 17:07
-                    '%m/%d/%Y %H:%M:%S',  # 07/24/2025 10:36:26 (US)
-                    '%m/%d/%Y %H:%M',     # 10/03/2025 17:07 (US)
-                    '%Y-%m-%d %H:%M:%S',  # 2025-07-24 10:36:26
-                    '%Y-%m-%d %H:%M',     # 2025-10-03 17:07
-                ]
-                
-                for fmt in formats:
-                    if mask_na.any():
-                        try:
-                            parsed = pd.to_datetime(
-                                df.loc[mask_na, 'Fecha_original'], 
-                                format=fmt, 
-                                errors='coerce'
-                            )
-                            # Actualizar solo los que se parsean correctamente
-                            update_mask = mask_na & parsed.notna()
-                            df.loc[update_mask, 'Fecha de llenar'] = parsed[update_mask]
-                            mask_na = df['Fecha de llenar'].isna()
-                        except:
-                            continue
-
-        if 'Pago' in df.columns:
-            df['Pago'] = pd.to_numeric(df['Pago'], errors='coerce')
-        if 'Latitud' in df.columns:
-            df['Latitud'] = pd.to_numeric(df['Latitud'], errors='coerce')
-        if 'Longitud' in df.columns:
-            df['Longitud'] = pd.to_numeric(df['Longitud'], errors='coerce')
-
-        # Quitar filas completamente vacías
-        df = df.dropna(how='all')
-        return df
-    except Exception as e:
-        st.error(f"❌ Error cargando datos de Google Sheets: {e}")
+    """Devuelve al instante la última copia buena del Google Sheet (sin descargar en el request)."""
+    compartido = _dataset_compartido(url)
+    instantanea = compartido.actual()
+    if instantanea is None:
+        st.error(f"❌ Error cargando datos de Google Sheets: {compartido.ultimo_error}")
         st.info("Verifica que la hoja esté publicada en Archivo → Compartir → Publicar en la web → Hoja 'data' en formato CSV")
         return pd.DataFrame()
+    if compartido.ultimo_error:
+        st.warning(f"⚠️ No se pudo actualizar desde Google Sheets ({compartido.ultimo_error}); "
+                   "mostrando la última copia buena.")
+    return instantanea.df
 
 
-def _bounds_from_coords(coords: list[list[float]]):
-    """Devuelve (sw, ne) bounds a partir de una lista de [lat, lon]."""
-    if not coords:
-        return None
-    lats = [c[0] for c in coords]
-    lons = [c[1] for c in coords]
-    sw = [min(lats), min(lons)]
-    ne = [max(lats), max(lons)]
-    return [sw, ne]
-
-
-def crear_mapa(df: pd.DataFrame):
-    """Construye un mapa Folium centrado en el GSD: ajusta vista a marcadores + polígono para evitar vista fuera de zona (p.ej., Isla Saona)."""
-    cols_coord_ok = {'Latitud', 'Longitud'}.issubset(set(df.columns))
-
-    # Coordenadas de marcadores válidos (si hay)
-    coords_markers = []
-    if not df.empty and cols_coord_ok:
-        dfc = df.dropna(subset=['Latitud', 'Longitud'])
-        coords_markers = dfc[['Latitud', 'Longitud']].values.tolist()
-
-    # Centro por defecto: Gran Santo Domingo
-    center_default = [18.4861, -69.9312]
-    m = folium.Map(location=center_default, zoom_start=12, control_scale=True)
-
-    # Polígono del cuadrante (zona $25)
-    folium.Polygon(
-        locations=CUADRANTE_COORDS,
-        color='blue',
-        weight=2,
-        fill=True,
-        fill_color='blue',
-        fill_opacity=0.10,
-        popup='Cuadrante de Zona ($25)',
-        tooltip='Zona de $25',
-    ).add_to(m)
-
-    # Marcadores
-    if coords_markers:
-        for _, row in dfc.iterrows():
-            pago = row.get('Pago', None)
-            if pd.notna(pago) and float(pago) == 25:
-                color = 'green'; icono = 'ok-sign'; tip = 'Dentro cuadrante ($25)'
-            elif pd.notna(pago) and float(pago) == 75:
-                color = 'red'; icono = 'remove-sign'; tip = 'Fuera cuadrante ($75)'
-            else:
-                color = 'gray'; icono = 'question-sign'; tip = 'Sin clasificación'
-
-            fecha_val = row.get('Fecha de llenar', pd.NaT)
-            fecha_str = fecha_val.strftime('%d/%m/%Y %H:%M') if pd.notna(fecha_val) else 'N/A'
-
-            popup_html = f"""
-            <div style='width:260px;'>
-                <h4 style='margin:0 0 6px 0;'>Detalle de Entrega</h4>
-                <p style='margin:0;'><b>Colaborador:</b> {row.get('Empleado', 'N/A')}</p>
-                <p style='margin:0;'><b>Cliente:</b> {row.get('Nombre del cliente (usuario/codigo)', 'N/A')}</p>
-                <p style='margin:0;'><b>Pago:</b> ${row.get('Pago', 'N/A')}</p>
-                <p style='margin:0;'><b>Fecha:</b> {fecha_str}</p>
-                <p style='margin:0;'><b>Dirección:</b> {str(row.get('Dirección de envío', 'N/A'))[:60]}...</p>
-            </div>
-            """
-
-            folium.Marker(
-                location=[row['Latitud'], row['Longitud']],
-                popup=folium.Popup(popup_html, max_width=320),
-                tooltip=tip,
-                icon=folium.Icon(color=color, icon=icono, prefix='glyphicon'),
-            ).add_to(m)
-
-    # Leyenda simple (HTML)
-    legend_html = """
-    <div style="
-        position: fixed;
-        bottom: 30px; left: 30px;
-        z-index: 9999; background: white;
-        padding: 8px 10px; border: 1px solid #ccc; border-radius: 6px; font-size: 13px;">
-      <b>Leyenda</b><br>
-      <span style="display:inline-block;width:10px;height:10px;background:green;margin-right:6px;"></span> $25 (dentro cuadrante)<br>
-      <span style="display:inline-block;width:10px;height:10px;background:red;margin-right:6px;"></span> $75 (fuera cuadrante)
-    </div>
-    """
-    m.get_root().html.add_child(Element(legend_html))
-
-    # Ajustar vista para que se vea el cuadrante (y marcadores si hay)
-    all_coords = CUADRANTE_COORDS.copy()
-    all_coords.extend(coords_markers)
-    bounds = _bounds_from_coords(all_coords)
-    if bounds:
-        m.fit_bounds(bounds, padding=(15, 15))
-
-    folium.LayerControl().add_to(m)
-    return m
+@st.cache_resource
+def _cache_vistas() -> CacheLRU:
+    """Caché de vistas (HTML del mapa, resúmenes) compartida entre sesiones."""
+    return CacheLRU(max_bytes=CACHE_VISTAS_MAX_MB * 1024 * 1024, max_entradas=CACHE_VISTAS_MAX_ENTRADAS)
 
 
-# ==============================
-# PDF – solo tabla + subtotales diarios + total general
-# ==============================
-class ReportPDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'Reporte de Mensajería - IDEMEFA', 0, 1, 'C')
-        self.ln(2)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
-
-
-def _add_table_header(pdf: ReportPDF, headers, widths):
-    pdf.set_font('Arial', 'B', 8)
-    for h, w in zip(headers, widths):
-        h_txt = (h[:28] + '...') if len(h) > 31 else h
-        pdf.cell(w, 8, h_txt, 1)
-    pdf.ln()
-
-
-def _add_row(pdf: ReportPDF, values, widths):
-    pdf.set_font('Arial', '', 7)
-    for v, w in zip(values, widths):
-        txt = str(v) if v is not None else ''
-        if len(txt) > 45:
-            txt = txt[:45] + '...'
-        pdf.cell(w, 7, txt, 1)
-    pdf.ln()
-
-
-def generar_pdf(df_filtrado: pd.DataFrame, fecha_inicio: datetime, fecha_fin: datetime, colaborador: str):
-    pdf = ReportPDF()
-    pdf.add_page()
-
-    # Encabezado de reporte
-    pdf.set_font('Arial', 'B', 13)
-    pdf.cell(0, 10, 'REPORTE DETALLADO (Solo tabla)', 0, 1, 'C')
-    pdf.ln(2)
-
-    pdf.set_font('Arial', '', 10)
-    periodo_txt = f"Período: {fecha_inicio.strftime('%d/%m/%Y')} - {fecha_fin.strftime('%d/%m/%Y')}"
-    colab_txt = f"Colaborador: {'Todos' if colaborador == 'Total' else colaborador}"
-    gen_txt = f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    for line in (periodo_txt, colab_txt, gen_txt):
-        pdf.cell(0, 7, line, 0, 1)
-    pdf.ln(4)
-
-    # Asegurar columnas
-    cols_presentes = [c for c in COLUMNAS_TABLA if c in df_filtrado.columns]
-    # Ajustes de ancho (suma aprox 190)
-    widths_map = {
-        'Empleado': 25,
-        'Tipo': 16,
-        'Dirección de envío': 48,
-        'Fecha de llenar': 26,
-        'Nombre del cliente (usuario/codigo)': 35,
-        'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)': 40,
-        'Pago': 16,
-    }
-    widths = [widths_map.get(c, 28) for c in cols_presentes]
+@st.cache_resource
+def _instrumentacion() -> Instrumentacion:
+    """Historial de tiempos por etapa de todas las sesiones + log JSON-lines rotativo."""
+    return Instrumentacion()
 
-    # Ordenar por fecha para subtotales
-    if 'Fecha de llenar' in df_filtrado.columns:
-        df_filtrado = df_filtrado.sort_values('Fecha de llenar')
 
-    # Subtotales por día
-    if 'Fecha de llenar' in df_filtrado.columns:
-        df_filtrado['__FechaD__'] = df_filtrado['Fecha de llenar'].dt.date
-    else:
-        df_filtrado['__FechaD__'] = None
+@st.cache_resource(max_entries=2)
+def _indice(version: str, _df: pd.DataFrame) -> DatasetIndexado:
+    """Dataset ordenado por fecha + índice por empleado, uno por versión de datos."""
+    return DatasetIndexado(_df)
 
-    total_general = 0.0
-    total_checkins = 0
 
-    for fecha_dia, df_dia in df_filtrado.groupby('__FechaD__'):
-        # Título de día
-        if isinstance(fecha_dia, date):
-            titulo_dia = fecha_dia.strftime('%d/%m/%Y')
-        else:
-            try:
-                titulo_dia = pd.to_datetime(fecha_dia).strftime('%d/%m/%Y')
-            except Exception:
-                titulo_dia = 'Sin fecha'
-
-        pdf.set_font('Arial', 'B', 11)
-        pdf.cell(0, 8, f"Día: {titulo_dia}", 0, 1)
-
-        _add_table_header(pdf, cols_presentes, widths)
-
-        for _, r in df_dia.iterrows():
-            vals = []
-            for c in cols_presentes:
-                val = r.get(c, '')
-                if c == 'Fecha de llenar' and pd.notna(val):
-                    val = pd.to_datetime(val).strftime('%d/%m/%Y %H:%M')
-                vals.append(val)
-            _add_row(pdf, vals, widths)
-
-            # salto de página si es necesario
-            if pdf.get_y() > 265:
-                pdf.add_page()
-                _add_table_header(pdf, cols_presentes, widths)
-
-        # Subtotal del día
-        monto_dia = df_dia['Pago'].sum() if 'Pago' in df_dia.columns else 0
-        checkins_dia = len(df_dia)
-        total_general += float(monto_dia or 0)
-        total_checkins += int(checkins_dia)
-
-        pdf.set_font('Arial', 'B', 9)
-        pdf.cell(sum(widths[:-2]), 8, 'Subtotal del día', 1)
-        pdf.cell(widths[-2], 8, str(checkins_dia), 1)
-        pdf.cell(widths[-1], 8, f"${monto_dia:,.2f}", 1)
-        pdf.ln(10)
-
-    # Totales generales
-    pdf.ln(2)
-    pdf.set_font('Arial', 'B', 11)
-    pdf.cell(0, 8, 'TOTAL GENERAL DEL PERIODO', 0, 1)
-
-    pdf.set_font('Arial', 'B', 10)
-    pdf.cell(60, 8, 'Check-ins', 1)
-    pdf.cell(60, 8, 'Monto total', 1)
-    pdf.ln()
-
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(60, 8, str(total_checkins), 1)
-    pdf.cell(60, 8, f"${total_general:,.2f}", 1)
-
-    return pdf
+@st.cache_resource
+def _estado_cubo() -> dict:
+    """Último cubo día × empleado × tarifa, compartido entre sesiones."""
+    return {'cubo': None, 'lock': threading.Lock()}
+
+
+def obtener_cubo(df: pd.DataFrame) -> CuboDiario:
+    """Cubo del dataset actual; si solo llegaron filas nuevas se extiende en lugar de reconstruirse."""
+    estado = _estado_cubo()
+    with estado['lock']:
+        estado['cubo'] = actualizar_cubo(estado['cubo'], df)
+        return estado['cubo']
+
+
+@st.fragment(run_every=1.0)
+def _avance_exportacion(trabajo: TrabajoExportacion):
+    """Barra de avance que se refresca sola; al terminar, un rerun muestra la descarga."""
+    if trabajo.terminado:
+        st.rerun()
+    st.progress(min(trabajo.escritas / max(trabajo.total, 1), 1.0),
+                text=f"Exportando {trabajo.formato.upper()}: {trabajo.escritas:,} de {trabajo.total:,} filas")
 
 
 # ==============================
@@ -403,24 +152,58 @@ if not check_password():
     st.stop()
 
 st.title("🚚 Reporte de Mensajería – IDEMEFA")
+es_admin = st.session_state.get("es_admin", False)
+
+# Tiempos por etapa de este rerun; perfilado completo solo si un admin lo pidió
+corrida = Corrida(sesion=st.session_state.setdefault("id_sesion", uuid.uuid4().hex[:12]))
+perfil = iniciar_perfil() if st.session_state.pop("perfilar_proxima", False) else None
 
 # Cargar datos
-with st.spinner("Cargando datos..."):
+with corrida.etapa("cargar_datos") as etapa, st.spinner("Cargando datos..."):
     df = cargar_datos(SHEET_URL)
+    estado_datos = _dataset_compartido(SHEET_URL).estado()
+    etapa.update(filas_salida=len(df), version=estado_datos['version'],
+                 refresco_fondo_seg=estado_datos['ultima_duracion'])
 
 if df.empty:
     st.warning("No se pudieron cargar los datos o el DataFrame está vacío.")
     st.stop()
 
+# Antigüedad de los datos y último refresco del hilo de fondo
+with st.sidebar.expander("🔄 Datos"):
+    edad = estado_datos['edad']
+    st.caption(
+        f"Versión {estado_datos['numero']} ({estado_datos['version']}, {estado_datos['modo']})  \n"
+        f"Verificados hace {edad:,.0f} s | último refresco: {estado_datos['ultima_duracion'] or 0:.2f} s"
+        + (" | refrescando…" if estado_datos['refrescando'] else "")
+    )
+    fuentes = _sincronizador(SHEET_URL).meta.get('fuentes')
+    if fuentes:
+        st.caption("  \n".join(
+            f"{'📦' if f['archivada'] else '🟢'} {f['url'] if len(f['url']) <= 40 else '…' + f['url'][-39:]}: "
+            f"{f['filas']:,} filas" for f in fuentes
+        ) + f"  \nUnidas sin duplicados: {len(df):,} filas")
+    geo = df.attrs.get('geocodificacion')
+    if geo and geo['sin_coordenadas']:
+        st.caption(f"📍 Sin coordenadas: {geo['sin_coordenadas']:,} filas; "
+                   f"{geo['completadas']:,} ubicadas por dirección ({geo['direcciones']:,} direcciones distintas)")
+    if st.button("Actualizar ahora"):
+        _dataset_compartido(SHEET_URL).solicitar_refresco()
+
 # ==============================
 # FILTROS (solo si tenemos datos)
 # ==============================
 st.sidebar.header("Filtros")
 
+# Dataset ordenado por fecha con índices (búsqueda binaria) compartido entre sesiones
+with corrida.etapa("indice", filas_entrada=len(df)) as etapa:
+    indice = _indice(df.attrs.get('version'), df)
+    etapa['filas_salida'] = len(indice.df)
+
 # Rango de fechas - solo si tenemos la columna y datos válidos
-if 'Fecha de llenar' in df.columns and df['Fecha de llenar'].notna().any():
-    fecha_min = df['Fecha de llenar'].min().to_pydatetime()
-    fecha_max = df['Fecha de llenar'].max().to_pydatetime()
+if indice.fecha_min is not None:
+    fecha_min = indice.fecha_min.to_pydatetime()
+    fecha_max = indice.fecha_max.to_pydatetime()
 else:
     fecha_min = datetime.now() - timedelta(days=30)
     fecha_max = datetime.now()
@@ -441,60 +224,103 @@ except Exception as e:
     rango = (fecha_min_date, fecha_max_date)
 
 # Colaborador
-colaboradores = ['Total']
-if 'Empleado' in df.columns:
-    colaboradores += sorted([x for x in df['Empleado'].dropna().unique().tolist() if str(x).strip() != ''])
+colaboradores = ['Total'] + indice.empleados()
 colab_sel = st.sidebar.selectbox("Colaborador", colaboradores)
 
+# Vista del mapa: "Automática" agrega en celdas cuando hay demasiados puntos
+MODOS_MAPA = {"Automática": "auto", "Entregas": "puntos", "Densidad": "densidad"}
+vista_mapa = st.sidebar.radio("Vista del mapa", list(MODOS_MAPA), horizontal=True)
+ver_rutas = st.sidebar.checkbox("Dibujar recorridos en el mapa", key="mapa_rutas",
+                                help="Una línea por colaborador y día, en orden de check-in.")
+
+# Posibles duplicados (mensajeria_core/duplicados.py): por defecto se marcan y se cuentan
+excluir_dup = 'Duplicado' in df.columns and st.sidebar.checkbox(
+    "Excluir posibles duplicados de los totales", key="excluir_duplicados",
+    help="Quita los check-ins marcados de métricas, subtotales, mapa, tabla, PDF y exportaciones.")
+
 # Aplicar filtros
 if isinstance(rango, (list, tuple)) and len(rango) == 2:
-    fecha_inicio = pd.to_datetime(rango[0]).normalize()  # Comienzo del día
-    fecha_fin = pd.to_datetime(rango[1]).normalize() + timedelta(days=1) - timedelta(seconds=1)  # Fin del día
+    fecha_inicio, fecha_fin = api.rango_dias(rango[0], rango[1])  # comienzo y fin del día
 else:
     fecha_inicio = fecha_min
     fecha_fin = fecha_max
 
-mask = pd.Series([True] * len(df))
-if 'Fecha de llenar' in df.columns:
-    # Filtrar solo fechas válidas
-    fecha_mask = df['Fecha de llenar'].notna()
-    fecha_mask &= (df['Fecha de llenar'] >= fecha_inicio) 
-    fecha_mask &= (df['Fecha de llenar'] <= fecha_fin)
-    mask &= fecha_mask
-    
-    st.sidebar.write(f"📊 Registros en filtro: {fecha_mask.sum()}")
-    
-if colab_sel != 'Total' and 'Empleado' in df.columns:
-    mask &= (df['Empleado'] == colab_sel)
-
-df_filtrado = df.loc[mask].copy()
-
-# Resto del código permanece igual...
+if indice.tiene_fecha:
+    lo, hi = indice.rango(fecha_inicio, fecha_fin)
+    st.sidebar.write(f"📊 Registros en filtro: {hi - lo}")
+
+colab_cubo = None if colab_sel == 'Total' else colab_sel
+with corrida.etapa("filtro", filas_entrada=len(indice.df)) as etapa:
+    df_filtrado = indice.filtrar(fecha_inicio, fecha_fin, colab_cubo, sin_duplicados=excluir_dup)
+    etapa['filas_salida'] = len(df_filtrado)
+
+# Cubo día × empleado × tarifa: métricas, subtotales y totales del PDF sin recorrer filas
+with corrida.etapa("cubo", filas_entrada=len(df)):
+    cubo = obtener_cubo(df) if 'Fecha de llenar' in df.columns else None
+
 # ==============================
 # Métricas rápidas
 # ==============================
 st.subheader("📊 Resumen")
-c1, c2, c3, c4 = st.columns(4)
+if cubo is not None:
+    metricas = cubo.metricas(fecha_inicio, fecha_fin, colab_cubo, sin_duplicados=excluir_dup)
+else:
+    pago_f = df_filtrado['Pago'] if 'Pago' in df_filtrado.columns else pd.Series(dtype=float)
+    metricas = {
+        'entregas': len(df_filtrado),
+        'monto': float(pago_f.sum()),
+        'entregas_25': int((pago_f == 25).sum()),
+        'entregas_75': int((pago_f == 75).sum()),
+        'duplicados': 0,
+        'monto_duplicados': 0.0,
+    }
+c1, c2, c3, c4, c5 = st.columns(5)
 with c1:
-    st.metric("Total entregas", len(df_filtrado))
+    st.metric("Total entregas", metricas['entregas'])
 with c2:
-    st.metric("Monto total", f"${(df_filtrado['Pago'].sum() if 'Pago' in df_filtrado.columns else 0):,.2f}")
+    st.metric("Monto total", f"${metricas['monto']:,.2f}")
 with c3:
-    v25 = int((df_filtrado['Pago'] == 25).sum() if 'Pago' in df_filtrado.columns else 0)
-    st.metric("Entregas $25", v25)
+    st.metric("Entregas $25", metricas['entregas_25'])
 with c4:
-    v75 = int((df_filtrado['Pago'] == 75).sum() if 'Pago' in df_filtrado.columns else 0)
-    st.metric("Entregas $75", v75)
+    st.metric("Entregas $75", metricas['entregas_75'])
+with c5:
+    st.metric("Posibles duplicados", metricas['duplicados'],
+              delta=f"${metricas['monto_duplicados']:,.2f}" + (" excluidos" if excluir_dup else " incluidos"),
+              delta_color="off")
+
+if metricas['duplicados']:
+    df_dup = indice.filtrar(fecha_inicio, fecha_fin, colab_cubo)
+    df_dup = df_dup[df_dup['Duplicado'].to_numpy(dtype=bool)]
+    with st.expander(f"🔁 {len(df_dup)} posibles check-ins duplicados "
+                     f"({'excluidos de' if excluir_dup else 'incluidos en'} los totales)"):
+        cols_dup = [c for c in ['Sospecha', 'Empleado', 'Fecha de llenar', 'Nombre del cliente (usuario/codigo)',
+                                'Dirección de envío', 'Latitud', 'Longitud', 'Pago'] if c in df_dup.columns]
+        st.dataframe(df_dup[cols_dup], use_container_width=True)
+
+# Pago manual vs. tarifa calculada por la ubicación (zonas en mensajeria_core/config.py)
+if 'Pago_inconsistente' in df_filtrado.columns and df_filtrado['Pago_inconsistente'].any():
+    df_inc = df_filtrado[df_filtrado['Pago_inconsistente']]
+    with st.expander(f"⚠️ {len(df_inc)} entregas con Pago distinto a la tarifa de su zona"):
+        cols_inc = [c for c in ['Empleado', 'Fecha de llenar', 'Nombre del cliente (usuario/codigo)',
+                                'Dirección de envío', 'Zona', 'Tarifa_zona', 'Pago'] if c in df_inc.columns]
+        st.dataframe(df_inc[cols_inc], use_container_width=True)
 
 # ==============================
 # Mapa
 # ==============================
 st.subheader("🗺️ Mapa de entregas (centrado en GSD)")
-m = crear_mapa(df_filtrado)
-if m is not None:
-    st_folium(m, width=1100, height=520)
-else:
-    st.info("No hay coordenadas válidas para mostrar con los filtros actuales.")
+# Las vistas se cachean por versión del dataset + filtros: un rerun sin cambios
+# de filtros (p.ej. al pulsar "Generar PDF") no reconstruye ni re-serializa el mapa
+cache_vistas = _cache_vistas()
+clave_filtros = (df.attrs.get('version'), huella(fecha_inicio, fecha_fin, colab_sel, excluir_dup))
+with corrida.etapa("mapa", filas_entrada=len(df_filtrado), modo=MODOS_MAPA[vista_mapa], rutas=ver_rutas) as etapa:
+    mapa_html = cache_vistas.obtener(
+        ('mapa', MODOS_MAPA[vista_mapa], ver_rutas) + clave_filtros,
+        lambda: api.mapa_html(df_filtrado, modo=MODOS_MAPA[vista_mapa], rutas=ver_rutas),
+    )
+    etapa['bytes'] = len(mapa_html)
+with corrida.etapa("mapa_componente"):
+    st.iframe(mapa_html, width=1100, height=520)
 
 # ==============================
 # Tabla + subtotales por día (en pantalla)
@@ -503,57 +329,273 @@ st.subheader("📋 Detalle filtrado")
 cols_disp = [c for c in COLUMNAS_TABLA if c in df_filtrado.columns]
 
 if cols_disp:
-    df_vis = df_filtrado[cols_disp].copy()
-    # Formato de fecha visible
-    if 'Fecha de llenar' in df_vis.columns:
-        df_vis['Fecha de llenar'] = pd.to_datetime(df_vis['Fecha de llenar'], errors='coerce')
-    st.dataframe(df_vis, use_container_width=True)
+    # 'Fecha de llenar' ya es datetime desde la carga: vista completa (sin copiar) para PDF/ZIP
+    df_vis = df_filtrado[cols_disp]
+    # En pantalla se agrega el motivo de los posibles duplicados (no va al PDF)
+    cols_pagina = cols_disp + (['Sospecha'] if 'Sospecha' in df_filtrado.columns and not excluir_dup else [])
+
+    # En pantalla solo viaja la página visible: búsqueda, orden y paginado se resuelven
+    # aquí sobre el dataset indexado, así el rerun pesa lo mismo con 10 o 100k entregas
+    t1, t2, t3, t4 = st.columns([3, 2, 1, 1])
+    with t1:
+        busqueda = st.text_input("Buscar (cliente, quien recibe, dirección)", key="tabla_busqueda")
+    with t2:
+        orden = st.selectbox("Ordenar por", cols_disp, key="tabla_orden",
+                             index=cols_disp.index('Fecha de llenar') if 'Fecha de llenar' in cols_disp else 0)
+    with t3:
+        descendente = st.toggle("Descendente", key="tabla_descendente")
+    with t4:
+        tamano_pagina = st.selectbox("Filas por página", TAMANOS_PAGINA, key="tabla_tamano")
+
+    with corrida.etapa("tabla", filas_entrada=len(df_filtrado)) as etapa:
+        seleccion = cache_vistas.obtener(
+            ('tabla', busqueda, orden, descendente) + clave_filtros,
+            lambda: indice.seleccion(indice.posiciones(fecha_inicio, fecha_fin, colab_cubo, excluir_dup),
+                                     busqueda, orden, descendente),
+            tamano=lambda sel: getattr(sel, 'nbytes', 0),
+        )
+        total_tabla = largo(seleccion)
+        paginas = max(1, -(-total_tabla // tamano_pagina))
+        # Otra consulta → volver a la primera página; nunca pasar de la última
+        consulta = (clave_filtros, busqueda, orden, descendente, tamano_pagina)
+        if st.session_state.get("tabla_consulta") != consulta:
+            st.session_state["tabla_consulta"] = consulta
+            st.session_state["tabla_pagina"] = 1
+        st.session_state["tabla_pagina"] = min(st.session_state.get("tabla_pagina", 1), paginas)
+        df_pagina = indice.pagina(seleccion, st.session_state["tabla_pagina"], tamano_pagina)[cols_pagina]
+        etapa['filas_salida'] = len(df_pagina)
+
+    st.dataframe(df_pagina, use_container_width=True)
+    p1, p2 = st.columns([1, 3])
+    with p1:
+        numero_pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas,
+                                        step=1, key="tabla_pagina")
+    with p2:
+        desde_fila = (numero_pagina - 1) * tamano_pagina
+        st.caption(f"Filas {min(desde_fila + 1, total_tabla)}–{desde_fila + len(df_pagina)} de {total_tabla}"
+                   + (f" que contienen «{busqueda.strip()}»" if busqueda.strip() else "")
+                   + ". La búsqueda y el orden solo afectan esta tabla; el PDF usa los filtros laterales.")
 
     # Subtotales por día
-    if 'Fecha de llenar' in df_filtrado.columns:
+    resumen = None
+    if cubo is not None:
         st.markdown("#### Subtotales por día (según filtros)")
-        tmp = df_filtrado.copy()
-        tmp['__FechaD__'] = tmp['Fecha de llenar'].dt.date
-        resumen = tmp.groupby('__FechaD__').agg(
-            Checkins=('Empleado', 'count'),
-            Monto_Total=('Pago', 'sum')
-        ).reset_index().rename(columns={'__FechaD__': 'Fecha'})
-        resumen['Fecha'] = pd.to_datetime(resumen['Fecha'])
-        resumen = resumen.sort_values('Fecha')
+        with corrida.etapa("resumen") as etapa:
+            resumen = cache_vistas.obtener(
+                ('resumen',) + clave_filtros,
+                lambda: cubo.resumen_por_dia(fecha_inicio, fecha_fin, colab_cubo, sin_duplicados=excluir_dup),
+            )
+            etapa['filas_salida'] = len(resumen)
         st.dataframe(resumen, use_container_width=True)
 
         total_checkins = int(resumen['Checkins'].sum()) if not resumen.empty else 0
         total_monto = float(resumen['Monto_Total'].sum()) if not resumen.empty else 0.0
         st.markdown(f"**Total general del período:** {total_checkins} check-ins | ${total_monto:,.2f}")
 
+    # Recorrido por colaborador y día (km en línea recta entre check-ins consecutivos)
+    st.markdown("#### Recorrido por colaborador y día")
+    with corrida.etapa("rutas", filas_entrada=len(df_filtrado)) as etapa:
+        df_rutas = cache_vistas.obtener(('rutas',) + clave_filtros, lambda: api.rutas(df_filtrado))
+        etapa['filas_salida'] = len(df_rutas)
+    if df_rutas.empty:
+        st.info("Sin entregas con fecha en el período.")
+    else:
+        st.dataframe(df_rutas, use_container_width=True, hide_index=True)
+        km_total = float(df_rutas['Km'].sum())
+        entregas_ruta = int(df_rutas['Entregas'].sum())
+        st.caption(f"{km_total:,.1f} km en {len(df_rutas)} jornadas | "
+                   f"{km_total / max(entregas_ruta, 1):,.2f} km por entrega | "
+                   f"pausa = más de {RUTA_PAUSA_MIN} min entre check-ins consecutivos")
+
     # ==============================
     # PDF – solo tabla con subtotales y total
     # ==============================
     st.subheader("📄 Descargar PDF (solo tabla)")
-    if st.button("Generar PDF", type="primary"):
+    # Clave por contenido de las filas del período: si ninguna cambió, sirve el PDF ya
+    # generado (por otro clic o por la pre-generación de períodos estándar)
+    cache_reportes = _reportes().cache
+    with corrida.etapa("clave_reporte", filas_entrada=len(df_vis)):
+        clave_pdf = cache_vistas.obtener(
+            ('clave_reporte', 'pdf') + clave_filtros,
+            lambda: clave_reporte(indice, fecha_inicio, fecha_fin, colab_sel, 'pdf', excluir_dup),
+        )
+    nombre_pdf = f"reporte_mensajeria_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    # Se lee una sola vez: si lo desalojaron entre medio, queda el botón de generar
+    generado_pdf = cache_reportes.generado(clave_pdf, 'pdf')
+    pdf_cache = cache_reportes.leer(clave_pdf, 'pdf') if generado_pdf is not None else None
+    if pdf_cache is not None:
+        st.download_button(
+            label="⬇️ Descargar PDF",
+            data=pdf_cache,
+            file_name=nombre_pdf,
+            mime="application/pdf",
+            type="primary",
+            on_click="ignore",
+        )
+        st.caption(f"Listo para descargar: generado el {datetime.fromtimestamp(generado_pdf):%d/%m/%Y %H:%M} "
+                   "(la hora que figura en el PDF); las filas de estos filtros no cambiaron desde entonces.")
+    elif st.button("Generar PDF", type="primary"):
         with st.spinner("Generando PDF..."):
+            from mensajeria_core.reporte import generar_pdf, pdf_a_bytes  # fpdf solo al exportar
             try:
-                pdf = generar_pdf(
-                    df_filtrado=df_filtrado[cols_disp].copy(),
-                    fecha_inicio=pd.to_datetime(fecha_inicio),
-                    fecha_fin=pd.to_datetime(fecha_fin),
-                    colaborador=colab_sel,
-                )
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                    pdf.output(tmp.name)
-                    tmp.flush()
-                    with open(tmp.name, 'rb') as f:
-                        data = f.read()
+                with corrida.etapa("pdf", filas_entrada=len(df_vis)) as etapa:
+                    pdf = generar_pdf(
+                        df_filtrado=df_vis,
+                        fecha_inicio=pd.to_datetime(fecha_inicio),
+                        fecha_fin=pd.to_datetime(fecha_fin),
+                        colaborador=colab_sel,
+                        resumen=resumen,
+                    )
+                    pdf_bytes = pdf_a_bytes(pdf)
+                    etapa['bytes'] = len(pdf_bytes)
+                cache_reportes.guardar(clave_pdf, 'pdf', pdf_bytes)
                 st.download_button(
                     label="⬇️ Descargar PDF",
-                    data=data,
-                    file_name=f"reporte_mensajeria_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+                    data=pdf_bytes,
+                    file_name=nombre_pdf,
                     mime="application/pdf",
                     type="primary",
                 )
-                os.unlink(tmp.name)
                 st.success("PDF generado correctamente.")
             except Exception as e:
                 st.error(f"Error generando PDF: {e}")
+
+    # Lote para nómina: un PDF por colaborador del período, generados en paralelo
+    if colab_sel == 'Total' and 'Empleado' in df_vis.columns:
+        if st.button("Generar PDF por colaborador (ZIP)"):
+            from mensajeria_core.lote import exportar_por_empleado
+            barra = st.progress(0.0, text="Generando PDFs por colaborador...")
+
+            def _avance(hechos: int, total: int, empleado: str, ok: bool):
+                barra.progress(hechos / total, text=f"{hechos}/{total} – {empleado}{'' if ok else ' ⚠️'}")
+
+            with corrida.etapa("zip", filas_entrada=len(df_vis)) as etapa:
+                resumenes = None
+                if cubo is not None:
+                    resumenes = {emp: cubo.resumen_por_dia(fecha_inicio, fecha_fin, emp,
+                                                           sin_duplicados=excluir_dup)
+                                 for emp in colaboradores[1:]}
+                zip_buffer = io.BytesIO()
+                resultado = exportar_por_empleado(df_vis, pd.to_datetime(fecha_inicio), pd.to_datetime(fecha_fin),
+                                                  zip_buffer, resumenes=resumenes, progreso=_avance)
+                etapa.update(bytes=zip_buffer.tell(), pdfs=len(resultado.generados),
+                             errores=len(resultado.errores))
+            st.download_button(
+                label=f"⬇️ Descargar ZIP ({len(resultado.generados)} PDF)",
+                data=zip_buffer.getvalue(),
+                file_name=f"reportes_mensajeria_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                mime="application/zip",
+            )
+            if resultado.errores:
+                st.warning("No se pudieron generar: " + ", ".join(resultado.errores)
+                           + " (detalle en ERRORES.txt dentro del ZIP).")
+
+    # ==============================
+    # Exportación completa: todas las columnas + subtotales, por bloques y en segundo plano
+    # ==============================
+    st.subheader("📦 Exportar datos completos")
+    FORMATOS_EXPORTAR = {"Excel (.xlsx)": "xlsx", "CSV": "csv", "Parquet": "parquet"}
+    e1, e2 = st.columns([2, 3])
+    with e1:
+        etiqueta_exp = st.radio("Formato", list(FORMATOS_EXPORTAR), horizontal=True, key="exportar_formato")
+        formato_exp = FORMATOS_EXPORTAR[etiqueta_exp]
+    with corrida.etapa("estimacion_exportacion", filas_entrada=len(df_filtrado)):
+        filas_exp, bytes_exp = cache_vistas.obtener(('estimacion', formato_exp) + clave_filtros,
+                                                    lambda: estimar(df_filtrado, formato_exp))
+    with e2:
+        tamano_exp = f"{bytes_exp / 1e6:,.1f} MB" if bytes_exp >= 1e6 else f"{bytes_exp / 1e3:,.0f} KB"
+        st.caption(f"≈ {filas_exp:,} filas (detalle + subtotales por día y por colaborador) | ≈ {tamano_exp}")
+    _limpieza_exportaciones()
+    if st.button("Generar archivo"):
+        previo = st.session_state.pop("exportacion", None)
+        if previo is not None:
+            previo.descartar()
+        periodo = f"{pd.to_datetime(fecha_inicio):%Y%m%d}_{pd.to_datetime(fecha_fin):%Y%m%d}"
+        st.session_state["exportacion"] = TrabajoExportacion(df_filtrado, formato_exp).iniciar()
+        st.session_state["exportacion_archivo"] = f"mensajeria_{periodo}.{formato_exp}"
+
+    trabajo_exp = st.session_state.get("exportacion")
+    if trabajo_exp is not None:
+        if not trabajo_exp.terminado:
+            _avance_exportacion(trabajo_exp)
+        elif trabajo_exp.error:
+            st.error(f"Error exportando: {trabajo_exp.error}")
+        else:
+            st.download_button(
+                label=f"⬇️ Descargar {st.session_state['exportacion_archivo']} ({trabajo_exp.escritas:,} filas)",
+                data=trabajo_exp.leer,  # se lee recién al hacer clic, no en cada rerun
+                file_name=st.session_state["exportacion_archivo"],
+                mime=MIME_EXPORTACION[trabajo_exp.formato],
+                on_click="ignore",
+            )
 else:
     st.info("No se encontraron las columnas requeridas en los datos para mostrar la tabla.")
+
+# ==============================
+# Cierre de la corrida: historial + log de tiempos (y perfil si se pidió)
+# ==============================
+_instrumentacion().registrar(corrida)
+if perfil is not None:
+    st.session_state["perfil"] = cerrar_perfil(perfil)
+
+# ==============================
+# Panel de administración (solo ADMIN_USUARIOS)
+# ==============================
+if es_admin:
+    # ==============================
+    # Estado de la caché de vistas
+    # ==============================
+    with st.sidebar.expander("⚙️ Caché de vistas"):
+        stats_cache = cache_vistas.estadisticas()
+        st.caption(
+            f"Aciertos: {stats_cache['aciertos']} | Fallos: {stats_cache['fallos']} "
+            f"({stats_cache['tasa_aciertos']:.0%})  \n"
+            f"Entradas: {stats_cache['entradas']} | {stats_cache['bytes'] / 1e6:.1f} MB | "
+            f"Desalojos: {stats_cache['desalojos']}"
+        )
+        stats_rep = _reportes().cache.estadisticas()
+        pre = _reportes().estado
+        st.caption(
+            f"**Reportes en disco:** {stats_rep['entradas']} ({stats_rep['bytes'] / 1e6:.1f} MB) | "
+            f"aciertos {stats_rep['aciertos']} / fallos {stats_rep['fallos']} | "
+            f"desalojos {stats_rep['desalojos']}  \n"
+            f"Pre-generación ({pre['version']}): {pre['hechos']}/{pre['total']} | "
+            f"nuevos {pre['generados']} | reutilizados {pre['reutilizados']} | errores {pre['errores']}"
+            + (f" | {pre['segundos']:.1f} s" if pre['segundos'] is not None else " | en curso…")
+        )
+
+    # ==============================
+    # Memoria por etapa (admin)
+    # ==============================
+    with st.sidebar.expander("🧠 Memoria por etapa"):
+        # memory_usage(deep=True) recorre todos los str: solo a pedido
+        if st.checkbox("Calcular uso de memoria", key="ver_memoria"):
+            informe = informe_memoria({
+                'Snapshot sincronizado': _sincronizador(SHEET_URL).df,
+                'Dataset compartido (compacto)': df,
+                'Índice ordenado por fecha': indice.df,
+                'Filtrado': df_filtrado,
+                'Tabla (página visible)': df_pagina if cols_disp else None,
+                'Cubo día × empleado × tarifa': cubo,
+            })
+            st.dataframe(informe, hide_index=True, use_container_width=True)
+            st.caption("Con filtro solo por fechas, 'Filtrado' es una vista del índice y no suma memoria.")
+            st.dataframe(memoria_por_columna(df), hide_index=True, use_container_width=True)
+
+    with st.sidebar.expander("⏱️ Tiempos por etapa"):
+        instrumentacion = _instrumentacion()
+        if instrumentacion.historial:
+            ultima = instrumentacion.historial[-1]
+            st.caption(f"Última ejecución: {ultima['segundos'] * 1e3:,.0f} ms")
+            st.dataframe(tabla_corrida(ultima), hide_index=True, use_container_width=True)
+        st.caption("Percentiles sobre las últimas ejecuciones (todas las sesiones)")
+        st.dataframe(instrumentacion.por_etapa(), hide_index=True, use_container_width=True)
+        if instrumentacion.ruta_log:
+            st.caption(f"Log: `{instrumentacion.ruta_log}`")
+        if st.button("Perfilar la próxima ejecución"):
+            st.session_state["perfilar_proxima"] = True
+        if "perfil" in st.session_state:
+            texto_perfil, datos_perfil = st.session_state["perfil"]
+            st.code(texto_perfil, language=None)
+            st.download_button("⬇️ Descargar .prof", data=datos_perfil, file_name="mensajeria.prof",
+                               mime="application/octet-stream")
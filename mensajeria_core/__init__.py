@@ -0,0 +1 @@
+"""Núcleo importable del reporte de mensajería (sin dependencia de Streamlit)."""
@@ -0,0 +1,96 @@
+"""CLI para reportes programados (cron) sin Streamlit.
+
+Ejemplos:
+    python -m mensajeria_core                                  # PDF de ayer, todos
+    python -m mensajeria_core --desde 2025-07-01 --hasta 2025-07-31 --formato zip
+    python -m mensajeria_core --colaborador "Juan Pérez" --formato csv --salida juan.csv
+    python -m mensajeria_core --desde 2025-07-01 --hasta 2025-07-31 --formato xlsx   # contabilidad
+    python -m mensajeria_core --formato csv-reporte     # solo las columnas del reporte, sin subtotales
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from . import api
+from .cache_reportes import CacheReportes, clave_reporte
+from .config import FUENTES_ARCHIVADAS, SHEET_URL
+from .indice import DatasetIndexado
+from .sincronizacion import DIRECTORIO_CACHE
+
+FORMATOS = ('pdf', 'csv', 'zip', 'xlsx', 'parquet', 'csv-reporte')
+
+
+def _argumentos(argv: list[str] | None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog='python -m mensajeria_core',
+                                description='Reporte de mensajería sin interfaz (para cron o workers).')
+    p.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (por defecto: ayer)')
+    p.add_argument('--hasta', help='Fecha final AAAA-MM-DD (por defecto: igual a --desde)')
+    p.add_argument('--colaborador', default='Total', help="Empleado o 'Total' (por defecto)")
+    p.add_argument('--formato', choices=FORMATOS, default='pdf',
+                   help='pdf | zip (un PDF por colaborador) | csv / xlsx / parquet (todas las columnas '
+                        '+ subtotales por día y colaborador, igual que la app) | csv-reporte (solo las '
+                        'columnas del reporte, sin subtotales)')
+    p.add_argument('--salida', help='Archivo de salida (por defecto: reporte_<periodo>.<ext>)')
+    p.add_argument('--url', default=SHEET_URL, help='CSV publicado del Google Sheet')
+    p.add_argument('--archivada', action='append', dest='archivadas', metavar='URL',
+                   help='Exportación anterior de la hoja (repetible; por defecto MENSAJERIA_FUENTES_ARCHIVADAS)')
+    p.add_argument('--cache', default=DIRECTORIO_CACHE, help='Directorio del snapshot local')
+    p.add_argument('--sin-red', action='store_true', help='Usar solo el snapshot local')
+    p.add_argument('--sin-duplicados', action='store_true',
+                   help='Excluir de las filas y totales los posibles check-ins duplicados')
+    p.add_argument('-v', '--verbose', action='store_true')
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _argumentos(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    desde = args.desde or api.ayer()
+    fecha_inicio, fecha_fin = api.rango_dias(desde, args.hasta or desde)
+    periodo = f"{fecha_inicio.strftime('%Y%m%d')}_{fecha_fin.strftime('%Y%m%d')}"
+
+    df = api.cargar(args.url, args.cache, sin_red=args.sin_red,
+                    archivadas=FUENTES_ARCHIVADAS if args.archivadas is None else args.archivadas)
+    indice = DatasetIndexado(df)
+    df_filtrado = api.filtrar(indice, fecha_inicio, fecha_fin, args.colaborador, args.sin_duplicados)
+    metricas, resumen = api.resumir(df, fecha_inicio, fecha_fin, args.colaborador,
+                                    sin_duplicados=args.sin_duplicados)
+
+    extension = 'csv' if args.formato == 'csv-reporte' else args.formato
+    salida = Path(args.salida or f'reporte_mensajeria_{periodo}.{extension}')
+    codigo = 0
+    if args.formato == 'pdf':
+        # Misma caché de reportes que la app: si las filas del período no cambiaron, no se regenera
+        cache = CacheReportes(str(Path(args.cache) / 'reportes'))
+        clave = clave_reporte(indice, fecha_inicio, fecha_fin, args.colaborador, 'pdf', args.sin_duplicados)
+        pdf = cache.leer(clave, 'pdf')
+        if pdf is None:
+            pdf = api.reporte_pdf(df_filtrado, fecha_inicio, fecha_fin, args.colaborador, resumen)
+            cache.guardar(clave, 'pdf', pdf)
+        salida.write_bytes(pdf)
+    elif args.formato == 'csv-reporte':
+        salida.write_bytes(api.reporte_csv(df_filtrado))
+    elif args.formato in ('csv', 'xlsx', 'parquet'):
+        from .exportacion import exportar
+        exportar(df_filtrado, salida, args.formato)
+    else:
+        from .lote import exportar_por_empleado
+        with open(salida, 'wb') as f:
+            resultado = exportar_por_empleado(api.tabla_reporte(df_filtrado), fecha_inicio, fecha_fin, f)
+        if resultado.errores:
+            print(f"Con errores: {', '.join(resultado.errores)}", file=sys.stderr)
+            codigo = 2
+
+    linea = f"{salida} | {metricas['entregas']} entregas | ${metricas['monto']:,.2f}"
+    if metricas['duplicados']:
+        linea += (f" | {metricas['duplicados']} posibles duplicados"
+                  f"{' excluidos' if args.sin_duplicados else ''}")
+    print(linea)
+    return codigo
+
+
+if __name__ == '__main__':
+    sys.exit(main())
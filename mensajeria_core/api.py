@@ -0,0 +1,103 @@
+"""Núcleo sin Streamlit: cargar, filtrar, resumir, recorridos y exportar (PDF/CSV).
+
+Lo usan la app y el CLI (python -m mensajeria_core) para reportes programados.
+folium y fpdf no se importan aquí: solo dentro de las funciones que los usan.
+"""
+import logging
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .compartido import preparar_dataset
+from .config import COLUMNAS_TABLA, FUENTES_ARCHIVADAS, SHEET_URL
+from .geocodificacion import Geocodificador
+from .indice import DatasetIndexado
+from .rollup import CuboDiario
+from .rutas import rutas_por_dia
+from .sincronizacion import DIRECTORIO_CACHE, crear_sincronizador
+
+logger = logging.getLogger(__name__)
+
+
+def rango_dias(desde, hasta) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """[inicio del día `desde`, último segundo del día `hasta`] (mismo criterio que el filtro de la app)."""
+    fecha_inicio = pd.to_datetime(desde).normalize()
+    fecha_fin = pd.to_datetime(hasta).normalize() + timedelta(days=1) - timedelta(seconds=1)
+    return fecha_inicio, fecha_fin
+
+
+def ayer() -> date:
+    return date.today() - timedelta(days=1)
+
+
+def cargar(url: str = SHEET_URL, directorio: str = DIRECTORIO_CACHE, sin_red: bool = False,
+           archivadas: list[str] | tuple = FUENTES_ARCHIVADAS, geo: Geocodificador | None = None) -> pd.DataFrame:
+    """Sincroniza la hoja (incremental sobre el snapshot local) y prepara el dataset.
+
+    Con `archivadas`, une además las exportaciones anteriores (cacheadas en disco).
+    Si la descarga falla y hay snapshot, se usa el snapshot y se avisa por logging.
+    Con sin_red=True solo se lee el snapshot. `geo` reemplaza al geocodificador
+    del proceso (caché en RUTA_CACHE_GEOCODIGOS) para completar coordenadas.
+    """
+    sync = crear_sincronizador(url, archivadas, directorio)
+    if sin_red:
+        df = sync.cargar_snapshot()
+        if df is None:
+            raise FileNotFoundError(f'No hay snapshot local para {url} en {directorio}')
+    else:
+        try:
+            df = sync.sincronizar()
+        except Exception as e:
+            df = sync.df if sync.df is not None else sync.cargar_snapshot()
+            if df is None:
+                raise
+            logger.warning('No se pudo actualizar desde la fuente (%s); se usa el snapshot local', e)
+    return preparar_dataset(df, sync.meta, geo)
+
+
+def filtrar(datos: pd.DataFrame | DatasetIndexado, fecha_inicio, fecha_fin,
+            colaborador: str = 'Total', sin_duplicados: bool = False) -> pd.DataFrame:
+    """Filas del rango (inclusive) y del colaborador ('Total' = todos), ordenadas por fecha.
+
+    Con sin_duplicados=True se omiten las filas marcadas como posible duplicado.
+    """
+    indice = datos if isinstance(datos, DatasetIndexado) else DatasetIndexado(datos)
+    return indice.filtrar(fecha_inicio, fecha_fin, None if colaborador == 'Total' else colaborador,
+                          sin_duplicados)
+
+
+def resumir(df: pd.DataFrame, fecha_inicio, fecha_fin, colaborador: str = 'Total',
+            cubo: CuboDiario | None = None, sin_duplicados: bool = False) -> tuple[dict, pd.DataFrame]:
+    """(métricas, subtotales por día) desde el cubo día × empleado × tarifa."""
+    cubo = cubo or CuboDiario.construir(df)
+    empleado = None if colaborador == 'Total' else colaborador
+    return (cubo.metricas(fecha_inicio, fecha_fin, empleado, sin_duplicados),
+            cubo.resumen_por_dia(fecha_inicio, fecha_fin, empleado, sin_duplicados))
+
+
+def tabla_reporte(df_filtrado: pd.DataFrame) -> pd.DataFrame:
+    """Columnas del reporte (COLUMNAS_TABLA) presentes en los datos."""
+    return df_filtrado[[c for c in COLUMNAS_TABLA if c in df_filtrado.columns]]
+
+
+def reporte_pdf(df_filtrado: pd.DataFrame, fecha_inicio, fecha_fin, colaborador: str = 'Total',
+                resumen: pd.DataFrame | None = None) -> bytes:
+    from .reporte import generar_pdf, pdf_a_bytes
+    pdf = generar_pdf(tabla_reporte(df_filtrado), pd.to_datetime(fecha_inicio), pd.to_datetime(fecha_fin),
+                      colaborador, resumen=resumen)
+    return pdf_a_bytes(pdf)
+
+
+def reporte_csv(df_filtrado: pd.DataFrame) -> bytes:
+    """Tabla del reporte como CSV (UTF-8 con BOM para que Excel respete los acentos)."""
+    return tabla_reporte(df_filtrado).to_csv(index=False, date_format='%d/%m/%Y %H:%M').encode('utf-8-sig')
+
+
+def mapa_html(df_filtrado: pd.DataFrame, modo: str = 'auto', rutas: bool = False) -> str:
+    from .mapa import crear_mapa
+    return crear_mapa(df_filtrado, modo=modo, rutas=rutas).get_root().render()
+
+
+def rutas(df_filtrado: pd.DataFrame) -> pd.DataFrame:
+    """Recorrido por Empleado y día: entregas, km, km por entrega y pausas (ver rutas.py)."""
+    return rutas_por_dia(df_filtrado)
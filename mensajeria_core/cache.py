@@ -0,0 +1,86 @@
+"""Caché LRU en memoria con tope de bytes y contadores de aciertos/fallos.
+
+Se usa para vistas ya construidas (HTML del mapa, tablas resumen) indexadas por
+la versión del dataset más el estado de los filtros.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import pandas as pd
+
+
+def huella(*partes) -> str:
+    """Huella corta y estable de valores simples (fechas, strings, tuplas)."""
+    return hashlib.blake2b(repr(partes).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def tamano_aprox(valor: Any) -> int:
+    """Bytes aproximados que ocupa un valor cacheado."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(valor, pd.DataFrame) else uso)
+    if isinstance(valor, str):
+        return len(valor.encode('utf-8'))
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """LRU seguro entre hilos; desaloja por cantidad de entradas y por bytes."""
+
+    def __init__(self, max_bytes: int, max_entradas: int = 64):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._datos: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave, construir: Callable[[], Any],
+                tamano: Callable[[Any], int] = tamano_aprox) -> Any:
+        """Devuelve el valor cacheado o lo construye (fuera del lock) y lo guarda."""
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave][0]
+            self.fallos += 1
+
+        valor = construir()
+        peso = tamano(valor)
+        if peso > self.max_bytes:
+            return valor  # no cabe: se entrega sin cachear
+
+        with self._lock:
+            if clave in self._datos:
+                self._bytes -= self._datos.pop(clave)[1]
+            self._datos[clave] = (valor, peso)
+            self._bytes += peso
+            while self._datos and (self._bytes > self.max_bytes or len(self._datos) > self.max_entradas):
+                _, (_, p) = self._datos.popitem(last=False)
+                self._bytes -= p
+                self.desalojos += 1
+        return valor
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'entradas': len(self._datos),
+                'bytes': self._bytes,
+                'desalojos': self.desalojos,
+            }
@@ -0,0 +1,244 @@
+"""Caché en disco de reportes ya generados, direccionada por contenido.
+
+La clave de un reporte es el hash de (rango, colaborador, formato, exclusión de
+duplicados) más la huella de las filas que entran en ese reporte (hash por fila
+de las columnas del reporte, en orden). Una versión nueva del dataset no invalida
+nada por sí sola: si una fila cambia, solo cambian las claves de los reportes
+cuyo rango (y colaborador) la contienen; el resto se sigue sirviendo del disco.
+Las entradas viejas nunca se borran explícitamente: las desaloja el tope de
+tamaño (LRU por fecha de último uso, que se lleva en atime; mtime queda como
+la hora en que se generó el archivo, la misma que figura en el PDF).
+
+PrerenderReportes genera en segundo plano los períodos estándar (semana actual
+y anterior, quincena y mes anteriores; total y por colaborador) cuando se
+publica una versión nueva del dataset, para que la descarga sea inmediata.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import api
+from .config import CACHE_REPORTES_MAX_MB, PRERENDER_MAX_REPORTES
+from .indice import DatasetIndexado, largo
+from .rollup import CuboDiario
+from .sincronizacion import DIRECTORIO_CACHE, _huellas_filas
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_REPORTES = str(Path(DIRECTORIO_CACHE) / 'reportes')
+# Subir cuando cambie el diseño de los reportes para no servir archivos viejos
+VERSION_REPORTES = 1
+
+
+def clave_reporte(indice: DatasetIndexado, fecha_inicio, fecha_fin, colaborador: str = 'Total',
+                  formato: str = 'pdf', sin_duplicados: bool = False) -> str:
+    """Clave de contenido del reporte: parámetros + huella de las filas que lo componen."""
+    sel = indice.posiciones(fecha_inicio, fecha_fin, None if colaborador == 'Total' else colaborador,
+                            sin_duplicados)
+    filas = indice.df.iloc[sel] if isinstance(sel, slice) else indice.df.take(sel)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr((VERSION_REPORTES, formato, pd.Timestamp(fecha_inicio).isoformat(),
+                   pd.Timestamp(fecha_fin).isoformat(), colaborador, bool(sin_duplicados))).encode('utf-8'))
+    if len(filas):
+        h.update(np.ascontiguousarray(_huellas_filas(filas)).tobytes())
+    return h.hexdigest()
+
+
+class CacheReportes:
+    """Archivos <clave>.<formato> en un directorio, con tope de bytes (LRU por atime)."""
+
+    def __init__(self, directorio: str = DIRECTORIO_REPORTES, max_bytes: int = CACHE_REPORTES_MAX_MB * 1024 * 1024):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def _ruta(self, clave: str, formato: str) -> Path:
+        return self.directorio / f'{clave}.{formato}'
+
+    def contiene(self, clave: str, formato: str = 'pdf') -> bool:
+        return self._ruta(clave, formato).exists()
+
+    def leer(self, clave: str, formato: str = 'pdf') -> bytes | None:
+        ruta = self._ruta(clave, formato)
+        try:
+            datos = ruta.read_bytes()
+            os.utime(ruta, (time.time(), ruta.stat().st_mtime))  # último uso (atime), para el desalojo LRU
+        except OSError:
+            with self._lock:
+                self.fallos += 1
+            return None
+        with self._lock:
+            self.aciertos += 1
+        return datos
+
+    def generado(self, clave: str, formato: str = 'pdf') -> float | None:
+        """Hora (time.time()) en que se guardó el archivo; None si no está."""
+        try:
+            return self._ruta(clave, formato).stat().st_mtime
+        except OSError:
+            return None
+
+    def guardar(self, clave: str, formato: str, datos: bytes) -> None:
+        """Escritura atómica (tmp + replace) y desalojo de lo menos usado si se pasa del tope."""
+        ruta = self._ruta(clave, formato)
+        tmp = ruta.with_name(f'{ruta.name}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(datos)
+        os.replace(tmp, ruta)
+        self._podar()
+
+    def _archivos(self) -> list[tuple[float, int, Path]]:
+        archivos = []
+        for ruta in self.directorio.iterdir():
+            if ruta.suffix == '.tmp':
+                continue
+            try:
+                st = ruta.stat()
+            except OSError:
+                continue
+            archivos.append((st.st_atime, st.st_size, ruta))
+        return archivos
+
+    def _podar(self) -> None:
+        with self._lock:
+            archivos = sorted(self._archivos())
+            total = sum(tam for _, tam, _ in archivos)
+            for _, tam, ruta in archivos:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    ruta.unlink()
+                except OSError:
+                    continue
+                total -= tam
+                self.desalojos += 1
+
+    def estadisticas(self) -> dict:
+        archivos = self._archivos()
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'entradas': len(archivos),
+                'bytes': sum(tam for _, tam, _ in archivos),
+                'desalojos': self.desalojos,
+            }
+
+
+# ------------------------------
+# Períodos estándar y pre-generación
+# ------------------------------
+def periodos_estandar(hoy: date | None = None) -> list[tuple[str, date, date]]:
+    """[(nombre, desde, hasta)]: semana actual y anterior, quincena anterior, mes anterior."""
+    hoy = hoy or date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    inicio_mes = hoy.replace(day=1)
+    fin_mes_anterior = inicio_mes - timedelta(days=1)
+    if hoy.day > 15:
+        quincena = (inicio_mes, inicio_mes.replace(day=15))
+    else:
+        quincena = (fin_mes_anterior.replace(day=16), fin_mes_anterior)
+    return [
+        ('Semana actual', lunes, hoy),
+        ('Semana anterior', lunes - timedelta(days=7), lunes - timedelta(days=1)),
+        ('Quincena anterior', *quincena),
+        ('Mes anterior', fin_mes_anterior.replace(day=1), fin_mes_anterior),
+    ]
+
+
+def generar_pdf_reporte(indice: DatasetIndexado, cubo: CuboDiario | None, fecha_inicio, fecha_fin,
+                        colaborador: str = 'Total', sin_duplicados: bool = False) -> bytes:
+    """El mismo PDF que produce "Generar PDF" en la app para esos filtros."""
+    empleado = None if colaborador == 'Total' else colaborador
+    df_filtrado = indice.filtrar(fecha_inicio, fecha_fin, empleado, sin_duplicados)
+    resumen = (cubo.resumen_por_dia(fecha_inicio, fecha_fin, empleado, sin_duplicados)
+               if cubo is not None else None)
+    return api.reporte_pdf(df_filtrado, fecha_inicio, fecha_fin, colaborador, resumen)
+
+
+class PrerenderReportes:
+    """Hilo que pre-genera los PDF de los períodos estándar de la última versión publicada.
+
+    programar() no bloquea: si llega otra versión mientras se generan, la corrida
+    en curso se abandona y se empieza con la nueva. Solo se generan los reportes
+    cuya clave no está ya en caché (los períodos sin cambios no se rehacen).
+    """
+
+    def __init__(self, cache: CacheReportes, max_reportes: int = PRERENDER_MAX_REPORTES, periodos=periodos_estandar):
+        self.cache = cache
+        self.max_reportes = max_reportes
+        self.periodos = periodos
+        self._pendiente: pd.DataFrame | None = None
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo: threading.Thread | None = None
+        self.estado = {'version': None, 'hechos': 0, 'total': 0, 'generados': 0, 'reutilizados': 0,
+                       'errores': 0, 'segundos': None, 'terminado': True}
+
+    def programar(self, instantanea) -> None:
+        """Callback de DatasetCompartido.suscribir: encola la instantánea recién publicada."""
+        with self._lock:
+            self._pendiente = instantanea.df
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='mensajeria-prerender', daemon=True)
+                self._hilo.start()
+        self._despertar.set()
+
+    def _tomar(self) -> pd.DataFrame | None:
+        with self._lock:
+            df, self._pendiente = self._pendiente, None
+            return df
+
+    def _bucle(self) -> None:
+        while True:
+            self._despertar.wait()
+            self._despertar.clear()
+            df = self._tomar()
+            if df is None:
+                continue
+            try:
+                self._generar(df)
+            except Exception as e:
+                logger.warning('Pre-generación de reportes interrumpida: %s', e)
+                self.estado['terminado'] = True
+
+    def _generar(self, df: pd.DataFrame) -> None:
+        t0 = time.perf_counter()
+        indice = DatasetIndexado(df)
+        cubo = CuboDiario.construir(df) if indice.tiene_fecha else None
+        trabajos = [(desde, hasta, colaborador)
+                    for _, desde, hasta in self.periodos()
+                    for colaborador in ['Total'] + indice.empleados()][:self.max_reportes]
+        self.estado = {'version': df.attrs.get('version'), 'hechos': 0, 'total': len(trabajos),
+                       'generados': 0, 'reutilizados': 0, 'errores': 0, 'segundos': None, 'terminado': False}
+        for desde, hasta, colaborador in trabajos:
+            if self._despertar.is_set():
+                return  # llegó otra versión: se empieza de nuevo con ella
+            fecha_inicio, fecha_fin = api.rango_dias(desde, hasta)
+            empleado = None if colaborador == 'Total' else colaborador
+            if not largo(indice.posiciones(fecha_inicio, fecha_fin, empleado)):
+                pass  # sin entregas en el período: no vale la pena tenerlo listo
+            elif self.cache.contiene(clave := clave_reporte(indice, fecha_inicio, fecha_fin, colaborador), 'pdf'):
+                self.estado['reutilizados'] += 1
+            else:
+                try:
+                    self.cache.guardar(clave, 'pdf',
+                                       generar_pdf_reporte(indice, cubo, fecha_inicio, fecha_fin, colaborador))
+                    self.estado['generados'] += 1
+                except Exception as e:
+                    logger.warning('No se pudo pre-generar %s %s–%s: %s', colaborador, desde, hasta, e)
+                    self.estado['errores'] += 1
+            self.estado['hechos'] += 1
+        self.estado.update(segundos=time.perf_counter() - t0, terminado=True)
@@ -0,0 +1,179 @@
+"""Dataset único por proceso, compartido por todas las sesiones.
+
+Un hilo en segundo plano sincroniza la hoja cada REFRESCO_SEGUNDOS
+(stale-while-revalidate): los lectores siempre reciben al instante la última
+instantánea buena y nunca esperan una descarga, salvo la primera carga del
+proceso. Cada instantánea es inmutable y se publica con una sola asignación
+(swap atómico); si un refresco falla se sigue sirviendo la anterior.
+Con suscribir() otros componentes reciben cada instantánea publicada (p. ej.
+la pre-generación de reportes de cache_reportes.py).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .config import REFRESCO_SEGUNDOS
+from .datos import compactar_esquema
+from .duplicados import marcar_duplicados
+from .geocodificacion import Geocodificador, completar_coordenadas
+from .sincronizacion import SincronizadorHoja
+from .zonas import clasificar_zonas
+
+logger = logging.getLogger(__name__)
+
+
+def preparar_dataset(df: pd.DataFrame, meta: dict, geo: Geocodificador | None = None) -> pd.DataFrame:
+    """Del snapshot sincronizado al dataset que consume la app.
+
+    Coordenadas faltantes desde la dirección (con `geo` o el geocodificador del
+    proceso) → zonas → duplicados → esquema compacto.
+    """
+    df = compactar_esquema(marcar_duplicados(clasificar_zonas(completar_coordenadas(df, geo))))
+    # Versión del dataset (hash del contenido sincronizado) para las cachés de vistas
+    df.attrs['version'] = meta.get('hash_prefijo', '')[:16]
+    df.attrs['base'] = meta.get('base')
+    return df
+
+
+@dataclass(frozen=True)
+class Instantanea:
+    df: pd.DataFrame
+    numero: int        # crece en 1 con cada swap
+    version: str       # hash del contenido (df.attrs['version'])
+    publicada: float   # time.time() del swap
+    modo: str          # snapshot | completo | incremental
+    segundos: float    # duración del refresco que la produjo
+
+
+class DatasetCompartido:
+    """Contenedor del dataset con refresco periódico en un hilo daemon."""
+
+    def __init__(self, sincronizador: SincronizadorHoja, intervalo: float = REFRESCO_SEGUNDOS,
+                 preparar=preparar_dataset):
+        self.sincronizador = sincronizador
+        self.intervalo = intervalo
+        self.preparar = preparar
+        self._actual: Instantanea | None = None
+        self._lock = threading.Lock()          # serializa refrescos
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+        # Estado del último intento (con o sin swap)
+        self.ultimo_intento: float | None = None
+        self.ultimo_exito: float | None = None
+        self.ultima_duracion: float | None = None
+        self.ultimo_error: str | None = None
+        self.refrescando = False
+        self._suscriptores: list = []
+
+    # ------------------------------
+    # Lectura
+    # ------------------------------
+    def actual(self) -> Instantanea | None:
+        """Última instantánea buena. Solo la primera llamada del proceso espera la carga."""
+        if self._actual is None:
+            with self._lock:
+                if self._actual is None:  # otra sesión pudo haberla cargado mientras esperábamos
+                    self._refrescar()
+        return self._actual
+
+    def estado(self) -> dict:
+        ahora = time.time()
+        inst = self._actual
+        return {
+            'numero': inst.numero if inst else 0,
+            'version': inst.version if inst else None,
+            'modo': inst.modo if inst else None,
+            'edad': ahora - self.ultimo_exito if self.ultimo_exito else None,
+            'ultima_duracion': self.ultima_duracion,
+            'ultimo_error': self.ultimo_error,
+            'refrescando': self.refrescando,
+        }
+
+    # ------------------------------
+    # Refresco
+    # ------------------------------
+    def refrescar(self) -> bool:
+        """Un ciclo de sincronización. Devuelve True si publicó una instantánea nueva."""
+        with self._lock:
+            return self._refrescar()
+
+    def _refrescar(self) -> bool:
+        self.refrescando = True
+        t0 = time.perf_counter()
+        self.ultimo_intento = time.time()
+        try:
+            sync = self.sincronizador
+            df_sync = sync.obtener() if self._actual is None else sync.sincronizar()
+            anterior = self._actual
+            publicada = False
+            version = sync.meta.get('hash_prefijo', '')[:16]
+            if anterior is None or version != anterior.version:
+                df = self.preparar(df_sync, sync.meta)
+                self._actual = Instantanea(
+                    df=df,
+                    numero=(anterior.numero if anterior else 0) + 1,
+                    version=version,
+                    publicada=time.time(),
+                    modo=sync.ultima.get('modo', ''),
+                    segundos=time.perf_counter() - t0,
+                )
+                publicada = True
+                self._avisar(self._actual)
+                if self._actual.modo == 'snapshot':
+                    # Arranque desde disco: revalidar contra la fuente cuanto antes
+                    self.solicitar_refresco()
+            self.ultimo_exito = time.time()
+            self.ultimo_error = None
+            return publicada
+        except Exception as e:
+            logger.warning('Refresco del dataset falló; se mantiene la instantánea %s: %s',
+                           self._actual.numero if self._actual else None, e)
+            self.ultimo_error = str(e) or type(e).__name__
+            return False
+        finally:
+            self.ultima_duracion = time.perf_counter() - t0
+            self.refrescando = False
+
+    def suscribir(self, funcion) -> None:
+        """funcion(instantanea) se llama con cada instantánea publicada (y con la actual, si hay).
+
+        Corre en el hilo que publica: debe volver enseguida (encolar trabajo, no hacerlo).
+        """
+        self._suscriptores.append(funcion)
+        if self._actual is not None:
+            self._avisar(self._actual, [funcion])
+
+    def _avisar(self, instantanea: Instantanea, suscriptores: list | None = None) -> None:
+        for funcion in suscriptores or self._suscriptores:
+            try:
+                funcion(instantanea)
+            except Exception as e:
+                logger.warning('Suscriptor de instantáneas falló: %s', e)
+
+    def solicitar_refresco(self) -> None:
+        """Adelanta el próximo ciclo del hilo (no bloquea al que llama)."""
+        self._despertar.set()
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de refresco (idempotente)."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name='mensajeria-refresco', daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._despertar.set()
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            if self._detener.is_set():
+                break
+            self.refrescar()
@@ -0,0 +1,125 @@
+"""Configuración compartida: fuente de datos, cuadrante y columnas del reporte."""
+import os
+
+# URL pública del Google Sheet (publicada como CSV)
+SHEET_URL = os.environ.get("MENSAJERIA_SHEET_URL", "https://docs.google.com/spreadsheets/d/1pXvN1PdQKfU8N5b8G5kPY5K8uhgCEbyt5EhKQt1-5ik/export?format=csv")
+# Exportaciones anteriores de la hoja (se rota cada cierto tiempo), separadas por coma.
+# Ya no cambian: se descargan una vez, quedan en disco y solo SHEET_URL se re-consulta.
+FUENTES_ARCHIVADAS = [u.strip() for u in os.environ.get("MENSAJERIA_FUENTES_ARCHIVADAS", "").split(",") if u.strip()]
+
+# Descargas: conexiones reutilizadas, reintentos con backoff exponencial (0.5 s, 1 s, 2 s...)
+DESCARGA_TIMEOUT = 20
+DESCARGA_REINTENTOS = 3
+DESCARGA_BACKOFF = 0.5
+DESCARGA_CONEXIONES = 8
+
+# NUEVO cuadrante (Gran Santo Domingo)
+CUADRANTE_COORDS = [
+    [18.470910, -69.881842],
+    [18.467871, -69.889721],
+    [18.464781, -69.893714],
+    [18.461370, -69.899534],
+    [18.460956, -69.902208],
+    [18.456405, -69.913385],
+    [18.446481, -69.924817],
+    [18.435420, -69.943950],
+    [18.426873, -69.971667],
+    [18.426485, -69.981364],
+    [18.424306, -69.989173],
+    [18.428616, -69.990499],
+    [18.442414, -69.977843],
+    [18.451322, -69.974168],
+    [18.461973, -69.969014],
+    [18.484094, -69.967227],
+    [18.486417, -69.969167],
+    [18.489507, -69.969121],
+    [18.494270, -69.964476],
+    [18.507445, -69.960890],
+    [18.520477, -69.936902],
+    [18.509636, -69.915537],
+    [18.513721, -69.896844],
+    [18.507693, -69.878878],
+    [18.500750, -69.875250],
+    [18.494284, -69.877883],
+    [18.488074, -69.883216],
+    [18.471752, -69.881296],
+]
+
+# Columnas esperadas para la tabla
+COLUMNAS_TABLA = [
+    'Empleado',
+    'Tipo',
+    'Dirección de envío',
+    'Fecha de llenar',
+    'Nombre del cliente (usuario/codigo)',
+    'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)',
+    'Pago',
+]
+
+# Columnas donde busca el cuadro de texto de la tabla de detalle
+COLUMNAS_BUSQUEDA = [
+    'Nombre del cliente (usuario/codigo)',
+    'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)',
+    'Dirección de envío',
+]
+# Filas por página de la tabla de detalle (solo la página visible viaja al navegador)
+TAMANOS_PAGINA = [25, 50, 100, 250]
+
+# Zonas tarifarias: la primera zona que contiene el punto define la tarifa.
+# Los puntos fuera de todas las zonas pagan TARIFA_FUERA_ZONA.
+ZONAS_TARIFA = [
+    {'nombre': 'Cuadrante', 'coords': CUADRANTE_COORDS, 'tarifa': 25.0},
+]
+TARIFA_FUERA_ZONA = 75.0
+
+# Posibles duplicados: mismo empleado + cliente + dirección (o mismo empleado a
+# menos de RADIO_DUPLICADO_M metros) dentro de VENTANA_DUPLICADO_MIN minutos, o
+# coordenadas idénticas (a DECIMALES_COORD_REPETIDA decimales) en otro día
+VENTANA_DUPLICADO_MIN = 10
+RADIO_DUPLICADO_M = 25
+DECIMALES_COORD_REPETIDA = 5
+
+# Por encima de este número de puntos el mapa usa la capa rápida agrupada
+# en lugar de un marcador con popup por entrega
+UMBRAL_MARCADORES = 1000
+
+# Por encima de este número de puntos el modo automático agrega en celdas
+# (hexágonos de TAMANO_CELDA_M metros) en lugar de dibujar cada entrega
+UMBRAL_DENSIDAD = 20000
+TAMANO_CELDA_M = 400
+
+# Geocodificación de filas sin Latitud/Longitud por 'Dirección de envío':
+# ruta a un nomenclátor CSV (direccion, latitud, longitud) o URL de un servicio
+# por lotes; vacío = solo la caché local. Las direcciones no encontradas se
+# vuelven a consultar pasados GEOCODIFICACION_REINTENTO_DIAS.
+GEOCODIFICADOR = os.environ.get("MENSAJERIA_GEOCODIFICADOR", "")
+GEOCODIFICACION_LOTE = 100
+GEOCODIFICACION_REINTENTO_DIAS = 7
+
+# Recorridos diarios: intervalo entre check-ins a partir del cual se cuenta una
+# pausa, y máximo de recorridos (empleado × día, los más recientes) en el mapa
+RUTA_PAUSA_MIN = 45
+MAX_RUTAS_MAPA = 200
+
+# Caché de vistas (HTML del mapa, resúmenes) compartida entre sesiones
+CACHE_VISTAS_MAX_MB = 256
+CACHE_VISTAS_MAX_ENTRADAS = 64
+
+# Reportes ya generados en disco (por contenido de las filas del período) y
+# cuántos reportes de períodos estándar se pre-generan por versión de datos
+CACHE_REPORTES_MAX_MB = 200
+PRERENDER_MAX_REPORTES = 60
+
+# Cada cuántos segundos el hilo de fondo re-sincroniza la hoja (los lectores
+# nunca esperan: siguen viendo la última copia buena mientras tanto)
+REFRESCO_SEGUNDOS = 300
+
+# Usuarios que ven el panel de administración (tiempos, perfilado, caché, memoria).
+# Entran con su nombre y MENSAJERIA_ADMIN_CLAVE (no con el login compartido);
+# sin ambas variables nadie es administrador.
+ADMIN_USUARIOS = set(filter(None, os.environ.get("MENSAJERIA_ADMIN_USUARIOS", "").split(",")))
+ADMIN_CLAVE = os.environ.get("MENSAJERIA_ADMIN_CLAVE", "")
+
+# Log JSON-lines de tiempos por etapa (rotativo)
+LOG_TIEMPOS_MAX_MB = 5
+LOG_TIEMPOS_COPIAS = 3
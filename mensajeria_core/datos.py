@@ -0,0 +1,67 @@
+import io
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from .fechas import parsear_fechas
+
+
+def leer_csv(texto: str) -> pd.DataFrame:
+    """Lee el CSV publicado como texto (todas las columnas como str)."""
+    return pd.read_csv(io.StringIO(texto), dtype=str)
+
+
+def normalizar_datos(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza columnas clave: fechas en varios formatos, pago y coordenadas numéricas."""
+    # Fechas en formatos mixtos: un parseo por grupo de formato (ver fechas.py)
+    if 'Fecha de llenar' in df.columns:
+        df['Fecha de llenar'], informe = parsear_fechas(df['Fecha de llenar'])
+        df.attrs['informe_fechas'] = asdict(informe)
+
+    if 'Pago' in df.columns:
+        df['Pago'] = pd.to_numeric(df['Pago'], errors='coerce')
+    if 'Latitud' in df.columns:
+        df['Latitud'] = pd.to_numeric(df['Latitud'], errors='coerce')
+    if 'Longitud' in df.columns:
+        df['Longitud'] = pd.to_numeric(df['Longitud'], errors='coerce')
+
+    # Quitar filas completamente vacías
+    df = df.dropna(how='all')
+    return df
+
+
+# Columnas de texto con pocos valores distintos que se guardan como categóricas
+COLUMNAS_CATEGORICAS = ('Empleado', 'Tipo')
+
+
+def _pago_compacto(pago: pd.Series) -> pd.Series:
+    """Pago como entero nullable si todos los montos son enteros (25, 75, ...); si no, sin tocar."""
+    valores = pago.to_numpy(dtype='float64', na_value=np.nan)
+    validos = valores[~np.isnan(valores)]
+    if not len(validos) or not np.array_equal(validos, np.round(validos)):
+        return pago
+    maximo = np.abs(validos).max()
+    tipo = 'Int16' if maximo <= np.iinfo(np.int16).max else 'Int32' if maximo <= np.iinfo(np.int32).max else None
+    return pago.astype(tipo) if tipo else pago
+
+
+def compactar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    """Esquema compacto para el dataset en memoria (después de clasificar zonas).
+
+    - Empleado / Tipo → category (un código por fila en lugar de un str).
+    - Latitud / Longitud / Tarifa_zona → float32 (~1 m de resolución, suficiente
+      para el mapa; la clasificación por zona ya se hizo en float64).
+    - Pago → Int16/Int32 nullable cuando todos los montos son enteros.
+    Las demás columnas se comparten con df (no se copian).
+    """
+    cambios = {}
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            cambios[col] = df[col].astype('category')
+    for col in ('Latitud', 'Longitud', 'Tarifa_zona'):
+        if col in df.columns and df[col].dtype == 'float64':
+            cambios[col] = df[col].astype('float32')
+    if 'Pago' in df.columns and df['Pago'].dtype in ('float64', 'int64'):
+        cambios['Pago'] = _pago_compacto(df['Pago'])
+    return df.assign(**cambios) if cambios else df
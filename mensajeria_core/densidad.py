@@ -0,0 +1,115 @@
+"""Agregación de entregas en celdas hexagonales o cuadradas (vectorizado con NumPy).
+
+El tamaño del resultado depende de las celdas ocupadas, no de las entregas,
+así que sirve para dibujar períodos largos sin mandar cada punto al navegador.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import CUADRANTE_COORDS
+from .zonas import FUERA_DE_ZONA, puntos_en_poligono
+
+# Metros por grado (aproximación equirectangular, suficiente a escala de ciudad)
+M_POR_GRADO_LAT = 110_574.0
+M_POR_GRADO_LON_ECUADOR = 111_320.0
+
+# Latitud de referencia fija (centro del cuadrante) para que la grilla sea estable
+_LAT_REF = float(np.mean([c[0] for c in CUADRANTE_COORDS]))
+_M_POR_GRADO_LON = M_POR_GRADO_LON_ECUADOR * np.cos(np.radians(_LAT_REF))
+
+_RAIZ3 = np.sqrt(3.0)
+
+
+def _a_metros(lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return lon * _M_POR_GRADO_LON, lat * M_POR_GRADO_LAT
+
+
+def _a_grados(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return y / M_POR_GRADO_LAT, x / _M_POR_GRADO_LON
+
+
+def _indices_hex(x: np.ndarray, y: np.ndarray, tam: float) -> tuple[np.ndarray, np.ndarray]:
+    """Coordenadas axiales (q, r) del hexágono (punta arriba) que contiene cada punto."""
+    q = (_RAIZ3 / 3 * x - y / 3) / tam
+    r = (2 / 3 * y) / tam
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    # Redondeo cúbico: se corrige la componente con mayor error
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def _centros(a: np.ndarray, b: np.ndarray, tam: float, forma: str) -> tuple[np.ndarray, np.ndarray]:
+    if forma == 'hex':
+        return tam * (_RAIZ3 * a + _RAIZ3 / 2 * b), tam * 1.5 * b
+    return (a + 0.5) * tam, (b + 0.5) * tam
+
+
+def agregar_celdas(df: pd.DataFrame, tam_m: float = 400.0, forma: str = 'hex') -> pd.DataFrame:
+    """Conteo y suma de Pago por celda, separados dentro/fuera del cuadrante.
+
+    forma: 'hex' (hexágonos de radio tam_m) o 'cuadrado' (lado tam_m).
+    Devuelve una fila por celda ocupada con su centro (lat, lon).
+    """
+    columnas = ['a', 'b', 'lat', 'lon', 'entregas', 'monto',
+                'entregas_dentro', 'monto_dentro', 'entregas_fuera', 'monto_fuera']
+    lat = df['Latitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+    lon = df['Longitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+    ok = ~(np.isnan(lat) | np.isnan(lon))
+    if not ok.any():
+        return pd.DataFrame(columns=columnas)
+    lat, lon = lat[ok], lon[ok]
+    pago = df['Pago'].to_numpy(dtype=np.float64, na_value=np.nan)[ok] if 'Pago' in df.columns \
+        else np.zeros(len(lat))
+    pago = np.nan_to_num(pago)
+    if 'Zona' in df.columns:
+        dentro = (df['Zona'].notna() & (df['Zona'] != FUERA_DE_ZONA)).to_numpy()[ok]
+    else:
+        dentro = puntos_en_poligono(lat, lon, CUADRANTE_COORDS)
+
+    x, y = _a_metros(lat, lon)
+    if forma == 'hex':
+        a, b = _indices_hex(x, y, tam_m)
+    else:
+        a, b = np.floor(x / tam_m).astype(np.int64), np.floor(y / tam_m).astype(np.int64)
+
+    # Clave única por celda → índice compacto para bincount
+    a0, b0 = a.min(), b.min()
+    ancho = b.max() - b0 + 1
+    claves, inv = np.unique((a - a0) * ancho + (b - b0), return_inverse=True)
+    n = len(claves)
+    ca, cb = claves // ancho + a0, claves % ancho + b0
+    cx, cy = _centros(ca, cb, tam_m, forma)
+    clat, clon = _a_grados(cx, cy)
+
+    def _sumar(pesos=None, mascara=None):
+        if mascara is not None:
+            pesos = mascara.astype(np.float64) if pesos is None else np.where(mascara, pesos, 0.0)
+        return np.bincount(inv, weights=pesos, minlength=n)
+
+    return pd.DataFrame({
+        'a': ca, 'b': cb, 'lat': clat, 'lon': clon,
+        'entregas': _sumar().astype(np.int64),
+        'monto': _sumar(pago),
+        'entregas_dentro': _sumar(mascara=dentro).astype(np.int64),
+        'monto_dentro': _sumar(pago, dentro),
+        'entregas_fuera': _sumar(mascara=~dentro).astype(np.int64),
+        'monto_fuera': _sumar(pago, ~dentro),
+    }, columns=columnas)
+
+
+def esquinas_celdas(celdas: pd.DataFrame, tam_m: float = 400.0, forma: str = 'hex') -> np.ndarray:
+    """Vértices [lon, lat] de cada celda, forma (celdas, vértices, 2), listos para GeoJSON."""
+    cx, cy = _centros(celdas['a'].to_numpy(), celdas['b'].to_numpy(), tam_m, forma)
+    if forma == 'hex':
+        ang = np.radians(30 + 60 * np.arange(6))
+        dx, dy = tam_m * np.cos(ang), tam_m * np.sin(ang)
+    else:
+        h = tam_m / 2
+        dx, dy = np.array([-h, h, h, -h]), np.array([-h, -h, h, h])
+    lat, lon = _a_grados(cx[:, None] + dx, cy[:, None] + dy)
+    return np.stack([lon, lat], axis=-1)
@@ -0,0 +1,171 @@
+"""Detección vectorizada de check-ins duplicados o sospechosos.
+
+Solo se marca la repetición: la primera ocurrencia queda como válida, así
+excluir las marcadas cuenta cada entrega una vez. Reglas (columna 'Sospecha'):
+- 'Repetido': mismo Empleado + cliente + dirección (normalizados) a menos de
+  VENTANA_DUPLICADO_MIN minutos del check-in anterior con esa clave. Clave
+  hasheada por fila, orden por (clave, fecha) y comparación con la fila anterior.
+- 'Cercano': mismo Empleado a menos de RADIO_DUPLICADO_M metros dentro de la
+  misma ventana aunque el texto difiera (typos). Grilla de celdas de
+  RADIO_DUPLICADO_M: cada punto busca en su celda y las 8 vecinas por búsqueda
+  binaria sobre (empleado, celda, fecha) y verifica distancia y hora.
+- 'Coordenadas repetidas': mismas coordenadas exactas (DECIMALES_COORD_REPETIDA)
+  del mismo Empleado que en un día anterior (GPS copiado o sin actualizar).
+Las reglas por ubicación ignoran las coordenadas geocodificadas desde la dirección.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import DECIMALES_COORD_REPETIDA, RADIO_DUPLICADO_M, VENTANA_DUPLICADO_MIN
+from .densidad import _a_metros
+from .indice import normalizar_texto
+
+COLUMNAS_CLAVE = ('Empleado', 'Nombre del cliente (usuario/codigo)', 'Dirección de envío')
+MOTIVOS = ('Repetido', 'Cercano', 'Coordenadas repetidas')
+# Candidatos más recientes que se revisan por celda vecina (check-ins del mismo
+# empleado en la misma celda y ventana de minutos: en la práctica 0 o 1)
+MAX_CANDIDATOS = 4
+
+# Constantes de mezcla (multiplicación módulo 2**64) para hashear tuplas de enteros
+_MEZCLA = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(0x165667B19E3779F9))
+
+
+def _codigos_normalizados(serie: pd.Series) -> np.ndarray:
+    """Código por fila donde textos iguales tras normalizar comparten código (-1 = vacío)."""
+    codigos, unicos = pd.factorize(serie)
+    normalizados = normalizar_texto(pd.Series(unicos)).str.replace(r'\s+', ' ', regex=True).str.strip()
+    recodigo = pd.factorize(normalizados)[0]
+    return np.where(codigos >= 0, recodigo[codigos], -1)
+
+
+def _mezclar(*partes: np.ndarray) -> np.ndarray:
+    """Hash uint64 de tuplas de enteros, vectorizado."""
+    h = np.zeros(len(partes[0]), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for parte, constante in zip(partes, _MEZCLA * 2):
+            h = (h ^ parte.astype(np.int64).view(np.uint64)) * constante
+            h ^= h >> np.uint64(29)
+    return h
+
+
+def _orden(clave: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Como np.lexsort((t, clave)), pero con un solo argsort sobre (código de clave, t)."""
+    codigos = pd.factorize(clave, sort=True)[0].astype(np.int64)
+    t0 = t.min()
+    return np.argsort(codigos * np.int64(t.max() - t0 + 1) + (t - t0), kind='stable')
+
+
+def _repeticiones_consecutivas(clave: np.ndarray, t: np.ndarray, ventana_s: int) -> np.ndarray:
+    """Filas cuya fila anterior con la misma clave está a <= ventana_s segundos."""
+    orden = _orden(clave, t)
+    c, ts = clave[orden], t[orden]
+    repite = np.zeros(len(orden), dtype=bool)
+    repite[1:] = (c[1:] == c[:-1]) & (ts[1:] - ts[:-1] <= ventana_s)
+    marca = np.zeros(len(orden), dtype=bool)
+    marca[orden] = repite
+    return marca
+
+
+def _cercanos(empleado: np.ndarray, x: np.ndarray, y: np.ndarray, t: np.ndarray,
+              radio_m: float, ventana_s: int) -> np.ndarray:
+    """Filas con un check-in anterior del mismo empleado a <= radio_m y <= ventana_s."""
+    n = len(t)
+    cx = np.floor(x / radio_m).astype(np.int64)
+    cy = np.floor(y / radio_m).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    # Celda como entero (empleado, cx, cy) con margen de 1: la vecina (dx, dy) es
+    # celda + dx * alto + dy, así las consultas salen en el mismo orden que las filas
+    alto = np.int64(cy.max() + 2)
+    ancho = np.int64(cx.max() + 2)
+    celda = (empleado.astype(np.int64) * ancho + cx) * alto + cy
+    orden = _orden(celda, t)
+    celdas = celda[orden]
+    ts = t[orden]
+    # (celda, tiempo) como un solo entero ordenado: inicio del grupo de celda × span + tiempo
+    t0 = ts.min()
+    span = np.int64(t.max() - t0 + ventana_s + 1)
+    inicio_grupo = np.searchsorted(celdas, celdas, side='left').astype(np.int64)
+    compuesto = inicio_grupo * span + (ts - t0)
+
+    # Todo en orden de 'orden'; al final se devuelve a orden de filas
+    xs, ys, es = x[orden], y[orden], empleado[orden]
+    marca = np.zeros(n, dtype=bool)
+    posiciones = np.arange(n)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            vecina = celdas + (dx * alto + dy)
+            g = np.searchsorted(celdas, vecina, side='left')
+            existe = (g < n) & (celdas[np.minimum(g, n - 1)] == vecina)
+            i = posiciones[existe & ~marca]
+            if not len(i):
+                continue
+            base = g[i].astype(np.int64) * span
+            a = np.searchsorted(compuesto, base + (ts[i] - t0 - ventana_s), side='left')
+            b = np.searchsorted(compuesto, base + (ts[i] - t0), side='right')
+            for k in range(1, MAX_CANDIDATOS + 1):
+                hay = b - k >= a
+                if not hay.any():
+                    break
+                ii = i[hay]
+                c = b[hay] - k
+                anterior = (ts[c] < ts[ii]) | ((ts[c] == ts[ii]) & (orden[c] < orden[ii]))
+                cerca = (xs[c] - xs[ii]) ** 2 + (ys[c] - ys[ii]) ** 2 <= radio_m ** 2
+                marca[ii[anterior & cerca & (es[c] == es[ii])]] = True
+    resultado = np.zeros(n, dtype=bool)
+    resultado[orden] = marca
+    return resultado
+
+
+def _coordenadas_repetidas(empleado: np.ndarray, lat: np.ndarray, lon: np.ndarray, t: np.ndarray,
+                           decimales: int) -> np.ndarray:
+    """Filas con las mismas coordenadas exactas que un check-in del mismo empleado en un día anterior."""
+    escala = 10.0 ** decimales
+    clave = _mezclar(empleado, np.round(lat * escala), np.round(lon * escala))
+    dia = t // 86_400
+    orden = _orden(clave, t)
+    c = clave[orden]
+    inicio = np.ones(len(orden), dtype=bool)
+    inicio[1:] = c[1:] != c[:-1]
+    primer_dia = dia[orden][np.maximum.accumulate(np.where(inicio, np.arange(len(orden)), 0))]
+    marca = np.zeros(len(orden), dtype=bool)
+    marca[orden] = dia[orden] > primer_dia
+    return marca
+
+
+def marcar_duplicados(df: pd.DataFrame, ventana_min: float = VENTANA_DUPLICADO_MIN,
+                      radio_m: float = RADIO_DUPLICADO_M,
+                      decimales: int = DECIMALES_COORD_REPETIDA) -> pd.DataFrame:
+    """Agrega 'Duplicado' (bool) y 'Sospecha' (motivo, categórica) sin copiar las demás columnas."""
+    n = len(df)
+    motivo = np.full(n, -1, dtype=np.int8)
+    if n and 'Fecha de llenar' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Fecha de llenar']):
+        fechas = df['Fecha de llenar'].to_numpy(dtype='datetime64[ns]')
+        con_fecha = ~np.isnat(fechas)
+        idx = np.flatnonzero(con_fecha)
+        t = fechas[con_fecha].astype('datetime64[s]').astype(np.int64)
+        ventana_s = int(ventana_min * 60)
+        empleado = (_codigos_normalizados(df['Empleado'])[con_fecha] if 'Empleado' in df.columns
+                    else np.zeros(len(idx), dtype=np.int64))
+        reglas = []
+        if all(c in df.columns for c in COLUMNAS_CLAVE):
+            clave = _mezclar(*(_codigos_normalizados(df[c])[con_fecha] for c in COLUMNAS_CLAVE))
+            reglas.append((0, idx, _repeticiones_consecutivas(clave, t, ventana_s)))
+        if {'Latitud', 'Longitud'}.issubset(df.columns):
+            lat = df['Latitud'].to_numpy(dtype=np.float64, na_value=np.nan)[con_fecha]
+            lon = df['Longitud'].to_numpy(dtype=np.float64, na_value=np.nan)[con_fecha]
+            ok = ~(np.isnan(lat) | np.isnan(lon))
+            if 'Coord_geocodificada' in df.columns:
+                # Coordenadas tomadas de la dirección: iguales para toda entrega en esa dirección
+                ok &= ~df['Coord_geocodificada'].to_numpy(dtype=bool)[con_fecha]
+            if ok.any():
+                x, y = _a_metros(lat[ok], lon[ok])
+                reglas.append((1, idx[ok], _cercanos(empleado[ok], x, y, t[ok], radio_m, ventana_s)))
+                reglas.append((2, idx[ok], _coordenadas_repetidas(empleado[ok], lat[ok], lon[ok], t[ok], decimales)))
+        # Primero el motivo más específico: se aplican en orden inverso y el primero pisa
+        for codigo, filas, marca in reversed(reglas):
+            motivo[filas[marca]] = codigo
+    return df.assign(
+        Duplicado=motivo >= 0,
+        Sospecha=pd.Categorical.from_codes(motivo, categories=list(MOTIVOS)),
+    )
@@ -0,0 +1,407 @@
+"""Exportación completa del período a CSV / XLSX / Parquet, con subtotales y por bloques.
+
+El archivo se escribe bloque a bloque (FILAS_POR_BLOQUE filas de detalle por vez)
+directo al destino: la memoria extra es la de un bloque, no la del período.
+Filas de salida (columna 'Nivel'):
+- 'Detalle': todas las columnas del dataset, en orden de fecha.
+- 'Subtotal día': al cerrar cada día, check-ins y monto del día.
+- 'Subtotal empleado': al final, uno por empleado del período.
+- 'Total': última fila.
+El XLSX se arma sin dependencias extra (SpreadsheetML mínimo escrito en streaming
+dentro del zip); si supera el máximo de filas de Excel continúa en otra hoja.
+"""
+import codecs
+import os
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from io import BytesIO
+from typing import BinaryIO, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+FORMATOS_EXPORTACION = ('csv', 'xlsx', 'parquet')
+MIME_EXPORTACION = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+FILAS_POR_BLOQUE = 50_000
+MAX_FILAS_XLSX = 1_048_576
+# Filas repartidas en el período con las que se estima el tamaño del archivo
+FILAS_MUESTRA = 2_000
+# Archivos temporales de exportación: prefijo y antigüedad a partir de la cual
+# limpiar_temporales() los borra (sesiones caídas sin finalizar el trabajo)
+PREFIJO_TEMPORAL = 'mensajeria_'
+VIDA_TEMPORAL_HORAS = 24
+
+
+# ==============================
+# Filas de salida (detalle + subtotales)
+# ==============================
+def _tipos_salida(df: pd.DataFrame) -> dict:
+    """dtype de cada columna de salida: uniforme entre bloques y con nulos en los subtotales."""
+    tipos = {'Nivel': 'str'}
+    for col, tipo in df.dtypes.items():
+        if isinstance(tipo, pd.CategoricalDtype) or tipo == object:
+            tipos[col] = 'str'
+        elif pd.api.types.is_bool_dtype(tipo):
+            tipos[col] = 'boolean'
+        elif pd.api.types.is_integer_dtype(tipo):
+            tipos[col] = 'Int64'
+        else:
+            tipos[col] = tipo
+    tipos['Checkins'] = 'Int64'
+    return tipos
+
+
+def _pagos(df: pd.DataFrame) -> np.ndarray:
+    if 'Pago' not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df['Pago'], errors='coerce').fillna(0).to_numpy(dtype=float)
+
+
+def _cortes_por_dia(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """(inicio, fin) de cada día en filas ordenadas por fecha + subtotal de cada día."""
+    if 'Fecha de llenar' not in df.columns or df.empty:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), pd.DataFrame()
+    dias = df['Fecha de llenar'].dt.normalize()
+    codigos, _ = pd.factorize(dias)
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    fines = np.r_[inicios[1:], len(df)]
+    subtotales = pd.DataFrame({
+        'Nivel': 'Subtotal día',
+        'Fecha de llenar': dias.to_numpy()[inicios],
+        'Pago': np.add.reduceat(_pagos(df), inicios),
+        'Checkins': fines - inicios,
+    })
+    return inicios, fines, subtotales
+
+
+def _claves_empleado(df: pd.DataFrame) -> pd.Series:
+    """Empleado como texto para agrupar; los vacíos forman un solo grupo ''."""
+    empleado = df['Empleado']
+    return empleado.astype('str').where(empleado.notna(), '')
+
+
+def _cierre(df: pd.DataFrame) -> pd.DataFrame:
+    """Subtotales por empleado del período y total general."""
+    pago = pd.Series(_pagos(df), index=df.index)
+    filas = []
+    if 'Empleado' in df.columns and len(df):
+        por_empleado = pago.groupby(_claves_empleado(df), sort=True)
+        filas.append(pd.DataFrame({
+            'Nivel': 'Subtotal empleado',
+            'Empleado': por_empleado.sum().index,
+            'Pago': por_empleado.sum().to_numpy(),
+            'Checkins': por_empleado.size().to_numpy(),
+        }))
+    filas.append(pd.DataFrame({'Nivel': ['Total'], 'Pago': [pago.sum()], 'Checkins': [len(df)]}))
+    return pd.concat(filas, ignore_index=True)
+
+
+def bloques_exportacion(df: pd.DataFrame, filas_por_bloque: int = FILAS_POR_BLOQUE) -> Iterator[pd.DataFrame]:
+    """Bloques de filas de salida, cada uno con ~filas_por_bloque filas de detalle."""
+    if 'Fecha de llenar' in df.columns and not df['Fecha de llenar'].is_monotonic_increasing:
+        df = df.sort_values('Fecha de llenar', kind='stable', na_position='last')
+    tipos = _tipos_salida(df)
+    columnas = list(tipos)
+    inicios, fines, subtotales = _cortes_por_dia(df)
+
+    a = 0
+    while a < len(df):
+        b = min(a + filas_por_bloque, len(df))
+        partes, cursor = [], a
+        # Días que cierran dentro de este bloque: detalle hasta el cierre + su subtotal
+        for k in range(np.searchsorted(fines, a, side='right'), np.searchsorted(fines, b, side='right')):
+            partes.append(df.iloc[cursor:fines[k]])
+            partes.append(subtotales.iloc[[k]])
+            cursor = fines[k]
+        partes.append(df.iloc[cursor:b])
+        bloque = pd.concat([p for p in partes if len(p)], ignore_index=True)
+        bloque['Nivel'] = bloque['Nivel'].fillna('Detalle') if 'Nivel' in bloque else 'Detalle'
+        yield bloque.reindex(columns=columnas).astype(tipos)
+        a = b
+    yield _cierre(df).reindex(columns=columnas).astype(tipos)
+
+
+def filas_salida(df: pd.DataFrame) -> int:
+    """Filas que tendrá el archivo: detalle + subtotales por día y por empleado + total."""
+    dias = df['Fecha de llenar'].dt.normalize().nunique(dropna=False) if 'Fecha de llenar' in df.columns else 0
+    empleados = _claves_empleado(df).nunique(dropna=False) if 'Empleado' in df.columns and len(df) else 0
+    return len(df) + (dias if len(df) else 0) + empleados + 1
+
+
+# ==============================
+# Escritores por formato
+# ==============================
+def _fechas_texto(serie: pd.Series) -> pd.Series:
+    """'AAAA-MM-DD HH:MM' vía numpy (strftime de pandas es ~10x más lento por fila)."""
+    texto = serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[m]').astype(str)
+    return pd.Series(np.char.replace(texto, 'T', ' '), index=serie.index).where(serie.notna())
+
+
+def _escribir_csv(bloques: Iterator[pd.DataFrame], destino: BinaryIO, progreso) -> None:
+    destino.write(codecs.BOM_UTF8)  # BOM: Excel abre los acentos bien
+    for i, bloque in enumerate(bloques):
+        fechas = bloque.select_dtypes('datetime').columns
+        bloque = bloque.assign(**{c: _fechas_texto(bloque[c]) for c in fechas})
+        destino.write(bloque.to_csv(index=False, header=i == 0).encode('utf-8'))
+        progreso(len(bloque))
+
+
+def _escribir_parquet(bloques: Iterator[pd.DataFrame], destino: BinaryIO, progreso) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    try:
+        for bloque in bloques:
+            if escritor is None:
+                tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+                escritor = pq.ParquetWriter(destino, tabla.schema)
+            else:
+                tabla = pa.Table.from_pandas(bloque, schema=escritor.schema, preserve_index=False)
+            escritor.write_table(tabla)
+            progreso(len(bloque))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_EPOCA_EXCEL = np.datetime64('1899-12-30', 'ns')
+_ESTILOS_XLSX = (
+    _XML + f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+
+def _texto_xml(serie: pd.Series) -> pd.Series:
+    return (serie.astype('str')
+            .str.replace(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', regex=True)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False))
+
+
+def _celdas_xlsx(serie: pd.Series) -> np.ndarray:
+    """XML de las celdas de una columna; se formatean solo los valores únicos y se
+    expanden por código (nulo → celda vacía)."""
+    codigos, unicos = pd.factorize(serie)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        dias = (np.asarray(unicos, dtype='datetime64[ns]') - _EPOCA_EXCEL).astype(np.int64) / 86_400e9
+        celdas = '<c s="1"><v>' + dias.astype(str).astype(object) + '</v></c>'
+    elif pd.api.types.is_bool_dtype(serie.dtype):
+        celdas = np.where(np.asarray(unicos, dtype=bool), '<c t="b"><v>1</v></c>', '<c t="b"><v>0</v></c>')
+    elif pd.api.types.is_numeric_dtype(serie.dtype):
+        celdas = '<c><v>' + np.asarray(unicos).astype(str).astype(object) + '</v></c>'
+    else:
+        celdas = ('<c t="inlineStr"><is><t xml:space="preserve">'
+                  + _texto_xml(pd.Series(unicos)).to_numpy(dtype=object) + '</t></is></c>')
+    return np.append(np.asarray(celdas, dtype=object), '<c/>')[codigos]
+
+
+class _LibroXlsx:
+    """Hojas escritas fila a fila dentro del zip; el índice del libro se agrega al cerrar."""
+
+    def __init__(self, destino: BinaryIO, columnas: list[str]):
+        self._zip = zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED)
+        self._encabezado = '<row>' + ''.join(
+            f'<c t="inlineStr" s="2"><is><t>{_texto_xml(pd.Series([c])).iloc[0]}</t></is></c>' for c in columnas
+        ) + '</row>\n'
+        self._hojas = 0
+        self._hoja = None
+        self._filas_hoja = 0
+
+    def _nueva_hoja(self):
+        self._cerrar_hoja()
+        self._hojas += 1
+        self._hoja = self._zip.open(f'xl/worksheets/sheet{self._hojas}.xml', 'w', force_zip64=True)
+        self._hoja.write((_XML + f'<worksheet xmlns="{_NS_MAIN}"><sheetData>' + self._encabezado).encode('utf-8'))
+        self._filas_hoja = 1
+
+    def _cerrar_hoja(self):
+        if self._hoja is not None:
+            self._hoja.write(b'</sheetData></worksheet>')
+            self._hoja.close()
+            self._hoja = None
+
+    def escribir(self, bloque: pd.DataFrame) -> None:
+        columnas = [_celdas_xlsx(bloque[col]) for col in bloque.columns]
+        filas = ['<row>' + ''.join(celdas) + '</row>\n' for celdas in zip(*columnas)]
+        while filas:
+            if self._hoja is None or self._filas_hoja >= MAX_FILAS_XLSX:
+                self._nueva_hoja()
+            cupo = MAX_FILAS_XLSX - self._filas_hoja
+            self._hoja.write(''.join(filas[:cupo]).encode('utf-8'))
+            self._filas_hoja += len(filas[:cupo])
+            filas = filas[cupo:]
+
+    def cerrar(self) -> None:
+        if self._hoja is None and self._hojas == 0:
+            self._nueva_hoja()
+        self._cerrar_hoja()
+        hojas = range(1, self._hojas + 1)
+        self._zip.writestr('[Content_Types].xml', _XML + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in hojas)
+            + '</Types>'))
+        self._zip.writestr('_rels/.rels', _XML + (
+            f'<Relationships xmlns="{_NS_PKG}"><Relationship Id="rId1" '
+            f'Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'))
+        self._zip.writestr('xl/workbook.xml', _XML + (
+            f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>'
+            + ''.join(f'<sheet name="{"Datos" if i == 1 else f"Datos {i}"}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i in hojas)
+            + '</sheets></workbook>'))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', _XML + (
+            f'<Relationships xmlns="{_NS_PKG}">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in hojas)
+            + f'<Relationship Id="rId{self._hojas + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            '</Relationships>'))
+        self._zip.writestr('xl/styles.xml', _ESTILOS_XLSX)
+        self._zip.close()
+
+
+def _escribir_xlsx(bloques: Iterator[pd.DataFrame], destino: BinaryIO, progreso) -> None:
+    libro = None
+    for bloque in bloques:
+        libro = libro or _LibroXlsx(destino, list(bloque.columns))
+        libro.escribir(bloque)
+        progreso(len(bloque))
+    libro.cerrar()
+
+
+_ESCRITORES = {'csv': _escribir_csv, 'xlsx': _escribir_xlsx, 'parquet': _escribir_parquet}
+
+
+# ==============================
+# API
+# ==============================
+def exportar(df: pd.DataFrame, destino: BinaryIO | str | os.PathLike, formato: str,
+             filas_por_bloque: int = FILAS_POR_BLOQUE,
+             progreso: Callable[[int], None] | None = None) -> int:
+    """Escribe el período en `destino` (archivo binario o ruta); devuelve las filas escritas."""
+    if formato not in _ESCRITORES:
+        raise ValueError(f'Formato no soportado: {formato} (use {", ".join(FORMATOS_EXPORTACION)})')
+    escritas = 0
+
+    def _avance(n: int):
+        nonlocal escritas
+        escritas += n
+        if progreso:
+            progreso(escritas)
+
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as f:
+            _ESCRITORES[formato](bloques_exportacion(df, filas_por_bloque), f, _avance)
+    else:
+        _ESCRITORES[formato](bloques_exportacion(df, filas_por_bloque), destino, _avance)
+    return escritas
+
+
+def estimar(df: pd.DataFrame, formato: str) -> tuple[int, int]:
+    """(filas, bytes aprox.) del archivo, escribiendo una muestra repartida en el período."""
+    filas = filas_salida(df)
+    if df.empty:
+        return filas, 0
+    n = min(len(df), FILAS_MUESTRA)
+    muestra = df.iloc[np.linspace(0, len(df) - 1, n).astype(np.intp)]
+    buffer = BytesIO()
+    filas_muestra = exportar(muestra, buffer, formato)
+    return filas, int(buffer.tell() / filas_muestra * filas)
+
+
+def _borrar(ruta: str) -> None:
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def limpiar_temporales(directorio: str | None = None, horas: float = VIDA_TEMPORAL_HORAS) -> int:
+    """Borra exportaciones temporales de más de `horas` (p. ej. de un proceso anterior); devuelve cuántas."""
+    directorio = directorio or tempfile.gettempdir()
+    limite = time.time() - horas * 3600
+    borrados = 0
+    for entrada in os.scandir(directorio):
+        if not (entrada.name.startswith(PREFIJO_TEMPORAL) and entrada.is_file()):
+            continue
+        if os.path.splitext(entrada.name)[1][1:] not in FORMATOS_EXPORTACION:
+            continue
+        try:
+            if entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+                borrados += 1
+        except OSError:
+            pass
+    return borrados
+
+
+class TrabajoExportacion:
+    """Exportación en un hilo de fondo hacia un archivo temporal; la UI consulta el avance.
+
+    El archivo vive lo que vive el trabajo: se borra con descartar() o cuando el
+    objeto se libera (p. ej. al expirar la sesión que lo tenía en session_state).
+    """
+
+    def __init__(self, df: pd.DataFrame, formato: str, directorio: str | None = None):
+        self.formato = formato
+        self.total = filas_salida(df)
+        self.escritas = 0
+        self.error: str | None = None
+        self.terminado = False
+        fd, self.ruta = tempfile.mkstemp(prefix=PREFIJO_TEMPORAL, suffix=f'.{formato}', dir=directorio)
+        os.close(fd)
+        self._finalizador = weakref.finalize(self, _borrar, self.ruta)
+        self._df = df
+        self._hilo = threading.Thread(target=self._correr, name='mensajeria-exportacion', daemon=True)
+
+    def iniciar(self) -> 'TrabajoExportacion':
+        self._hilo.start()
+        return self
+
+    def _correr(self):
+        try:
+            exportar(self._df, self.ruta, self.formato, progreso=self._avance)
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+        finally:
+            self._df = None
+            self.terminado = True
+
+    def _avance(self, escritas: int):
+        self.escritas = escritas
+
+    def leer(self) -> bytes:
+        with open(self.ruta, 'rb') as f:
+            return f.read()
+
+    def descartar(self) -> None:
+        self._finalizador()  # idempotente: borra el archivo una sola vez
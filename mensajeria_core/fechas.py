@@ -0,0 +1,169 @@
+"""Parser vectorizado de "Fecha de llenar".
+
+Cada valor distinto se clasifica una sola vez con una pasada de regex
+(dd/mm, mm/dd, ISO, con/sin segundos) y cada grupo de formato se parsea
+exactamente una vez. Como los timestamps se repiten mucho (precisión de
+minuto), el trabajo es proporcional a los valores únicos y no a las filas.
+
+El caso común de Google Sheets (``dd/mm/aaaa hh:mm[:ss]`` con ceros a la
+izquierda) se decodifica directamente de los bytes con NumPy; el resto de
+grupos usa ``pd.to_datetime`` con su formato explícito.
+"""
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# dd/mm/aaaa hh:mm[:ss] con ancho fijo (16 o 19 caracteres)
+_RE_FIJO = r'^\d{2}/\d{2}/\d{4} \d{2}:\d{2}(?::\d{2})?$'
+# d/m/aaaa [h:mm[:ss]] — el orden día/mes se decide por fila
+_RE_BARRAS = r'^(\d{1,2})/(\d{1,2})/(\d{4})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?$'
+# aaaa-mm-dd [hh:mm[:ss]]
+_RE_ISO = r'^\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?$'
+
+# Máximo de índices de filas ambiguas que se guardan en el informe
+MAX_MUESTRA_AMBIGUAS = 50
+
+
+@dataclass
+class InformeFechas:
+    """Conteos por formato (en filas) y filas ambiguas/no parseadas."""
+    por_formato: dict = field(default_factory=dict)
+    ambiguas: int = 0
+    sin_parsear: int = 0
+    valores_unicos: int = 0
+    muestra_ambiguas: list = field(default_factory=list)
+
+
+def _formato_barras(orden: str, hora: bool, segundos: bool) -> str:
+    fecha = '%d/%m/%Y' if orden == 'dm' else '%m/%d/%Y'
+    if segundos:
+        return fecha + ' %H:%M:%S'
+    if hora:
+        return fecha + ' %H:%M'
+    return fecha
+
+
+def _orden_barras(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(es mes/día, es ambigua). Día/mes salvo que el segundo número no pueda ser mes."""
+    mes_dia = (a <= 12) & (b > 12)
+    ambigua = (a <= 12) & (b <= 12) & (a != b)
+    return mes_dia, ambigua
+
+
+def _componer(anio, mes, dia, hora, minuto, seg) -> np.ndarray:
+    """Arma datetime64[ns] desde componentes enteros; NaT si la fecha no existe."""
+    valido = (mes >= 1) & (mes <= 12) & (dia >= 1) & (hora < 24) & (minuto < 60) & (seg < 60)
+    meses = ((anio - 1970) * 12 + np.clip(mes, 1, 12) - 1).astype('datetime64[M]')
+    inicio = meses.astype('datetime64[D]')
+    dias_mes = ((meses + 1).astype('datetime64[D]') - inicio).astype(np.int64)
+    valido &= dia <= dias_mes
+    segundos = ((dia - 1) * 86400 + hora * 3600 + minuto * 60 + seg).astype('timedelta64[s]')
+    ts = (inicio.astype('datetime64[s]') + segundos).astype('datetime64[ns]')
+    ts[~valido] = np.datetime64('NaT')
+    return ts
+
+
+def _decodificar_fijo(valores: np.ndarray) -> tuple[np.ndarray, ...]:
+    """Componentes numéricos de 'dd/mm/aaaa hh:mm[:ss]' leyendo los bytes directamente."""
+    crudo = valores.astype('S19')
+    d = np.frombuffer(crudo.tobytes(), dtype=np.uint8).reshape(-1, 19).astype(np.int64) - 48
+
+    def _num(i, j):
+        out = np.zeros(len(d), dtype=np.int64)
+        for k in range(i, j):
+            out = out * 10 + d[:, k]
+        return out
+
+    con_seg = d[:, 16] == ord(':') - 48
+    seg = np.where(con_seg, _num(17, 19), 0)
+    return _num(0, 2), _num(3, 5), _num(6, 10), _num(11, 13), _num(14, 16), seg, con_seg
+
+
+def parsear_fechas(serie: pd.Series) -> tuple[pd.Series, InformeFechas]:
+    """Parsea la columna en una sola pasada por formato. Ambiguas (ambos ≤ 12) se leen día/mes."""
+    texto = serie.astype('string').str.strip()
+    codigos, unicos = pd.factorize(texto)
+    u = pd.Series(unicos, dtype='string')
+    informe = InformeFechas(valores_unicos=len(u))
+    if u.empty:
+        return pd.Series(pd.NaT, index=serie.index, name=serie.name, dtype='datetime64[ns]'), informe
+
+    # Peso de cada valor único = cuántas filas lo usan
+    pesos = np.bincount(codigos[codigos >= 0], minlength=len(u))
+    parseados = np.full(len(u), np.datetime64('NaT'), dtype='datetime64[ns]')
+    ambiguas = np.zeros(len(u), dtype=bool)
+
+    def _contar(nombre: str, mascara: np.ndarray):
+        if mascara.any():
+            informe.por_formato[nombre] = informe.por_formato.get(nombre, 0) + int(pesos[mascara].sum())
+
+    # Grupo 1: ancho fijo (caso común) — decodificación numérica directa
+    es_fijo = u.str.match(_RE_FIJO).fillna(False).to_numpy(dtype=bool)
+    if es_fijo.any():
+        idx = np.flatnonzero(es_fijo)
+        a, b, anio, hora, minuto, seg, con_seg = _decodificar_fijo(u.to_numpy(dtype=object)[idx])
+        mes_dia, amb = _orden_barras(a, b)
+        dia, mes = np.where(mes_dia, b, a), np.where(mes_dia, a, b)
+        parseados[idx] = _componer(anio, mes, dia, hora, minuto, seg)
+        ambiguas[idx] = amb
+        for orden, grupo in (('dm', ~mes_dia), ('md', mes_dia)):
+            for s in (True, False):
+                sub = np.zeros(len(u), dtype=bool)
+                sub[idx] = grupo & (con_seg == s)
+                _contar(_formato_barras(orden, True, s), sub)
+
+    # Grupo 2: barras sin ceros a la izquierda o sin hora
+    resto = ~es_fijo
+    partes = u[resto].str.extract(_RE_BARRAS)
+    if len(partes):
+        idx = np.flatnonzero(resto)[partes[0].notna().to_numpy()]
+        partes = partes.dropna(subset=[0])
+        a = partes[0].astype(int).to_numpy()
+        b = partes[1].astype(int).to_numpy()
+        mes_dia, amb = _orden_barras(a, b)
+        ambiguas[idx] = amb
+        con_hora = partes[3].notna().to_numpy()
+        con_seg = partes[5].notna().to_numpy()
+        for orden, grupo in (('dm', ~mes_dia), ('md', mes_dia)):
+            for h, s in ((True, True), (True, False), (False, False)):
+                sel = idx[grupo & (con_hora == h) & (con_seg == s)]
+                if len(sel):
+                    formato = _formato_barras(orden, h, s)
+                    parseados[sel] = pd.to_datetime(u[sel], format=formato, errors='coerce').to_numpy('datetime64[ns]')
+                    sub = np.zeros(len(u), dtype=bool)
+                    sub[sel] = True
+                    _contar(formato, sub)
+        resto[idx] = False
+
+    # Grupo 3: ISO 8601
+    es_iso = resto & u.str.match(_RE_ISO).fillna(False).to_numpy(dtype=bool)
+    if es_iso.any():
+        parseados[es_iso] = pd.to_datetime(u[es_iso], format='ISO8601', errors='coerce').to_numpy('datetime64[ns]')
+        _contar('ISO8601', es_iso)
+        resto &= ~es_iso
+
+    # Lo que no encaja en ningún patrón conocido: parseo flexible solo sobre esos valores
+    vacios = u.fillna('').eq('').to_numpy()
+    resto &= ~vacios
+    if resto.any():
+        parseados[resto] = pd.to_datetime(u[resto], format='mixed', dayfirst=True, errors='coerce').to_numpy('datetime64[ns]')
+        _contar('otro', resto)
+
+    valores = parseados[codigos]
+    valores[codigos < 0] = np.datetime64('NaT')
+    fechas = pd.Series(valores, index=serie.index, name=serie.name)
+
+    filas_ambiguas = ambiguas[codigos] & (codigos >= 0)
+    informe.ambiguas = int(filas_ambiguas.sum())
+    informe.muestra_ambiguas = serie.index[filas_ambiguas][:MAX_MUESTRA_AMBIGUAS].tolist()
+    con_texto = (codigos >= 0) & ~vacios[codigos]
+    informe.sin_parsear = int((fechas.isna().to_numpy() & con_texto).sum())
+
+    if informe.ambiguas or informe.sin_parsear:
+        logger.info('Fechas: %d ambiguas (leídas día/mes), %d sin parsear',
+                    informe.ambiguas, informe.sin_parsear)
+    return fechas, informe
@@ -0,0 +1,222 @@
+"""Coordenadas para las filas sin Latitud/Longitud a partir de 'Dirección de envío'.
+
+Las direcciones se normalizan (minúsculas, sin tildes ni signos, espacios
+simples) y se buscan primero en una caché persistente en SQLite; solo las que
+faltan se mandan, en lotes, al backend configurado:
+- archivo nomenclátor (CSV con columnas direccion, latitud, longitud);
+- servicio HTTP que recibe un lote y responde todas las coordenadas juntas.
+Lo que el backend no encuentra también se guarda (sin coordenadas) y no se
+vuelve a consultar hasta pasados GEOCODIFICACION_REINTENTO_DIAS. Así una
+dirección repetida se resuelve una sola vez, en esta ejecución y en las
+siguientes. Las filas completadas quedan marcadas en 'Coord_geocodificada'.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import requests
+
+from .config import (DESCARGA_TIMEOUT, GEOCODIFICACION_LOTE, GEOCODIFICACION_REINTENTO_DIAS,
+                     GEOCODIFICADOR)
+from .indice import normalizar_texto
+from .sincronizacion import DIRECTORIO_CACHE, sesion_http
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE_GEOCODIGOS = os.environ.get('MENSAJERIA_GEOCODIGOS', str(Path(DIRECTORIO_CACHE) / 'geocodigos.sqlite'))
+# Máximo de parámetros por consulta IN (...) (SQLite admite 999 en versiones viejas)
+_PARAMETROS_SQL = 900
+
+# Un backend recibe direcciones normalizadas y devuelve {dirección: (lat, lon)} con las que encontró
+Backend = Callable[[list[str]], dict[str, tuple[float, float]]]
+
+
+def normalizar_direccion(direcciones: pd.Series) -> pd.Series:
+    """Clave de caché: 'C/ Duarte #45, Gazcue' → 'c duarte 45 gazcue'."""
+    return (normalizar_texto(direcciones).str.replace(r'[^0-9a-zñ]+', ' ', regex=True).str.strip())
+
+
+# ------------------------------
+# Caché persistente
+# ------------------------------
+class CacheGeocodigos:
+    """Tabla dirección normalizada → (lat, lon) en SQLite; lat/lon NULL = no encontrada."""
+
+    def __init__(self, ruta: str = RUTA_CACHE_GEOCODIGOS):
+        self.ruta = ruta
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        with self._conexion() as con:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('CREATE TABLE IF NOT EXISTS geocodigos ('
+                        'direccion TEXT PRIMARY KEY, lat REAL, lon REAL, fuente TEXT, consultado REAL)')
+
+    def _conexion(self):
+        # Una conexión por operación: la caché se usa desde el hilo de refresco y desde el CLI
+        return closing(sqlite3.connect(self.ruta, timeout=30))
+
+    def buscar(self, direcciones: list[str], reintento_dias: float = GEOCODIFICACION_REINTENTO_DIAS) -> dict:
+        """{dirección: (lat, lon) o None} de las que están en caché (los None vencidos se omiten)."""
+        vencimiento = time.time() - reintento_dias * 86_400
+        encontradas = {}
+        with self._conexion() as con:
+            for i in range(0, len(direcciones), _PARAMETROS_SQL):
+                lote = direcciones[i:i + _PARAMETROS_SQL]
+                filas = con.execute(
+                    f"SELECT direccion, lat, lon, consultado FROM geocodigos "
+                    f"WHERE direccion IN ({','.join('?' * len(lote))})", lote)
+                for direccion, lat, lon, consultado in filas:
+                    if lat is not None and lon is not None:
+                        encontradas[direccion] = (lat, lon)
+                    elif consultado >= vencimiento:
+                        encontradas[direccion] = None
+        return encontradas
+
+    def guardar(self, resultados: dict, fuente: str = '') -> None:
+        ahora = time.time()
+        filas = [(d, *(c if c else (None, None)), fuente, ahora) for d, c in resultados.items()]
+        with self._conexion() as con, con:
+            con.executemany('INSERT OR REPLACE INTO geocodigos VALUES (?, ?, ?, ?, ?)', filas)
+
+    def tamano(self) -> int:
+        with self._conexion() as con:
+            return con.execute('SELECT COUNT(*) FROM geocodigos WHERE lat IS NOT NULL').fetchone()[0]
+
+
+# ------------------------------
+# Backends
+# ------------------------------
+class NomencladorArchivo:
+    """Nomenclátor local: CSV (direccion, latitud, longitud) cargado una vez en memoria."""
+
+    def __init__(self, ruta: str):
+        self.nombre = f'archivo:{Path(ruta).name}'
+        tabla = pd.read_csv(ruta, dtype={'direccion': str})
+        tabla = tabla.assign(direccion=normalizar_direccion(tabla['direccion'].fillna('')))
+        tabla = tabla.dropna(subset=['latitud', 'longitud']).drop_duplicates('direccion')
+        self._coords = dict(zip(tabla['direccion'],
+                                zip(tabla['latitud'].astype(float), tabla['longitud'].astype(float))))
+
+    def __call__(self, direcciones: list[str]) -> dict:
+        return {d: self._coords[d] for d in direcciones if d in self._coords}
+
+
+class ServicioGeocodificacion:
+    """Servicio HTTP por lotes: POST {"direcciones": [...]} → {"resultados": {dir: [lat, lon] | null}}."""
+
+    def __init__(self, url: str, timeout: int = DESCARGA_TIMEOUT, sesion: requests.Session | None = None):
+        self.nombre = url
+        self.url = url
+        self.timeout = timeout
+        self.sesion = sesion or sesion_http()
+
+    def __call__(self, direcciones: list[str]) -> dict:
+        resp = self.sesion.post(self.url, json={'direcciones': direcciones}, timeout=self.timeout)
+        resp.raise_for_status()
+        return {d: (float(c[0]), float(c[1])) for d, c in resp.json().get('resultados', {}).items() if c}
+
+
+def crear_backend(especificacion: str = GEOCODIFICADOR) -> Backend | None:
+    """'' → sin backend (solo caché); URL http(s) → servicio; otra cosa → ruta de nomenclátor CSV."""
+    if not especificacion:
+        return None
+    if especificacion.startswith(('http://', 'https://')):
+        return ServicioGeocodificacion(especificacion)
+    return NomencladorArchivo(especificacion)
+
+
+# ------------------------------
+# Geocodificador
+# ------------------------------
+class Geocodificador:
+    """Caché + backend; resuelve solo direcciones únicas y solo las que no están en caché."""
+
+    def __init__(self, cache: CacheGeocodigos | None = None, backend: Backend | None = None,
+                 lote: int = GEOCODIFICACION_LOTE):
+        self.cache = cache or CacheGeocodigos()
+        self.backend = backend
+        self.lote = lote
+        self._lock = threading.Lock()
+        self.consultas_backend = 0   # lotes enviados al backend (para pruebas y diagnóstico)
+
+    def resolver(self, direcciones: list[str]) -> dict:
+        """{dirección normalizada: (lat, lon) o None} para direcciones únicas."""
+        with self._lock:
+            resultado = self.cache.buscar(direcciones)
+            faltan = [d for d in direcciones if d not in resultado]
+            if faltan and self.backend is not None:
+                for i in range(0, len(faltan), self.lote):
+                    lote = faltan[i:i + self.lote]
+                    try:
+                        encontradas = self.backend(lote)
+                    except Exception as e:
+                        # Sin guardar: se reintenta en el próximo refresco
+                        logger.warning('Geocodificación falló para un lote de %d direcciones: %s', len(lote), e)
+                        continue
+                    self.consultas_backend += 1
+                    nuevas = {d: encontradas.get(d) for d in lote}
+                    self.cache.guardar(nuevas, getattr(self.backend, 'nombre', ''))
+                    resultado.update(nuevas)
+            return resultado
+
+    def completar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rellena Latitud/Longitud vacías desde la dirección; agrega 'Coord_geocodificada'.
+
+        df.attrs['geocodificacion'] resume cuántas filas faltaban, cuántas se completaron
+        y cuántas direcciones distintas hubo que resolver.
+        """
+        if not {'Latitud', 'Longitud', 'Dirección de envío'}.issubset(df.columns):
+            return df
+        lat = df['Latitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+        lon = df['Longitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+        sin_coord = np.flatnonzero(np.isnan(lat) | np.isnan(lon))
+        geocodificada = np.zeros(len(df), dtype=bool)
+        resumen = {'sin_coordenadas': len(sin_coord), 'completadas': 0, 'direcciones': 0}
+        if len(sin_coord):
+            # Se normalizan solo los valores distintos; cada fila toma el suyo por código
+            codigos, unicos = pd.factorize(df['Dirección de envío'].iloc[sin_coord])
+            claves = normalizar_direccion(pd.Series(unicos)).to_numpy(dtype=object)
+            distintas = sorted({c for c in claves if c})
+            coords = self.resolver(distintas) if distintas else {}
+            lat_u = np.array([(coords.get(c) or (np.nan, np.nan))[0] for c in claves] + [np.nan])
+            lon_u = np.array([(coords.get(c) or (np.nan, np.nan))[1] for c in claves] + [np.nan])
+            nuevo_lat, nuevo_lon = lat_u[codigos], lon_u[codigos]   # código -1 → último (NaN)
+            ok = ~(np.isnan(nuevo_lat) | np.isnan(nuevo_lon))
+            if ok.any():
+                lat, lon = lat.copy(), lon.copy()
+                lat[sin_coord[ok]] = nuevo_lat[ok]
+                lon[sin_coord[ok]] = nuevo_lon[ok]
+                geocodificada[sin_coord[ok]] = True
+            resumen.update(completadas=int(ok.sum()), direcciones=len(distintas))
+        df = df.assign(Latitud=lat, Longitud=lon, Coord_geocodificada=geocodificada)
+        df.attrs['geocodificacion'] = resumen
+        return df
+
+
+_geocodificador: Geocodificador | None = None
+_lock_geocodificador = threading.Lock()
+
+
+def geocodificador() -> Geocodificador | None:
+    """Geocodificador del proceso (caché en disco + backend de GEOCODIFICADOR); None si no hay caché."""
+    global _geocodificador
+    with _lock_geocodificador:
+        if _geocodificador is None:
+            try:
+                _geocodificador = Geocodificador(CacheGeocodigos(), crear_backend())
+            except (OSError, sqlite3.Error) as e:
+                logger.warning('Sin caché de geocodificación (%s): %s', RUTA_CACHE_GEOCODIGOS, e)
+                return None
+        return _geocodificador
+
+
+def completar_coordenadas(df: pd.DataFrame, geo: Geocodificador | None = None) -> pd.DataFrame:
+    """Completa coordenadas con el geocodificador del proceso (o el indicado)."""
+    geo = geo or geocodificador()
+    return geo.completar(df) if geo is not None else df
@@ -0,0 +1,173 @@
+"""Dataset ordenado por "Fecha de llenar" con índices para filtrar sin máscaras completas.
+
+- Rango de fechas → dos búsquedas binarias (searchsorted) sobre las fechas ordenadas.
+- Empleado → categórico + posiciones de fila por empleado (ordenadas), recortadas
+  al rango de fechas también por búsqueda binaria.
+El resultado de un filtro solo por fechas es una rebanada contigua (iloc, sin copiar
+datos); con empleado se toman únicamente las filas seleccionadas. Para excluir
+posibles duplicados se descartan las posiciones marcadas (máscara precalculada).
+
+Para la tabla de detalle paginada, además (ambos se construyen al primer uso):
+- Búsqueda de texto → por columna, códigos de fila + valores únicos en minúsculas y
+  sin tildes; se busca solo en los únicos y el resultado se expande por código.
+- Orden por columna → rango global de cada fila en esa columna; ordenar una
+  selección es ordenar enteros.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .config import COLUMNAS_BUSQUEDA
+
+
+def _a_ns(valor) -> np.int64:
+    return np.int64(pd.Timestamp(valor).as_unit('ns').value)
+
+
+def normalizar_texto(valores: pd.Series) -> pd.Series:
+    """Minúsculas y sin tildes, para comparar búsquedas ('Gómez' ~ 'gomez')."""
+    return (valores.astype('str').str.lower().str.normalize('NFKD')
+            .str.replace('[\u0300-\u036f]', '', regex=True))
+
+
+def largo(sel: slice | np.ndarray) -> int:
+    return sel.stop - sel.start if isinstance(sel, slice) else len(sel)
+
+
+class DatasetIndexado:
+    """Vista ordenada e indexada de un dataset; se construye una vez por versión de datos."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.tiene_fecha = 'Fecha de llenar' in df.columns
+        if self.tiene_fecha:
+            # NaT al final: las búsquedas solo miran el prefijo con fecha válida
+            df = df.sort_values('Fecha de llenar', kind='stable', na_position='last')
+            fechas = df['Fecha de llenar'].to_numpy(dtype='datetime64[ns]')
+            self.n_validas = int((~np.isnat(fechas)).sum())
+            self.fechas_ns = fechas[:self.n_validas].view(np.int64)
+        else:
+            self.n_validas = len(df)
+            self.fechas_ns = None
+
+        self.posiciones_empleado: dict = {}
+        if 'Empleado' in df.columns:
+            empleado = df['Empleado'].astype('category')
+            df = df.assign(Empleado=empleado)
+            codigos = empleado.cat.codes.to_numpy()
+            orden = np.argsort(codigos, kind='stable')
+            cortes = np.searchsorted(codigos[orden], np.arange(len(empleado.cat.categories) + 1))
+            self.posiciones_empleado = {
+                nombre: orden[cortes[k]:cortes[k + 1]]
+                for k, nombre in enumerate(empleado.cat.categories)
+            }
+        self.df = df
+        self.duplicado = df['Duplicado'].to_numpy(dtype=bool) if 'Duplicado' in df.columns else None
+        self._lock = threading.Lock()
+        self._busqueda: list | None = None
+        self._rangos: dict = {}
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    @property
+    def fecha_min(self):
+        return pd.Timestamp(self.fechas_ns[0]) if self.n_validas and self.tiene_fecha else None
+
+    @property
+    def fecha_max(self):
+        return pd.Timestamp(self.fechas_ns[-1]) if self.n_validas and self.tiene_fecha else None
+
+    def empleados(self) -> list:
+        """Empleados con al menos una fila (nombres no vacíos), ordenados."""
+        return sorted(e for e, pos in self.posiciones_empleado.items() if len(pos) and str(e).strip() != '')
+
+    def rango(self, fecha_inicio, fecha_fin) -> tuple[int, int]:
+        """Posiciones [lo, hi) de las filas con fecha_inicio <= fecha <= fecha_fin."""
+        if not self.tiene_fecha:
+            return 0, len(self.df)
+        lo = int(np.searchsorted(self.fechas_ns, _a_ns(fecha_inicio), side='left'))
+        hi = int(np.searchsorted(self.fechas_ns, _a_ns(fecha_fin), side='right'))
+        return lo, max(lo, hi)
+
+    def posiciones(self, fecha_inicio, fecha_fin, empleado: str | None = None,
+                   sin_duplicados: bool = False) -> slice | np.ndarray:
+        """Filas que cumplen los filtros: slice si es contiguo, arreglo de posiciones si no."""
+        lo, hi = self.rango(fecha_inicio, fecha_fin)
+        if empleado is None:
+            sel = slice(lo, hi)
+        else:
+            pos = self.posiciones_empleado.get(empleado)
+            if pos is None:
+                return np.empty(0, dtype=np.intp)
+            a, b = np.searchsorted(pos, (lo, hi), side='left')
+            sel = pos[a:b]
+        if sin_duplicados and self.duplicado is not None and self.duplicado[sel].any():
+            if isinstance(sel, slice):
+                return lo + np.flatnonzero(~self.duplicado[sel])
+            return sel[~self.duplicado[sel]]
+        return sel
+
+    def filtrar(self, fecha_inicio, fecha_fin, empleado: str | None = None,
+                sin_duplicados: bool = False) -> pd.DataFrame:
+        """DataFrame filtrado: rebanada sin copia (solo fechas) o filas tomadas (con empleado)."""
+        sel = self.posiciones(fecha_inicio, fecha_fin, empleado, sin_duplicados)
+        if isinstance(sel, slice):
+            return self.df.iloc[sel]
+        return self.df.take(sel)
+
+    # ------------------------------
+    # Tabla de detalle: búsqueda, orden y páginas
+    # ------------------------------
+    def _indice_busqueda(self) -> list:
+        """[(códigos por fila, únicos normalizados)] de cada columna de búsqueda."""
+        with self._lock:
+            if self._busqueda is None:
+                self._busqueda = []
+                for col in COLUMNAS_BUSQUEDA:
+                    if col in self.df.columns:
+                        codigos, unicos = pd.factorize(self.df[col])
+                        self._busqueda.append((codigos, normalizar_texto(pd.Series(unicos))))
+            return self._busqueda
+
+    def _rango_orden(self, columna: str) -> np.ndarray:
+        """Posición de cada fila en el orden global por `columna` (vacíos al final)."""
+        with self._lock:
+            if columna not in self._rangos:
+                orden = (self.df[columna].reset_index(drop=True)
+                         .sort_values(kind='stable', na_position='last').index.to_numpy())
+                rango = np.empty(len(orden), dtype=np.int64)
+                rango[orden] = np.arange(len(orden))
+                self._rangos[columna] = rango
+            return self._rangos[columna]
+
+    def seleccion(self, sel: slice | np.ndarray, busqueda: str = '', orden: str | None = None,
+                  descendente: bool = False) -> slice | np.ndarray:
+        """Filas de `sel` que contienen `busqueda`, en el orden pedido.
+
+        Sin búsqueda y ordenando por fecha (el orden del dataset) el resultado
+        sigue siendo un slice: no se materializan posiciones.
+        """
+        texto = normalizar_texto(pd.Series([busqueda.strip()])).iloc[0] if busqueda.strip() else ''
+        por_fecha = orden in (None, 'Fecha de llenar') or orden not in self.df.columns
+        if not texto and por_fecha and isinstance(sel, slice) and not descendente:
+            return sel
+
+        pos = np.arange(sel.start, sel.stop) if isinstance(sel, slice) else sel
+        if texto:
+            coincide = np.zeros(len(pos), dtype=bool)
+            for codigos, unicos in self._indice_busqueda():
+                # Último elemento False: el código -1 (vacío) nunca coincide
+                aciertos = np.append(unicos.str.contains(texto, regex=False).to_numpy(dtype=bool), False)
+                coincide |= aciertos[codigos[pos]]
+            pos = pos[coincide]
+        if not por_fecha:
+            pos = pos[np.argsort(self._rango_orden(orden)[pos], kind='stable')]
+        return pos[::-1] if descendente else pos
+
+    def pagina(self, sel: slice | np.ndarray, numero: int, tamano: int) -> pd.DataFrame:
+        """Filas de la página `numero` (desde 1) de una selección ya ordenada."""
+        ini = (max(numero, 1) - 1) * tamano
+        if isinstance(sel, slice):
+            return self.df.iloc[min(sel.start + ini, sel.stop):min(sel.start + ini + tamano, sel.stop)]
+        return self.df.take(sel[ini:ini + tamano])
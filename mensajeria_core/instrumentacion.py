@@ -0,0 +1,137 @@
+"""Tiempos por etapa de cada ejecución (rerun) de la app y perfilado opcional.
+
+Cada rerun abre una Corrida; cada etapa (carga, filtro, mapa, resumen, PDF...)
+se mide con `corrida.etapa(...)`, que registra tiempo de pared, filas de
+entrada/salida y bytes producidos. Al cerrar, la corrida va a un historial en
+memoria (para el panel de admin) y a un log JSON-lines rotativo en disco.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import pandas as pd
+
+from .config import LOG_TIEMPOS_COPIAS, LOG_TIEMPOS_MAX_MB
+from .sincronizacion import DIRECTORIO_CACHE
+
+RUTA_LOG_TIEMPOS = os.environ.get('MENSAJERIA_LOG_TIEMPOS', str(Path(DIRECTORIO_CACHE) / 'tiempos.jsonl'))
+
+
+class Corrida:
+    """Etapas medidas de una ejecución del script."""
+
+    def __init__(self, sesion: str | None = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.sesion = sesion
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self.etapas: list[dict] = []
+        self.segundos: float | None = None
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: int | None = None, **detalle):
+        """Mide el bloque; quien llama puede completar registro['filas_salida'] / ['bytes']."""
+        registro = {'etapa': nombre, 'filas_entrada': filas_entrada, 'filas_salida': None, 'bytes': None}
+        registro.update(detalle)
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = time.perf_counter() - t0
+            self.etapas.append(registro)
+
+    def cerrar(self) -> 'Corrida':
+        if self.segundos is None:
+            self.segundos = time.perf_counter() - self._t0
+        return self
+
+    def como_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'sesion': self.sesion,
+            'inicio': self.inicio,
+            'segundos': self.segundos,
+            'etapas': self.etapas,
+        }
+
+
+class Instrumentacion:
+    """Historial compartido de corridas + log JSON-lines rotativo."""
+
+    def __init__(self, ruta_log: str | None = RUTA_LOG_TIEMPOS, historial: int = 200,
+                 max_bytes: int = LOG_TIEMPOS_MAX_MB * 1024 * 1024, copias: int = LOG_TIEMPOS_COPIAS):
+        self.historial: deque = deque(maxlen=historial)
+        self._lock = threading.Lock()
+        self._log = None
+        if ruta_log:
+            try:
+                Path(ruta_log).parent.mkdir(parents=True, exist_ok=True)
+                self._log = RotatingFileHandler(ruta_log, maxBytes=max_bytes, backupCount=copias,
+                                                encoding='utf-8')
+                self._log.setFormatter(logging.Formatter('%(message)s'))
+            except OSError as e:
+                logging.getLogger(__name__).warning('Sin log de tiempos (%s): %s', ruta_log, e)
+        self.ruta_log = ruta_log if self._log else None
+
+    def registrar(self, corrida: Corrida) -> None:
+        datos = corrida.cerrar().como_dict()
+        with self._lock:
+            self.historial.append(datos)
+        if self._log is not None:
+            linea = json.dumps(datos, ensure_ascii=False, default=str)
+            # handle() (no emit()) toma el lock del handler: varias sesiones escriben y
+            # rotan el archivo a la vez sin entrelazar líneas
+            self._log.handle(logging.makeLogRecord({'msg': linea, 'levelno': logging.INFO}))
+
+    def por_etapa(self) -> pd.DataFrame:
+        """Etapa / n / p50 / p95 / máx (ms) sobre el historial en memoria."""
+        with self._lock:
+            filas = [(e['etapa'], e['segundos']) for c in self.historial for e in c['etapas']]
+        if not filas:
+            return pd.DataFrame(columns=['Etapa', 'n', 'p50 ms', 'p95 ms', 'máx ms'])
+        tiempos = pd.DataFrame(filas, columns=['Etapa', 'seg'])
+        agrupado = tiempos.groupby('Etapa', sort=False)['seg']
+        return pd.DataFrame({
+            'n': agrupado.size(),
+            'p50 ms': agrupado.median() * 1e3,
+            'p95 ms': agrupado.quantile(0.95) * 1e3,
+            'máx ms': agrupado.max() * 1e3,
+        }).reset_index()
+
+
+def tabla_corrida(corrida: dict) -> pd.DataFrame:
+    """Etapas de una corrida como tabla para mostrar."""
+    df = pd.DataFrame(corrida['etapas'])
+    if df.empty:
+        return df
+    df['ms'] = df.pop('segundos') * 1e3
+    return df
+
+
+# ------------------------------
+# Perfilado de una sola ejecución
+# ------------------------------
+def iniciar_perfil() -> cProfile.Profile:
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+
+def cerrar_perfil(perfil: cProfile.Profile, top: int = 40) -> tuple[str, bytes]:
+    """(texto con las `top` funciones por tiempo acumulado, .prof para snakeviz/pstats)."""
+    perfil.disable()
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats('cumulative').print_stats(top)
+    perfil.create_stats()
+    return salida.getvalue(), marshal.dumps(perfil.stats)
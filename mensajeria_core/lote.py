@@ -0,0 +1,126 @@
+"""Exportación por lote: un PDF por Empleado, generados en paralelo y empaquetados en un ZIP.
+
+Cada PDF se genera en un proceso aparte (ProcessPoolExecutor, un proceso por
+núcleo) con el mismo generar_pdf / ReportPDF del reporte individual. Los
+resultados se escriben en el ZIP a medida que terminan; si un colaborador
+falla, su error queda en ERRORES.txt dentro del ZIP y el resto sigue.
+"""
+import logging
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable
+
+import pandas as pd
+
+from .reporte import generar_pdf, pdf_a_bytes
+
+logger = logging.getLogger(__name__)
+
+# Rondas con un pool compartido antes de aislar cada PDF pendiente en su propio proceso
+RONDAS_POOL = 1
+
+
+@dataclass
+class ResultadoLote:
+    generados: list = field(default_factory=list)   # nombres de archivo dentro del ZIP
+    errores: dict = field(default_factory=dict)     # empleado → mensaje
+
+
+def nombre_archivo(empleado: str, fecha_inicio, fecha_fin) -> str:
+    base = re.sub(r'[^\w\-]+', '_', str(empleado), flags=re.UNICODE).strip('_') or 'sin_nombre'
+    return f"reporte_{base}_{fecha_inicio.strftime('%Y%m%d')}_{fecha_fin.strftime('%Y%m%d')}.pdf"
+
+
+def _renderizar(empleado: str, df: pd.DataFrame, fecha_inicio, fecha_fin,
+                resumen: pd.DataFrame | None) -> bytes:
+    """Tarea del proceso hijo: un PDF completo como bytes."""
+    return pdf_a_bytes(generar_pdf(df, fecha_inicio, fecha_fin, empleado, resumen=resumen))
+
+
+def _ronda_pool(empleados: list, pendientes: dict, procesos: int, fecha_inicio, fecha_fin,
+                resumenes: dict, guardar) -> None:
+    """Genera `empleados` en un pool; quita de `pendientes` todo lo que terminó (bien o con error)."""
+    # spawn: el servidor de Streamlit tiene hilos vivos y hacer fork de él no es seguro
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futuros = {
+            pool.submit(_renderizar, emp, pendientes[emp], fecha_inicio, fecha_fin, resumenes.get(emp)): emp
+            for emp in empleados
+        }
+        for futuro in as_completed(futuros):
+            emp = futuros[futuro]
+            try:
+                data = futuro.result()
+            except BrokenProcessPool:
+                continue  # queda pendiente para la siguiente ronda
+            except Exception as e:
+                guardar(emp, None, e)
+            else:
+                guardar(emp, data, None)
+            del pendientes[emp]
+
+
+def exportar_por_empleado(df: pd.DataFrame, fecha_inicio, fecha_fin, destino: BinaryIO,
+                          resumenes: dict | None = None, procesos: int | None = None,
+                          progreso: Callable[[int, int, str, bool], None] | None = None) -> ResultadoLote:
+    """Escribe en `destino` un ZIP con un PDF por empleado de df (ya filtrado por fechas).
+
+    resumenes: empleado → CuboDiario.resumen_por_dia, para los subtotales (opcional).
+    progreso(hechos, total, empleado, ok) se llama en el proceso actual al terminar cada uno.
+    """
+    grupos = [(str(emp), sub) for emp, sub in df.groupby('Empleado', observed=True, sort=True)
+              if str(emp).strip() != '']
+    resumenes = resumenes or {}
+    resultado = ResultadoLote()
+    total = len(grupos)
+    usados: set = set()
+
+    # Los PDF ya van comprimidos por dentro: el ZIP solo los almacena
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as zf:
+        def _guardar(empleado: str, data: bytes | None, error: Exception | None) -> None:
+            if error is None:
+                nombre = nombre_archivo(empleado, fecha_inicio, fecha_fin)
+                while nombre in usados:  # dos empleados que se sanitizan igual
+                    nombre = nombre.replace('.pdf', '_.pdf')
+                usados.add(nombre)
+                zf.writestr(nombre, data)
+                resultado.generados.append(nombre)
+            else:
+                logger.warning('PDF de %s falló: %s', empleado, error)
+                resultado.errores[empleado] = f'{type(error).__name__}: {error}'
+            if progreso:
+                progreso(len(resultado.generados) + len(resultado.errores), total, empleado, error is None)
+
+        pendientes = dict(grupos)
+        procesos = min(procesos or os.cpu_count() or 1, max(len(grupos), 1))
+        try:
+            # Si un proceso muere (p.ej. sin memoria) el pool entero se rompe: lo que quedó
+            # pendiente se reintenta en un pool nuevo y, al final, cada uno en su propio proceso
+            for ronda in range(RONDAS_POOL + 1):
+                if not pendientes:
+                    break
+                aislado = ronda == RONDAS_POOL
+                lotes = [[emp] for emp in pendientes] if aislado else [list(pendientes)]
+                for empleados in lotes:
+                    _ronda_pool(empleados, pendientes, 1 if aislado else procesos,
+                                fecha_inicio, fecha_fin, resumenes, _guardar)
+        except OSError as e:
+            # Sin soporte de procesos en este entorno: se generan aquí mismo, en serie
+            logger.warning('No se pudo crear el pool de procesos (%s); %d PDF en serie', e, len(pendientes))
+            for emp in list(pendientes):
+                try:
+                    data = _renderizar(emp, pendientes.pop(emp), fecha_inicio, fecha_fin, resumenes.get(emp))
+                except Exception as err:
+                    _guardar(emp, None, err)
+                else:
+                    _guardar(emp, data, None)
+        for emp in list(pendientes):
+            _guardar(emp, None, RuntimeError('el proceso que generaba el PDF terminó inesperadamente'))
+
+        if resultado.errores:
+            zf.writestr('ERRORES.txt', '\n'.join(f'{emp}: {msg}' for emp, msg in resultado.errores.items()))
+    return resultado
@@ -0,0 +1,369 @@
+"""Mapa Folium de entregas.
+
+Modos de dibujo de las entregas:
+- 'marcadores': un folium.Marker con su Popup HTML por entrega (pocos puntos).
+- 'capa': todos los puntos en una sola capa agrupada (MarkerCluster) con los
+  datos como JSON columnar; color y popup se arman en el navegador.
+- 'densidad': celdas hexagonales/cuadradas agregadas en el servidor con conteo
+  y monto, separadas dentro/fuera del cuadrante, más un mapa de calor.
+Con modo='puntos' se pasa a 'capa' por encima de UMBRAL_MARCADORES puntos;
+con modo='auto', además, a 'densidad' por encima de UMBRAL_DENSIDAD.
+Los posibles duplicados (columna 'Duplicado') se dibujan en naranja con su
+motivo en el popup; en 'densidad' van en una capa de puntos aparte.
+Con rutas=True se agrega una capa con el recorrido diario de cada empleado
+(polilíneas, los MAX_RUTAS_MAPA más recientes; ver rutas.py).
+"""
+import json
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.colormap import LinearColormap
+from branca.element import Element
+from folium.plugins import HeatMap, MarkerCluster
+
+from .config import CUADRANTE_COORDS, TAMANO_CELDA_M, UMBRAL_DENSIDAD, UMBRAL_MARCADORES
+from .densidad import agregar_celdas, esquinas_celdas
+from .rutas import lineas_ruta
+from .zonas import _bounds_from_coords
+
+# Nivel de tarifa → (color, icono, tooltip); índice 2 = sin clasificación,
+# índice 3 = posible duplicado (tiene prioridad sobre la tarifa)
+_NIVELES = [
+    ('green', 'ok-sign', 'Dentro cuadrante ($25)'),
+    ('red', 'remove-sign', 'Fuera cuadrante ($75)'),
+    ('gray', 'question-sign', 'Sin clasificación'),
+    ('orange', 'warning-sign', 'Posible duplicado'),
+]
+NIVEL_DUPLICADO = 3
+
+# Un color por empleado para las polilíneas de recorrido
+_COLORES_RUTA = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+                 '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+
+# Script de la capa rápida: datos columnares + diccionarios para textos repetidos.
+# Los marcadores y sus popups se crean en el navegador.
+_SCRIPT_CAPA = """
+(function () {
+    var d = %(datos)s;
+    var colores = %(colores)s, tips = %(tips)s;
+    function esc(v) {
+        return String(v == null ? 'N/A' : v).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+    function dos(n) { return (n < 10 ? '0' : '') + n; }
+    function fecha(min) {
+        if (min == null) { return 'N/A'; }
+        var f = new Date(min * 60000);
+        return dos(f.getUTCDate()) + '/' + dos(f.getUTCMonth() + 1) + '/' + f.getUTCFullYear()
+            + ' ' + dos(f.getUTCHours()) + ':' + dos(f.getUTCMinutes());
+    }
+    function popup(i) {
+        return "<div style='width:260px;'>"
+            + "<h4 style='margin:0 0 6px 0;'>Detalle de Entrega</h4>"
+            + "<p style='margin:0;'><b>Colaborador:</b> " + esc(d.empleados[d.empleado[i]]) + "</p>"
+            + "<p style='margin:0;'><b>Cliente:</b> " + esc(d.clientes[d.cliente[i]]) + "</p>"
+            + "<p style='margin:0;'><b>Pago:</b> $" + esc(d.pago[i]) + "</p>"
+            + "<p style='margin:0;'><b>Fecha:</b> " + fecha(d.fecha[i]) + "</p>"
+            + "<p style='margin:0;'><b>Dirección:</b> " + esc(d.direccion[i]) + "...</p>"
+            + (d.sospechas[d.sospecha[i]] == null ? ""
+               : "<p style='margin:0;color:#c60;'><b>Posible duplicado:</b> " + esc(d.sospechas[d.sospecha[i]]) + "</p>")
+            + "</div>";
+    }
+    var marcadores = new Array(d.lat.length);
+    for (var i = 0; i < d.lat.length; i++) {
+        var n = d.nivel[i];
+        var mk = L.circleMarker([d.lat[i], d.lon[i]], {
+            radius: 6, color: colores[n], weight: 1, fillColor: colores[n], fillOpacity: 0.8
+        });
+        mk.bindTooltip(tips[n]);
+        mk.bindPopup(popup.bind(null, i), {maxWidth: 320});
+        marcadores[i] = mk;
+    }
+    %(cluster)s.addLayers(marcadores);
+})();
+"""
+
+
+class _JSCrudo(Element):
+    """Script ya armado que se emite tal cual, sin pasar por jinja (payload grande)."""
+
+    def __init__(self, codigo: str):
+        super().__init__()
+        self.codigo = codigo
+
+    def render(self, **kwargs) -> str:
+        return self.codigo
+
+
+class CapaEntregas(MarkerCluster):
+    """Capa agrupada con todas las entregas serializadas una sola vez como JSON columnar."""
+
+    def __init__(self, datos: dict, name: str = 'Entregas', **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.datos = datos
+
+    def render(self, **kwargs):
+        super().render(**kwargs)
+        # '</' escapado para que ningún texto pueda cerrar el <script>
+        datos_json = json.dumps(self.datos, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        codigo = _SCRIPT_CAPA % {
+            'datos': datos_json,
+            'colores': json.dumps([n[0] for n in _NIVELES]),
+            'tips': json.dumps([n[2] for n in _NIVELES], ensure_ascii=False),
+            'cluster': self.get_name(),
+        }
+        self.get_root().script.add_child(_JSCrudo(codigo), name=self.get_name() + '_datos')
+
+
+def _niveles_pago(dfc: pd.DataFrame) -> np.ndarray:
+    """0 = $25, 1 = $75, 2 = sin clasificación, 3 = posible duplicado (vectorizado)."""
+    if 'Pago' not in dfc.columns:
+        niveles = np.full(len(dfc), 2, dtype=np.int8)
+    else:
+        pago = dfc['Pago'].to_numpy(dtype=np.float64, na_value=np.nan)
+        niveles = np.select([pago == 25, pago == 75], [0, 1], default=2).astype(np.int8)
+    if 'Duplicado' in dfc.columns:
+        niveles[dfc['Duplicado'].to_numpy(dtype=bool)] = NIVEL_DUPLICADO
+    return niveles
+
+
+def _diccionario(dfc: pd.DataFrame, col: str) -> tuple[list, list]:
+    """Codifica una columna de texto repetitivo como (códigos, valores únicos)."""
+    if col not in dfc.columns:
+        return [0] * len(dfc), ['N/A']
+    codigos, unicos = pd.factorize(dfc[col], use_na_sentinel=False)
+    valores = [None if pd.isna(v) else str(v) for v in unicos]
+    return codigos.tolist(), valores
+
+
+def _linea_sospecha(motivo) -> str:
+    if motivo is None or pd.isna(motivo):
+        return ''
+    return f"<p style='margin:0;color:#c60;'><b>Posible duplicado:</b> {motivo}</p>"
+
+
+def _agregar_marcadores(m: folium.Map, dfc: pd.DataFrame) -> None:
+    """Un marcador con popup HTML generado en Python por cada entrega."""
+    for row, nivel in zip(dfc.to_dict('records'), _niveles_pago(dfc)):
+        color, icono, tip = _NIVELES[nivel]
+
+        fecha_val = row.get('Fecha de llenar', pd.NaT)
+        fecha_str = fecha_val.strftime('%d/%m/%Y %H:%M') if pd.notna(fecha_val) else 'N/A'
+
+        popup_html = f"""
+        <div style='width:260px;'>
+            <h4 style='margin:0 0 6px 0;'>Detalle de Entrega</h4>
+            <p style='margin:0;'><b>Colaborador:</b> {row.get('Empleado', 'N/A')}</p>
+            <p style='margin:0;'><b>Cliente:</b> {row.get('Nombre del cliente (usuario/codigo)', 'N/A')}</p>
+            <p style='margin:0;'><b>Pago:</b> ${row.get('Pago', 'N/A')}</p>
+            <p style='margin:0;'><b>Fecha:</b> {fecha_str}</p>
+            <p style='margin:0;'><b>Dirección:</b> {str(row.get('Dirección de envío', 'N/A'))[:60]}...</p>
+            {_linea_sospecha(row.get('Sospecha'))}
+        </div>
+        """
+
+        folium.Marker(
+            location=[row['Latitud'], row['Longitud']],
+            popup=folium.Popup(popup_html, max_width=320),
+            tooltip=tip,
+            icon=folium.Icon(color=color, icon=icono, prefix='glyphicon'),
+        ).add_to(m)
+
+
+def _agregar_capa_rapida(m: folium.Map, dfc: pd.DataFrame) -> None:
+    """Todos los puntos en una sola capa agrupada; popups construidos en el cliente."""
+    n = len(dfc)
+    if 'Fecha de llenar' in dfc.columns:
+        fechas = dfc['Fecha de llenar'].to_numpy(dtype='datetime64[m]')
+        minutos = fechas.astype(np.int64).astype(object)
+        minutos[np.isnat(fechas)] = None
+        minutos = minutos.tolist()
+    else:
+        minutos = [None] * n
+    if 'Dirección de envío' in dfc.columns:
+        direcciones = dfc['Dirección de envío'].astype('string').str.slice(0, 60).fillna('N/A').tolist()
+    else:
+        direcciones = ['N/A'] * n
+    if 'Pago' in dfc.columns:
+        pago = dfc['Pago'].to_numpy(dtype=np.float64, na_value=np.nan)
+        pagos = np.round(pago, 2).astype(object)
+        pagos[np.isnan(pago)] = None
+        pagos = pagos.tolist()
+    else:
+        pagos = [None] * n
+    empleado, empleados = _diccionario(dfc, 'Empleado')
+    cliente, clientes = _diccionario(dfc, 'Nombre del cliente (usuario/codigo)')
+    sospecha, sospechas = _diccionario(dfc, 'Sospecha')
+    if 'Sospecha' not in dfc.columns:
+        sospechas = [None]
+
+    CapaEntregas({
+        'lat': np.round(dfc['Latitud'].to_numpy(dtype=np.float64), 6).tolist(),
+        'lon': np.round(dfc['Longitud'].to_numpy(dtype=np.float64), 6).tolist(),
+        'nivel': _niveles_pago(dfc).tolist(),
+        'empleado': empleado, 'empleados': empleados,
+        'cliente': cliente, 'clientes': clientes,
+        'pago': pagos,
+        'fecha': minutos,
+        'direccion': direcciones,
+        'sospecha': sospecha, 'sospechas': sospechas,
+    }, disableClusteringAtZoom=17, chunkedLoading=True).add_to(m)
+
+
+def _agregar_duplicados(m: folium.Map, dfc: pd.DataFrame, maximo: int = UMBRAL_MARCADORES) -> None:
+    """Capa con los posibles duplicados como puntos (para el modo densidad, que agrega el resto)."""
+    if 'Duplicado' not in dfc.columns:
+        return
+    dup = dfc[dfc['Duplicado'].to_numpy(dtype=bool)]
+    if dup.empty:
+        return
+    capa = folium.FeatureGroup(name=f'Posibles duplicados ({len(dup)})')
+    motivos = dup['Sospecha'].astype('string').fillna('') if 'Sospecha' in dup.columns else [''] * len(dup)
+    for lat, lon, motivo in zip(dup['Latitud'].to_numpy()[:maximo], dup['Longitud'].to_numpy()[:maximo],
+                                list(motivos)[:maximo]):
+        folium.CircleMarker(
+            location=[float(lat), float(lon)], radius=5, color='orange', weight=1,
+            fill=True, fill_color='orange', fill_opacity=0.9,
+            tooltip=f'Posible duplicado: {motivo}' if motivo else 'Posible duplicado',
+        ).add_to(capa)
+    capa.add_to(m)
+
+
+def _agregar_rutas(m: folium.Map, dfc: pd.DataFrame) -> None:
+    """Recorrido de cada empleado por día, en orden de check-in."""
+    lineas = lineas_ruta(dfc)
+    if not lineas:
+        return
+    colores = {}
+    capa = folium.FeatureGroup(name=f'Recorridos ({len(lineas)})')
+    for linea in lineas:
+        color = colores.setdefault(linea['empleado'], _COLORES_RUTA[len(colores) % len(_COLORES_RUTA)])
+        folium.PolyLine(
+            linea['coords'], color=color, weight=3, opacity=0.7,
+            tooltip=f"{linea['empleado'] or 'N/A'} – {linea['fecha']:%d/%m/%Y}: "
+                    f"{linea['km']:,.1f} km, {len(linea['coords'])} puntos",
+        ).add_to(capa)
+    capa.add_to(m)
+
+
+def _agregar_densidad(m: folium.Map, dfc: pd.DataFrame, tam_m: float, forma: str) -> None:
+    """Celdas con conteo y monto (capas dentro/fuera del cuadrante) + mapa de calor opcional."""
+    celdas = agregar_celdas(dfc, tam_m=tam_m, forma=forma)
+    esquinas = np.round(esquinas_celdas(celdas, tam_m=tam_m, forma=forma), 6)
+    cmap = LinearColormap(['#ffffb2', '#fd8d3c', '#bd0026'],
+                          vmin=1, vmax=max(int(celdas['entregas'].max()), 2),
+                          caption='Entregas por celda')
+
+    for nombre, col_n, col_m in (('Dentro cuadrante', 'entregas_dentro', 'monto_dentro'),
+                                 ('Fuera cuadrante', 'entregas_fuera', 'monto_fuera')):
+        sel = np.flatnonzero(celdas[col_n].to_numpy() > 0)
+        if not len(sel):
+            continue
+        conteos = celdas[col_n].to_numpy()[sel].tolist()
+        montos = np.round(celdas[col_m].to_numpy()[sel], 2).tolist()
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Polygon', 'coordinates': [anillo + anillo[:1]]},
+                'properties': {'entregas': n, 'monto': f'${mt:,.2f}', 'color': cmap(n)},
+            }
+            for anillo, n, mt in zip(esquinas[sel].tolist(), conteos, montos)
+        ]
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name=f'{nombre} ({sum(conteos)})',
+            style_function=lambda f: {
+                'fillColor': f['properties']['color'], 'color': '#666',
+                'weight': 0.5, 'fillOpacity': 0.65,
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['entregas', 'monto'], aliases=['Entregas', 'Monto']),
+        ).add_to(m)
+
+    HeatMap(
+        celdas[['lat', 'lon', 'entregas']].to_numpy().tolist(),
+        name='Mapa de calor', show=False, radius=20, blur=15,
+    ).add_to(m)
+    cmap.add_to(m)
+
+
+def crear_mapa(df: pd.DataFrame, modo: str = 'auto', umbral: int = UMBRAL_MARCADORES,
+               umbral_densidad: int = UMBRAL_DENSIDAD, tam_celda_m: float = TAMANO_CELDA_M,
+               forma_celda: str = 'hex', rutas: bool = False):
+    """Construye un mapa Folium centrado en el GSD: ajusta vista a marcadores + polígono para evitar vista fuera de zona (p.ej., Isla Saona).
+
+    modo: 'auto' | 'puntos' | 'marcadores' | 'capa' | 'densidad' (ver docstring del módulo).
+    rutas: dibujar además el recorrido diario de cada empleado.
+    """
+    cols_coord_ok = {'Latitud', 'Longitud'}.issubset(set(df.columns))
+
+    # Coordenadas de marcadores válidos (si hay)
+    dfc = df.iloc[:0]
+    if not df.empty and cols_coord_ok:
+        dfc = df.dropna(subset=['Latitud', 'Longitud'])
+
+    # Centro por defecto: Gran Santo Domingo
+    center_default = [18.4861, -69.9312]
+    m = folium.Map(location=center_default, zoom_start=12, control_scale=True)
+
+    # Polígono del cuadrante (zona $25)
+    folium.Polygon(
+        locations=CUADRANTE_COORDS,
+        color='blue',
+        weight=2,
+        fill=True,
+        fill_color='blue',
+        fill_opacity=0.10,
+        popup='Cuadrante de Zona ($25)',
+        tooltip='Zona de $25',
+    ).add_to(m)
+
+    if modo == 'auto':
+        modo = 'densidad' if len(dfc) > umbral_densidad else 'puntos'
+    if modo == 'puntos':
+        modo = 'capa' if len(dfc) > umbral else 'marcadores'
+
+    # Marcadores (o celdas agregadas)
+    if len(dfc):
+        if modo == 'densidad':
+            _agregar_densidad(m, dfc, tam_celda_m, forma_celda)
+            _agregar_duplicados(m, dfc)
+        elif modo == 'capa':
+            _agregar_capa_rapida(m, dfc)
+        else:
+            _agregar_marcadores(m, dfc)
+        if rutas:
+            _agregar_rutas(m, dfc)
+
+    # Leyenda simple (HTML)
+    legend_html = """
+    <div style="
+        position: fixed;
+        bottom: 30px; left: 30px;
+        z-index: 9999; background: white;
+        padding: 8px 10px; border: 1px solid #ccc; border-radius: 6px; font-size: 13px;">
+      <b>Leyenda</b><br>
+      <span style="display:inline-block;width:10px;height:10px;background:green;margin-right:6px;"></span> $25 (dentro cuadrante)<br>
+      <span style="display:inline-block;width:10px;height:10px;background:red;margin-right:6px;"></span> $75 (fuera cuadrante)
+      %(duplicados)s
+    </div>
+    """
+    hay_duplicados = 'Duplicado' in dfc.columns and bool(dfc['Duplicado'].any())
+    legend_html = legend_html % {'duplicados': (
+        '<br><span style="display:inline-block;width:10px;height:10px;background:orange;margin-right:6px;">'
+        '</span> Posible duplicado' if hay_duplicados else '')}
+    if modo != 'densidad':
+        m.get_root().html.add_child(Element(legend_html))
+
+    # Ajustar vista para que se vea el cuadrante (y marcadores si hay)
+    all_coords = CUADRANTE_COORDS.copy()
+    if len(dfc):
+        all_coords.append([float(dfc['Latitud'].min()), float(dfc['Longitud'].min())])
+        all_coords.append([float(dfc['Latitud'].max()), float(dfc['Longitud'].max())])
+    bounds = _bounds_from_coords(all_coords)
+    if bounds:
+        m.fit_bounds(bounds, padding=(15, 15))
+
+    folium.LayerControl().add_to(m)
+    return m
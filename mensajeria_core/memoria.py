@@ -0,0 +1,50 @@
+"""Contabilidad de memoria por etapa del pipeline (carga → índice → filtro → vista).
+
+Usa memory_usage(deep=True), que recorre los str de Python: es caro con
+millones de filas, por eso solo se calcula a pedido desde el panel de admin.
+"""
+import numpy as np
+import pandas as pd
+
+from .cache import tamano_aprox
+
+
+def bytes_de(valor) -> int:
+    """Bytes profundos de un DataFrame/Series/arreglo o de un objeto con arreglos numpy (p.ej. el cubo)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series, str, bytes, bytearray)):
+        return tamano_aprox(valor)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    arreglos = [v for v in vars(valor).values() if isinstance(v, np.ndarray)] if hasattr(valor, '__dict__') else []
+    if arreglos:
+        return int(sum(a.nbytes for a in arreglos))
+    return tamano_aprox(valor)
+
+
+def memoria_por_columna(df: pd.DataFrame) -> pd.DataFrame:
+    """Columna / dtype / MB / bytes por fila, de mayor a menor."""
+    uso = df.memory_usage(deep=True, index=False)
+    filas = max(len(df), 1)
+    return pd.DataFrame({
+        'Columna': uso.index,
+        'Tipo': [str(df[c].dtype) for c in uso.index],
+        'MB': uso.to_numpy() / 1e6,
+        'Bytes/fila': uso.to_numpy() / filas,
+    }).sort_values('MB', ascending=False, ignore_index=True)
+
+
+def informe_memoria(etapas: dict) -> pd.DataFrame:
+    """Una fila por etapa: filas (si aplica), MB y bytes por fila."""
+    registros = []
+    for nombre, valor in etapas.items():
+        if valor is None:
+            continue
+        total = bytes_de(valor)
+        filas = len(valor) if isinstance(valor, (pd.DataFrame, pd.Series)) else None
+        registros.append({
+            'Etapa': nombre,
+            'Filas': filas,
+            'MB': total / 1e6,
+            'Bytes/fila': total / filas if filas else None,
+        })
+    return pd.DataFrame(registros, columns=['Etapa', 'Filas', 'MB', 'Bytes/fila'])
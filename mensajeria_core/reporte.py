@@ -0,0 +1,236 @@
+"""Reporte PDF: tabla por día + subtotales diarios + total general.
+
+Las filas de la tabla no pasan por FPDF.cell (que maqueta cada celda con
+fragmentos, copias de estado gráfico y medición de texto). Todos los textos se
+preformatean, truncan y escapan por columna en pasadas vectorizadas; los saltos
+de página se calculan antes de dibujar y cada página recibe un solo bloque de
+operadores PDF con las mismas celdas que produciría cell(w, 7, txt, 1); lo mismo
+para el encabezado de la tabla en cada página. Títulos y subtotales (pocos por
+página) siguen usando cell().
+"""
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+from .config import COLUMNAS_TABLA
+
+# Ajustes de ancho (suma aprox 190)
+ANCHOS_COLUMNA = {
+    'Empleado': 25,
+    'Tipo': 16,
+    'Dirección de envío': 48,
+    'Fecha de llenar': 26,
+    'Nombre del cliente (usuario/codigo)': 35,
+    'Nombre de quien recibe (maria/secretaria, juan/asistente, miguel ruiz/doctor)': 40,
+    'Pago': 16,
+}
+ANCHO_POR_DEFECTO = 28
+ALTO_FILA = 7
+TAMANO_FUENTE_FILA = 7
+MAX_CARACTERES = 45
+# Tras una fila cuyo borde inferior pase de este y (mm) se abre página nueva
+LIMITE_Y = 265
+
+
+class ReportPDF(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, 'Reporte de Mensajería - IDEMEFA', 0, 1, 'C')
+        self.ln(2)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    def filas_tabla(self, textos: list[tuple[str, ...]], widths: list[float], y: float,
+                    alto: float = ALTO_FILA, estilo: str = '', tamano: float = TAMANO_FUENTE_FILA) -> float:
+        """Dibuja filas ya escapadas desde y (mm) en un solo bloque; devuelve el y siguiente.
+
+        No verifica saltos de página: quien llama reparte las filas por página.
+        """
+        self.set_font('Arial', estilo, tamano)
+        # set_font no escribe el operador Tf: lo emite (y registra la fuente en los
+        # recursos de la página) el primer texto de FPDF, igual que hace FPDF.text()
+        if not self.current_font_is_set_on_page:
+            self._out(self._set_font_for_page(self.current_font, self.font_size_pt))
+        k, alto_pt = self.k, alto * self.k
+        x = self.l_margin + np.concatenate([[0.0], np.cumsum(widths)[:-1]])
+        celdas = [(f'{xi * k:.2f}', f'{w * k:.2f} {-alto_pt:.2f}', f'{(xi + self.c_margin) * k:.2f}')
+                  for xi, w in zip(x, widths)]
+        # Línea base del texto: centro de la celda + 0.3 del tamaño de fuente (igual que cell)
+        ajuste = 0.5 * alto + 0.3 * self.font_size
+        lineas = []
+        for i, fila in enumerate(textos):
+            y_fila = y + i * alto
+            y_pt = f'{(self.h - y_fila) * k:.2f}'
+            y_txt = f'{(self.h - y_fila - ajuste) * k:.2f}'
+            for (x_pt, caja, x_txt), txt in zip(celdas, fila):
+                lineas.append(f'{x_pt} {y_pt} {caja} re S BT {x_txt} {y_txt} Td ({txt}) Tj ET')
+        if lineas:
+            self._out('\n'.join(lineas))
+        y_fin = y + len(textos) * alto
+        self.set_xy(self.l_margin, y_fin)
+        return y_fin
+
+
+def _escapar(txt: str) -> str:
+    """Texto apto para un string literal de PDF con fuente base (latin-1)."""
+    txt = txt.encode('latin-1', errors='replace').decode('latin-1')
+    return (txt.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            .replace('\r', ' ').replace('\n', ' '))
+
+
+def _texto_celda(valor) -> str:
+    txt = str(valor)
+    if len(txt) > MAX_CARACTERES:
+        txt = txt[:MAX_CARACTERES] + '...'
+    return _escapar(txt)
+
+
+def _add_table_header(pdf: ReportPDF, headers, widths):
+    textos = tuple(_escapar((h[:28] + '...') if len(h) > 31 else h) for h in headers)
+    if pdf.will_page_break(8):  # mismo salto automático que haría cell()
+        pdf.add_page()
+    pdf.filas_tabla([textos], widths, pdf.get_y(), alto=8, estilo='B', tamano=8)
+
+
+def textos_columna(serie: pd.Series) -> np.ndarray:
+    """Texto de celda por fila (vacío si falta), truncado y escapado para PDF.
+
+    Cada valor distinto se formatea una sola vez (factorize + take); las fechas
+    se arman como día + hora:minuto, cada parte formateada por separado.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        minutos = serie.to_numpy(dtype='datetime64[m]')
+        ok = ~np.isnat(minutos)
+        dias = minutos.astype('datetime64[D]')
+        cod_dia, dias_u = pd.factorize(dias[ok])
+        cod_hm, hm_u = pd.factorize((minutos[ok] - dias[ok]).astype(np.int64))
+        txt_dia = pd.DatetimeIndex(dias_u).strftime('%d/%m/%Y').to_numpy(dtype=object)
+        txt_hm = np.array([f'{m // 60:02d}:{m % 60:02d}' for m in hm_u], dtype=object)
+        textos = np.full(len(serie), '', dtype=object)
+        textos[ok] = txt_dia[cod_dia] + ' ' + txt_hm[cod_hm]
+        return textos
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    # código -1 (faltante) → último elemento ''
+    textos = np.array([_texto_celda(v) for v in unicos] + [''], dtype=object)
+    return textos[codigos]
+
+
+def filas_por_pagina(y: float) -> int:
+    """Filas que caben desde y antes del salto (la que cruza LIMITE_Y se dibuja y luego salta)."""
+    return max(int(np.floor((LIMITE_Y - y) / ALTO_FILA)) + 1, 1)
+
+
+def generar_pdf(df_filtrado: pd.DataFrame, fecha_inicio: datetime, fecha_fin: datetime, colaborador: str,
+                resumen: pd.DataFrame | None = None) -> ReportPDF:
+    """PDF con la tabla por día. Si se pasa `resumen` (CuboDiario.resumen_por_dia), los subtotales salen de ahí."""
+    pdf = ReportPDF()
+    pdf.add_page()
+
+    # Encabezado de reporte
+    pdf.set_font('Arial', 'B', 13)
+    pdf.cell(0, 10, 'REPORTE DETALLADO (Solo tabla)', 0, 1, 'C')
+    pdf.ln(2)
+
+    pdf.set_font('Arial', '', 10)
+    periodo_txt = f"Período: {fecha_inicio.strftime('%d/%m/%Y')} - {fecha_fin.strftime('%d/%m/%Y')}"
+    colab_txt = f"Colaborador: {'Todos' if colaborador == 'Total' else colaborador}"
+    gen_txt = f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    for line in (periodo_txt, colab_txt, gen_txt):
+        pdf.cell(0, 7, line, 0, 1)
+    pdf.ln(4)
+
+    cols_presentes = [c for c in COLUMNAS_TABLA if c in df_filtrado.columns]
+    widths = [ANCHOS_COLUMNA.get(c, ANCHO_POR_DEFECTO) for c in cols_presentes]
+
+    # Ordenar por fecha para subtotales (el índice ya lo entrega ordenado: sin copia)
+    if 'Fecha de llenar' in df_filtrado.columns and not df_filtrado['Fecha de llenar'].is_monotonic_increasing:
+        df_filtrado = df_filtrado.sort_values('Fecha de llenar', kind='stable')
+
+    # Cortes por día sobre las fechas ordenadas (las filas sin fecha no entran al reporte)
+    if 'Fecha de llenar' in df_filtrado.columns:
+        dias = df_filtrado['Fecha de llenar'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        n_validas = int((~np.isnat(dias)).sum())
+        dias = dias[:n_validas]
+        inicios = np.flatnonzero(np.r_[True, dias[1:] != dias[:-1]]) if n_validas else np.empty(0, dtype=int)
+        cortes = np.r_[inicios, n_validas]
+    else:
+        dias, cortes = np.empty(0, dtype='datetime64[D]'), np.zeros(1, dtype=int)
+
+    # Textos de todas las celdas en pasadas por columna; filas como tuplas
+    filas = list(zip(*(textos_columna(df_filtrado[c].iloc[:cortes[-1]]) for c in cols_presentes)))
+    if 'Pago' in df_filtrado.columns:
+        pagos = df_filtrado['Pago'].iloc[:cortes[-1]].to_numpy(dtype=np.float64, na_value=np.nan)
+        pago_acum = np.r_[0.0, np.cumsum(np.nan_to_num(pagos))]
+    else:
+        pago_acum = np.zeros(cortes[-1] + 1)
+
+    subtotales = {}
+    if resumen is not None:
+        subtotales = dict(zip(resumen['Fecha'].dt.date,
+                              zip(resumen['Checkins'].tolist(), resumen['Monto_Total'].tolist())))
+
+    total_general = 0.0
+    total_checkins = 0
+    for ini, fin in zip(cortes[:-1], cortes[1:]):
+        fecha_dia = pd.Timestamp(dias[ini]).date()
+
+        pdf.set_font('Arial', 'B', 11)
+        pdf.cell(0, 8, f"Día: {fecha_dia.strftime('%d/%m/%Y')}", 0, 1)
+        _add_table_header(pdf, cols_presentes, widths)
+
+        # Filas del día repartidas en páginas según el espacio restante
+        pos = ini
+        while pos < fin:
+            if pdf.will_page_break(ALTO_FILA):  # salto automático que haría cell() (sin repetir encabezado)
+                pdf.add_page()
+            cupo = filas_por_pagina(pdf.get_y())
+            hasta = min(fin, pos + cupo)
+            pdf.filas_tabla(filas[pos:hasta], widths, pdf.get_y())
+            if hasta - pos == cupo:
+                pdf.add_page()
+                _add_table_header(pdf, cols_presentes, widths)
+            pos = hasta
+
+        # Subtotal del día
+        if fecha_dia in subtotales:
+            checkins_dia, monto_dia = subtotales[fecha_dia]
+        else:
+            monto_dia = float(pago_acum[fin] - pago_acum[ini])
+            checkins_dia = int(fin - ini)
+        total_general += float(monto_dia or 0)
+        total_checkins += int(checkins_dia)
+
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(sum(widths[:-2]), 8, 'Subtotal del día', 1)
+        pdf.cell(widths[-2], 8, str(checkins_dia), 1)
+        pdf.cell(widths[-1], 8, f"${monto_dia:,.2f}", 1)
+        pdf.ln(10)
+
+    # Totales generales
+    pdf.ln(2)
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, 'TOTAL GENERAL DEL PERIODO', 0, 1)
+
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(60, 8, 'Check-ins', 1)
+    pdf.cell(60, 8, 'Monto total', 1)
+    pdf.ln()
+
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(60, 8, str(total_checkins), 1)
+    pdf.cell(60, 8, f"${total_general:,.2f}", 1)
+
+    return pdf
+
+
+def pdf_a_bytes(pdf: FPDF) -> bytes:
+    """Serializa el PDF en memoria (sin archivo temporal)."""
+    buffer = io.BytesIO()
+    pdf.output(buffer)
+    return buffer.getvalue()
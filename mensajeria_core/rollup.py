@@ -0,0 +1,169 @@
+"""Cubo precalculado día × Empleado × nivel de tarifa → (entregas, monto).
+
+Se construye una vez por carga de datos y se extiende solo con las filas
+nuevas. Las métricas del resumen, los subtotales por día y los totales del PDF
+salen de rebanar el cubo (O(días × empleados)) en lugar de recorrer las filas.
+Los posibles duplicados (columna 'Duplicado', ver duplicados.py) se acumulan
+aparte para poder mostrarlos o descontarlos de los totales.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Nivel de tarifa por valor de Pago; el último nivel agrupa todo lo demás (incl. vacío)
+NIVELES_PAGO = (25.0, 75.0)
+N_NIVELES = len(NIVELES_PAGO) + 1
+
+
+def nivel_pago(pago: pd.Series) -> np.ndarray:
+    """Índice de nivel por fila: 0 = $25, 1 = $75, 2 = otro/sin pago."""
+    valores = pago.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.select([valores == v for v in NIVELES_PAGO], range(len(NIVELES_PAGO)),
+                     default=len(NIVELES_PAGO)).astype(np.intp)
+
+
+@dataclass
+class CuboDiario:
+    dias: np.ndarray        # datetime64[D], ordenado y sin repetidos
+    empleados: list         # etiquetas; None = sin empleado
+    conteo: np.ndarray      # int64  (días, empleados, niveles)
+    monto: np.ndarray       # float64 (días, empleados, niveles)
+    conteo_dup: np.ndarray  # igual que conteo/monto, solo filas marcadas como duplicado
+    monto_dup: np.ndarray
+    filas: int = 0          # filas del dataset ya incorporadas
+    base: str | None = None  # linaje del dataset (cambia si se re-parsea completo)
+    marcas: int = 0         # filas incorporadas marcadas como duplicado (con o sin fecha)
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame, filas: int | None = None) -> 'CuboDiario':
+        """Agrega las filas con fecha válida de df en una sola pasada de bincount."""
+        fechas = df['Fecha de llenar'].to_numpy(dtype='datetime64[ns]')
+        ok = ~np.isnat(fechas)
+        dias_fila = fechas[ok].astype('datetime64[D]')
+        dias, idx_dia = np.unique(dias_fila, return_inverse=True)
+
+        if 'Empleado' in df.columns:
+            idx_emp, etiquetas = pd.factorize(df['Empleado'][ok], use_na_sentinel=True)
+            empleados = list(etiquetas)
+            if (idx_emp < 0).any():
+                idx_emp = np.where(idx_emp < 0, len(empleados), idx_emp)
+                empleados.append(None)
+        else:
+            idx_emp, empleados = np.zeros(int(ok.sum()), dtype=np.intp), [None]
+
+        if 'Pago' in df.columns:
+            niveles = nivel_pago(df['Pago'][ok])
+            pago = np.nan_to_num(df['Pago'][ok].to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            niveles = np.full(int(ok.sum()), N_NIVELES - 1, dtype=np.intp)
+            pago = np.zeros(int(ok.sum()))
+
+        forma = (len(dias), len(empleados), N_NIVELES)
+        plano = np.ravel_multi_index((idx_dia, idx_emp, niveles), forma) if len(dias) else idx_dia
+        tam = int(np.prod(forma))
+        if 'Duplicado' in df.columns:
+            marcado = df['Duplicado'].to_numpy(dtype=bool)
+            dup = marcado[ok]
+        else:
+            marcado = dup = np.zeros(int(ok.sum()), dtype=bool)
+        return cls(
+            dias=dias,
+            empleados=empleados,
+            conteo=np.bincount(plano, minlength=tam).astype(np.int64).reshape(forma),
+            monto=np.bincount(plano, weights=pago, minlength=tam).reshape(forma),
+            conteo_dup=np.bincount(plano[dup], minlength=tam).astype(np.int64).reshape(forma),
+            monto_dup=np.bincount(plano[dup], weights=pago[dup], minlength=tam).reshape(forma),
+            filas=len(df) if filas is None else filas,
+            base=df.attrs.get('base'),
+            marcas=int(marcado.sum()),
+        )
+
+    def combinar(self, otro: 'CuboDiario') -> 'CuboDiario':
+        """Suma dos cubos alineando días y empleados."""
+        dias = np.union1d(self.dias, otro.dias)
+        empleados = list(self.empleados) + [e for e in otro.empleados if e not in self.empleados]
+        pos_emp = {e: i for i, e in enumerate(empleados)}
+        forma = (len(dias), len(empleados), N_NIVELES)
+        conteo, conteo_dup = np.zeros(forma, dtype=np.int64), np.zeros(forma, dtype=np.int64)
+        monto, monto_dup = np.zeros(forma, dtype=np.float64), np.zeros(forma, dtype=np.float64)
+        for cubo in (self, otro):
+            d = np.searchsorted(dias, cubo.dias)
+            e = np.array([pos_emp[x] for x in cubo.empleados], dtype=np.intp)
+            conteo[np.ix_(d, e)] += cubo.conteo
+            monto[np.ix_(d, e)] += cubo.monto
+            conteo_dup[np.ix_(d, e)] += cubo.conteo_dup
+            monto_dup[np.ix_(d, e)] += cubo.monto_dup
+        return CuboDiario(dias, empleados, conteo, monto, conteo_dup, monto_dup,
+                          filas=self.filas + otro.filas, base=self.base, marcas=self.marcas + otro.marcas)
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def _rebanar(self, arreglo: np.ndarray, lo: int, hi: int, empleado: str | None) -> np.ndarray:
+        if empleado is None:
+            return arreglo[lo:hi].sum(axis=1)
+        if empleado in self.empleados:
+            return arreglo[lo:hi, self.empleados.index(empleado)]
+        return np.zeros((hi - lo, N_NIVELES), dtype=arreglo.dtype)
+
+    def _limites(self, fecha_inicio, fecha_fin) -> tuple[int, int]:
+        ini = np.datetime64(pd.Timestamp(fecha_inicio).floor('D').date(), 'D')
+        fin = np.datetime64(pd.Timestamp(fecha_fin).floor('D').date(), 'D')
+        return (int(np.searchsorted(self.dias, ini, side='left')),
+                int(np.searchsorted(self.dias, fin, side='right')))
+
+    def seleccionar(self, fecha_inicio, fecha_fin, empleado: str | None = None,
+                    sin_duplicados: bool = False):
+        """(días, conteo[días, niveles], monto[días, niveles]) del rango, inclusive por día.
+
+        Con sin_duplicados=True se descuentan las filas marcadas como posible duplicado.
+        """
+        lo, hi = self._limites(fecha_inicio, fecha_fin)
+        conteo = self._rebanar(self.conteo, lo, hi, empleado)
+        monto = self._rebanar(self.monto, lo, hi, empleado)
+        if sin_duplicados:
+            conteo = conteo - self._rebanar(self.conteo_dup, lo, hi, empleado)
+            monto = monto - self._rebanar(self.monto_dup, lo, hi, empleado)
+        return self.dias[lo:hi], conteo, monto
+
+    def metricas(self, fecha_inicio, fecha_fin, empleado: str | None = None,
+                 sin_duplicados: bool = False) -> dict:
+        _, conteo, monto = self.seleccionar(fecha_inicio, fecha_fin, empleado, sin_duplicados)
+        lo, hi = self._limites(fecha_inicio, fecha_fin)
+        return {
+            'entregas': int(conteo.sum()),
+            'monto': float(monto.sum()),
+            'entregas_25': int(conteo[:, 0].sum()),
+            'entregas_75': int(conteo[:, 1].sum()),
+            'duplicados': int(self._rebanar(self.conteo_dup, lo, hi, empleado).sum()),
+            'monto_duplicados': float(self._rebanar(self.monto_dup, lo, hi, empleado).sum()),
+        }
+
+    def resumen_por_dia(self, fecha_inicio, fecha_fin, empleado: str | None = None,
+                        sin_duplicados: bool = False) -> pd.DataFrame:
+        """Tabla Fecha / Checkins / Monto_Total solo con los días que tienen entregas."""
+        dias, conteo, monto = self.seleccionar(fecha_inicio, fecha_fin, empleado, sin_duplicados)
+        checkins = conteo.sum(axis=1)
+        con_datos = checkins > 0
+        return pd.DataFrame({
+            'Fecha': pd.to_datetime(dias[con_datos]),
+            'Checkins': checkins[con_datos],
+            'Monto_Total': monto.sum(axis=1)[con_datos],
+        })
+
+
+def actualizar_cubo(cubo: CuboDiario | None, df: pd.DataFrame) -> CuboDiario:
+    """Reusa el cubo si df es el mismo linaje con filas agregadas al final; si no, lo reconstruye.
+
+    Si las filas nuevas cambiaron la marca de duplicado de filas ya incorporadas
+    (p. ej. llegó un check-in con hora anterior), también se reconstruye.
+    """
+    base = df.attrs.get('base')
+    if cubo is not None and base is not None and cubo.base == base and cubo.filas <= len(df):
+        if 'Duplicado' in df.columns and int(df['Duplicado'].iloc[:cubo.filas].sum()) != cubo.marcas:
+            return CuboDiario.construir(df)
+        if cubo.filas == len(df):
+            return cubo
+        return cubo.combinar(CuboDiario.construir(df.iloc[cubo.filas:]))
+    return CuboDiario.construir(df)
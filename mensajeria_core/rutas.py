@@ -0,0 +1,143 @@
+"""Recorrido diario por colaborador: km entre entregas consecutivas y pausas.
+
+Las entregas se ordenan una sola vez por (Empleado, Fecha de llenar); cada día
+de cada empleado es un grupo contiguo. Los tramos son pares de filas vecinas
+del mismo grupo: distancia haversine (solo entre filas con coordenadas) y
+tiempo entre check-ins. Todo se agrega por grupo con bincount, sin recorrer
+filas en Python, así que sirve para el historial completo.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import MAX_RUTAS_MAPA, RUTA_PAUSA_MIN
+
+RADIO_TIERRA_KM = 6371.0088
+
+COLUMNAS_RUTAS = ['Fecha', 'Empleado', 'Entregas', 'Km', 'Km_por_entrega', 'Inicio', 'Fin',
+                  'Pausas', 'Minutos_pausa', 'Pausa_max_min']
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia en km sobre la esfera entre pares de puntos (arreglos en grados)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _ordenar(df: pd.DataFrame) -> dict | None:
+    """Filas con fecha ordenadas por (empleado, hora) y el id de grupo (empleado, día) de cada una."""
+    if 'Fecha de llenar' not in df.columns or not len(df):
+        return None
+    fechas = df['Fecha de llenar'].to_numpy(dtype='datetime64[ns]')
+    con_fecha = np.flatnonzero(~np.isnat(fechas))
+    if not len(con_fecha):
+        return None
+    t = fechas[con_fecha].astype('datetime64[s]').astype(np.int64)
+    if 'Empleado' in df.columns:
+        codigos, empleados = pd.factorize(df['Empleado'].iloc[con_fecha])
+        empleados = list(empleados) + [None]    # código -1 (sin empleado) → último
+        codigos = np.where(codigos < 0, len(empleados) - 1, codigos)
+    else:
+        codigos, empleados = np.zeros(len(t), dtype=np.intp), [None]
+
+    # Un solo argsort sobre (empleado, t); el día sale de t (hora local de la hoja)
+    t0 = t.min()
+    orden = np.argsort(codigos.astype(np.int64) * np.int64(t.max() - t0 + 1) + (t - t0), kind='stable')
+    t, codigos, filas = t[orden], codigos[orden], con_fecha[orden]
+    dia = t // 86_400
+    nuevo = np.ones(len(t), dtype=bool)
+    nuevo[1:] = (codigos[1:] != codigos[:-1]) | (dia[1:] != dia[:-1])
+    grupo = np.cumsum(nuevo) - 1
+    inicios = np.flatnonzero(nuevo)
+
+    if {'Latitud', 'Longitud'}.issubset(df.columns):
+        lat = df['Latitud'].to_numpy(dtype=np.float64, na_value=np.nan)[filas]
+        lon = df['Longitud'].to_numpy(dtype=np.float64, na_value=np.nan)[filas]
+    else:
+        lat = lon = np.full(len(t), np.nan)
+    return {
+        't': t, 'grupo': grupo, 'inicios': inicios, 'lat': lat, 'lon': lon,
+        'empleado': [empleados[c] for c in codigos[inicios]],
+        'dia': dia[inicios],
+    }
+
+
+def _tramos_con_coordenadas(o: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(posición de origen, de destino, km) de cada tramo entre filas con coordenadas del mismo grupo."""
+    con_coord = np.flatnonzero(~(np.isnan(o['lat']) | np.isnan(o['lon'])))
+    a, b = con_coord[:-1], con_coord[1:]
+    mismo = o['grupo'][a] == o['grupo'][b]
+    a, b = a[mismo], b[mismo]
+    return a, b, haversine_km(o['lat'][a], o['lon'][a], o['lat'][b], o['lon'][b])
+
+
+def rutas_por_dia(df: pd.DataFrame, pausa_min: float = RUTA_PAUSA_MIN) -> pd.DataFrame:
+    """Una fila por Empleado y día: entregas, km recorridos, km por entrega y pausas.
+
+    Km suma los tramos en línea recta entre check-ins consecutivos con
+    coordenadas (las filas sin coordenadas no cortan el recorrido). Una pausa
+    es un intervalo entre check-ins consecutivos mayor a `pausa_min` minutos.
+    """
+    o = _ordenar(df)
+    if o is None:
+        return pd.DataFrame(columns=COLUMNAS_RUTAS)
+    n_grupos = len(o['inicios'])
+    grupo, t = o['grupo'], o['t']
+
+    entregas = np.bincount(grupo, minlength=n_grupos)
+    _, destino, km_tramo = _tramos_con_coordenadas(o)
+    km = np.bincount(grupo[destino], weights=km_tramo, minlength=n_grupos)
+
+    # Intervalos entre check-ins consecutivos del mismo grupo
+    continua = grupo[1:] == grupo[:-1]
+    minutos = (t[1:] - t[:-1])[continua] / 60.0
+    grupo_intervalo = grupo[1:][continua]
+    es_pausa = minutos > pausa_min
+    pausas = np.bincount(grupo_intervalo[es_pausa], minlength=n_grupos)
+    minutos_pausa = np.bincount(grupo_intervalo[es_pausa], weights=minutos[es_pausa], minlength=n_grupos)
+    pausa_max = np.zeros(n_grupos)
+    np.maximum.at(pausa_max, grupo_intervalo, minutos)
+
+    fin = np.append(o['inicios'][1:], len(t)) - 1
+    return pd.DataFrame({
+        'Fecha': pd.to_datetime(o['dia'].astype('datetime64[D]')),
+        'Empleado': o['empleado'],
+        'Entregas': entregas,
+        'Km': np.round(km, 2),
+        'Km_por_entrega': np.round(km / entregas, 2),
+        'Inicio': pd.to_datetime(t[o['inicios']].astype('datetime64[s]')),
+        'Fin': pd.to_datetime(t[fin].astype('datetime64[s]')),
+        'Pausas': pausas,
+        'Minutos_pausa': np.round(minutos_pausa, 1),
+        'Pausa_max_min': np.round(pausa_max, 1),
+    }).sort_values(['Fecha', 'Empleado'], kind='stable', ignore_index=True)
+
+
+def lineas_ruta(df: pd.DataFrame, maximo: int = MAX_RUTAS_MAPA) -> list[dict]:
+    """Recorridos para dibujar: [{empleado, fecha, km, coords [[lat, lon], ...]}], los `maximo` más recientes."""
+    o = _ordenar(df)
+    if o is None:
+        return []
+    n_grupos = len(o['inicios'])
+    _, destino, km_tramo = _tramos_con_coordenadas(o)
+    km = np.bincount(o['grupo'][destino], weights=km_tramo, minlength=n_grupos)
+    # Solo los grupos (empleado, día) más recientes: el bucle es por recorrido, no por fila
+    elegidos = np.zeros(n_grupos, dtype=bool)
+    elegidos[np.argsort(o['dia'], kind='stable')[-maximo:] if maximo else slice(None)] = True
+    con_coord = np.flatnonzero(~(np.isnan(o['lat']) | np.isnan(o['lon'])))
+    con_coord = con_coord[elegidos[o['grupo'][con_coord]]]
+    cortes = np.flatnonzero(np.diff(o['grupo'][con_coord])) + 1
+    lineas = []
+    for pos in np.split(con_coord, cortes):
+        if len(pos) < 2:
+            continue
+        g = o['grupo'][pos[0]]
+        lineas.append({
+            'empleado': o['empleado'][g],
+            'fecha': pd.Timestamp(o['dia'][g].astype('datetime64[D]')),
+            'km': float(km[g]),
+            'coords': np.round(np.column_stack((o['lat'][pos], o['lon'][pos])), 6).tolist(),
+        })
+    lineas.sort(key=lambda r: r['fecha'])
+    return lineas
@@ -0,0 +1,380 @@
+"""Sincronización incremental del Google Sheet con un snapshot local en Parquet.
+
+El CSV publicado siempre se descarga completo, pero solo se parsean las filas
+nuevas: se guarda un checkpoint (caracteres ya parseados + hash SHA-256 de ese
+prefijo) y, si el prefijo no cambió y termina en un fin de línea, se parsea
+únicamente la cola. Cualquier edición de filas anteriores (incluida la última
+fila sin salto de línea final) invalida el checkpoint y fuerza un parseo completo.
+
+Con exportaciones archivadas (FUENTES_ARCHIVADAS) se usa SincronizadorFuentes:
+cada archivada se descarga una sola vez y su snapshot en disco es permanente;
+en cada ciclo solo la hoja viva va a la red. Las fuentes se sincronizan en
+paralelo y se unen sin duplicar las filas que aparecen en más de una.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import (COLUMNAS_TABLA, DESCARGA_BACKOFF, DESCARGA_CONEXIONES, DESCARGA_REINTENTOS,
+                     DESCARGA_TIMEOUT)
+from .datos import leer_csv, normalizar_datos
+
+logger = logging.getLogger(__name__)
+
+# Subir este número cuando cambie la normalización para invalidar snapshots viejos
+VERSION_ESQUEMA = 3
+
+# Directorio por defecto del snapshot local (configurable por entorno)
+DIRECTORIO_CACHE = os.environ.get(
+    'MENSAJERIA_CACHE_DIR',
+    str(Path(__file__).resolve().parent.parent / '.cache'),
+)
+
+
+def _hash_texto(texto: str) -> str:
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _corte_en_linea(texto: str, n: int) -> bool:
+    """True si el checkpoint n cae en un fin de línea del texto nuevo.
+
+    Si la hoja no termina en salto de línea, la última fila del checkpoint puede
+    seguir en el texto nuevo (p. ej. se completó el Pago): esa cola no es una fila nueva.
+    """
+    return n == len(texto) or texto[n - 1] == '\n' or texto[n] in '\r\n'
+
+
+def _fin_cabecera(texto: str) -> int:
+    """Posición justo después de la línea de encabezados del CSV."""
+    fin = texto.find('\n')
+    return len(texto) if fin < 0 else fin + 1
+
+
+_sesion: requests.Session | None = None
+_lock_sesion = threading.Lock()
+
+
+def sesion_http() -> requests.Session:
+    """Session del proceso: conexiones keep-alive reutilizadas y reintentos con backoff.
+
+    Se reintentan errores de conexión/lectura y respuestas 429/5xx (respetando
+    Retry-After); un 304 o un 404 no se reintentan.
+    """
+    global _sesion
+    with _lock_sesion:
+        if _sesion is None:
+            reintentos = Retry(total=DESCARGA_REINTENTOS, backoff_factor=DESCARGA_BACKOFF,
+                               status_forcelist=(429, 500, 502, 503, 504),
+                               allowed_methods=frozenset({'GET'}), raise_on_status=False)
+            adaptador = HTTPAdapter(max_retries=reintentos, pool_connections=DESCARGA_CONEXIONES,
+                                    pool_maxsize=DESCARGA_CONEXIONES)
+            sesion = requests.Session()
+            sesion.mount('http://', adaptador)
+            sesion.mount('https://', adaptador)
+            _sesion = sesion
+        return _sesion
+
+
+class SincronizadorHoja:
+    """Mantiene el dataset tipado en disco y lo actualiza de forma incremental."""
+
+    def __init__(self, url: str, directorio: str = DIRECTORIO_CACHE, timeout: int = DESCARGA_TIMEOUT,
+                 normalizar=normalizar_datos, archivada: bool = False, sesion: requests.Session | None = None):
+        self.url = url
+        self.timeout = timeout
+        self.normalizar = normalizar
+        # Archivada: la fuente ya no cambia; con snapshot en disco nunca se vuelve a descargar
+        self.archivada = archivada
+        self.sesion = sesion
+        self.directorio = Path(directorio)
+        clave = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        self.ruta_datos = self.directorio / f'{clave}.parquet'
+        self.ruta_meta = self.directorio / f'{clave}.json'
+        self.df: pd.DataFrame | None = None
+        self.meta: dict = {}
+        # Resultado de la última operación (modo, filas nuevas, duración)
+        self.ultima: dict = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------
+    # Snapshot local
+    # ------------------------------
+    def cargar_snapshot(self) -> pd.DataFrame | None:
+        """Carga el snapshot de disco sin tocar la red. Devuelve None si no es válido."""
+        try:
+            meta = json.loads(self.ruta_meta.read_text(encoding='utf-8'))
+            if meta.get('version') != VERSION_ESQUEMA or meta.get('url') != self.url:
+                return None
+            df = pd.read_parquet(self.ruta_datos)
+        except (OSError, ValueError) as e:
+            logger.info('Snapshot local no disponible (%s): %s', self.ruta_datos, e)
+            return None
+        if len(df) != meta.get('filas'):
+            logger.warning('Snapshot %s inconsistente con su checkpoint; se ignora', self.ruta_datos)
+            return None
+        self.df, self.meta = df, meta
+        return df
+
+    def _guardar_snapshot(self, df: pd.DataFrame, meta: dict) -> None:
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        tmp_datos = self.ruta_datos.with_suffix('.parquet.tmp')
+        tmp_meta = self.ruta_meta.with_suffix('.json.tmp')
+        df.to_parquet(tmp_datos, index=False)
+        tmp_meta.write_text(json.dumps(meta), encoding='utf-8')
+        # Reemplazo atómico: primero datos, luego el checkpoint que los describe
+        os.replace(tmp_datos, self.ruta_datos)
+        os.replace(tmp_meta, self.ruta_meta)
+
+    # ------------------------------
+    # Descarga (condicional si la fuente lo permite)
+    # ------------------------------
+    def _descargar(self) -> tuple[str | None, dict]:
+        """Devuelve (texto, validadores). texto es None si la fuente no cambió."""
+        parsed = urlparse(self.url)
+        if parsed.scheme == 'file':
+            ruta = url2pathname(parsed.path)
+            st_ = os.stat(ruta)
+            validadores = {'mtime': st_.st_mtime_ns, 'tamano': st_.st_size}
+            if self.df is not None and all(self.meta.get(k) == v for k, v in validadores.items()):
+                return None, validadores
+            with open(ruta, encoding='utf-8') as f:
+                return f.read(), validadores
+
+        headers = {}
+        if self.df is not None:
+            if self.meta.get('etag'):
+                headers['If-None-Match'] = self.meta['etag']
+            if self.meta.get('last_modified'):
+                headers['If-Modified-Since'] = self.meta['last_modified']
+        resp = (self.sesion or sesion_http()).get(self.url, headers=headers, timeout=self.timeout)
+        validadores = {
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+        }
+        if resp.status_code == 304:
+            return None, validadores
+        resp.raise_for_status()
+        return resp.text, validadores
+
+    # ------------------------------
+    # API pública
+    # ------------------------------
+    def obtener(self) -> pd.DataFrame:
+        """Arranque en frío: sirve el snapshot local si existe; si no, sincroniza."""
+        if self.df is None:
+            t0 = time.perf_counter()
+            if self.cargar_snapshot() is not None:
+                self.ultima = {'modo': 'snapshot', 'filas_nuevas': 0,
+                               'segundos': time.perf_counter() - t0}
+                return self.df
+        return self.sincronizar()
+
+    def sincronizar(self) -> pd.DataFrame:
+        """Descarga la fuente y parsea solo lo que no se había visto."""
+        with self._lock:
+            t0 = time.perf_counter()
+            if self.df is None:
+                self.cargar_snapshot()
+            if self.archivada and self.df is not None:
+                self.ultima = {'modo': 'archivada', 'filas_nuevas': 0,
+                               'segundos': time.perf_counter() - t0}
+                return self.df
+
+            texto, validadores = self._descargar()
+            if texto is None:
+                self.ultima = {'modo': 'no_modificado', 'filas_nuevas': 0,
+                               'segundos': time.perf_counter() - t0}
+                return self.df
+
+            n = self.meta.get('caracteres', 0)
+            prefijo_ok = (
+                self.df is not None
+                and 0 < n <= len(texto)
+                and _corte_en_linea(texto, n)
+                and _hash_texto(texto[:n]) == self.meta.get('hash_prefijo')
+            )
+            if prefijo_ok:
+                cola = texto[n:].lstrip('\r\n')
+                if cola:
+                    nuevas = self.normalizar(leer_csv(texto[:_fin_cabecera(texto)] + cola))
+                    df = pd.concat([self.df, nuevas], ignore_index=True)
+                else:
+                    nuevas, df = self.df.iloc[:0], self.df
+                modo = 'incremental'
+            else:
+                df = nuevas = self.normalizar(leer_csv(texto))
+                df = df.reset_index(drop=True)
+                modo = 'completo'
+
+            hash_texto = _hash_texto(texto)
+            meta = {
+                'version': VERSION_ESQUEMA,
+                'url': self.url,
+                # Linaje: solo cambia con un parseo completo (las filas previas pueden haber cambiado)
+                'base': self.meta.get('base') if modo == 'incremental' else hash_texto[:16],
+                'filas': len(df),
+                'caracteres': len(texto),
+                'hash_prefijo': hash_texto,
+                'sincronizado': time.time(),
+                'archivada': self.archivada,
+                **validadores,
+            }
+            if modo == 'completo' or len(nuevas):
+                self._guardar_snapshot(df, meta)
+            else:
+                self.ruta_meta.write_text(json.dumps(meta), encoding='utf-8')
+            self.df, self.meta = df, meta
+            self.ultima = {'modo': modo, 'filas_nuevas': len(nuevas),
+                           'segundos': time.perf_counter() - t0}
+            return df
+
+
+# ==============================
+# Varias fuentes (hojas archivadas + la viva)
+# ==============================
+def _huellas_filas(df: pd.DataFrame) -> np.ndarray:
+    """Hash por fila sobre las columnas del reporte (las que definen una entrega).
+
+    Los tipos se llevan a una forma canónica antes de hashear: la misma entrega
+    puede venir como Pago int64 en una hoja y float64 (con vacíos) en otra.
+    """
+    canonicas = {}
+    for col in [c for c in COLUMNAS_TABLA if c in df.columns] or list(df.columns):
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+            canonicas[col] = serie.astype('datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            canonicas[col] = serie.astype('float64')
+        else:
+            canonicas[col] = serie.astype('str')
+    return pd.util.hash_pandas_object(pd.DataFrame(canonicas), index=False).to_numpy()
+
+
+def _hash_partes(*partes) -> str:
+    return _hash_texto('|'.join(str(p) for p in partes))
+
+
+class SincronizadorFuentes:
+    """Une las fuentes (archivadas en orden, la viva al final) en un solo dataset.
+
+    Misma interfaz que SincronizadorHoja (obtener / sincronizar / cargar_snapshot,
+    df, meta, ultima), así DatasetCompartido y api.cargar no distinguen el caso.
+    Una fila que ya vino en una fuente anterior se descarta (solapamiento por la
+    rotación de la hoja); los duplicados dentro de una misma fuente se conservan.
+    """
+
+    def __init__(self, url: str, archivadas: list[str], directorio: str = DIRECTORIO_CACHE,
+                 timeout: int = DESCARGA_TIMEOUT, normalizar=normalizar_datos):
+        self.url = url
+        self.archivadas = [SincronizadorHoja(u, directorio, timeout, normalizar, archivada=True)
+                           for u in archivadas]
+        self.viva = SincronizadorHoja(url, directorio, timeout, normalizar)
+        self.fuentes = self.archivadas + [self.viva]
+        self.df: pd.DataFrame | None = None
+        self.meta: dict = {}
+        self.ultima: dict = {}
+        # Estado de la última unión, para extenderla cuando solo crece la hoja viva
+        self._versiones: tuple | None = None
+        self._base_viva: str | None = None
+        self._filas_viva = 0
+        self._huellas_previas: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    def cargar_snapshot(self) -> pd.DataFrame | None:
+        """Une los snapshots de disco sin tocar la red. None si falta alguno."""
+        with self._lock:
+            t0 = time.perf_counter()
+            if any(f.cargar_snapshot() is None for f in self.fuentes):
+                return None
+            return self._unir(t0, 'snapshot')
+
+    def obtener(self) -> pd.DataFrame:
+        if self.df is None and self.cargar_snapshot() is not None:
+            return self.df
+        return self.sincronizar()
+
+    def sincronizar(self) -> pd.DataFrame:
+        """Sincroniza todas las fuentes en paralelo (descarga + parseo) y las une."""
+        with self._lock:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=min(len(self.fuentes), DESCARGA_CONEXIONES),
+                                    thread_name_prefix='mensajeria-fuente') as ex:
+                list(ex.map(lambda fuente: fuente.sincronizar(), self.fuentes))
+            return self._unir(t0)
+
+    def _unir(self, t0: float, modo: str | None = None) -> pd.DataFrame:
+        versiones = tuple(f.meta.get('hash_prefijo') for f in self.fuentes)
+        viva = self.viva
+        detalle = {f.url: f.ultima.get('modo', 'snapshot') for f in self.fuentes}
+        if self.df is not None and versiones == self._versiones:
+            self.ultima = {'modo': 'no_modificado', 'filas_nuevas': 0, 'fuentes': detalle,
+                           'segundos': time.perf_counter() - t0}
+            return self.df
+
+        extender = (
+            self.df is not None
+            and versiones[:-1] == self._versiones[:-1]
+            and viva.meta.get('base') == self._base_viva
+            and len(viva.df) >= self._filas_viva
+        )
+        if extender:
+            # Solo llegaron filas al final de la hoja viva: mismo linaje, se agregan
+            nuevas = viva.df.iloc[self._filas_viva:]
+            huellas = _huellas_filas(nuevas)
+            repetida = np.isin(huellas, self._huellas_previas)
+            nuevas = nuevas[~repetida]
+            df = pd.concat([self.df, nuevas], ignore_index=True)
+            base = self.meta.get('base')
+            n_nuevas = len(nuevas)
+            modo = modo or 'incremental'
+        else:
+            partes, vistas = [], np.empty(0, dtype=np.uint64)
+            for fuente in self.fuentes:
+                huellas = _huellas_filas(fuente.df)
+                nueva = ~np.isin(huellas, vistas)
+                partes.append(fuente.df[nueva] if not nueva.all() else fuente.df)
+                if fuente is not viva:
+                    vistas = np.union1d(vistas, huellas)
+            self._huellas_previas = vistas
+            df = pd.concat(partes, ignore_index=True)
+            base = _hash_partes(*versiones[:-1], viva.meta.get('base'))[:16]
+            n_nuevas = len(df) if self.df is None else max(len(df) - len(self.df), 0)
+            modo = modo or 'completo'
+
+        self.meta = {
+            'url': self.url,
+            'base': base,
+            'hash_prefijo': _hash_partes(*versiones),
+            'filas': len(df),
+            'fuentes': [{'url': f.url, 'filas': len(f.df), 'archivada': f.archivada} for f in self.fuentes],
+            'sincronizado': time.time(),
+        }
+        self.df = df
+        self._versiones = versiones
+        self._base_viva = viva.meta.get('base')
+        self._filas_viva = len(viva.df)
+        self.ultima = {'modo': modo, 'filas_nuevas': n_nuevas, 'fuentes': detalle,
+                       'segundos': time.perf_counter() - t0}
+        return df
+
+
+def crear_sincronizador(url: str, archivadas: list[str] | tuple = (), directorio: str = DIRECTORIO_CACHE,
+                        **kwargs) -> 'SincronizadorHoja | SincronizadorFuentes':
+    """SincronizadorHoja si solo hay una fuente; SincronizadorFuentes si hay archivadas."""
+    archivadas = [u for u in dict.fromkeys(archivadas) if u and u != url]
+    if archivadas:
+        return SincronizadorFuentes(url, archivadas, directorio, **kwargs)
+    return SincronizadorHoja(url, directorio, **kwargs)
@@ -0,0 +1,94 @@
+"""Clasificación vectorizada de entregas por zona tarifaria (punto en polígono)."""
+import numpy as np
+import pandas as pd
+
+from .config import TARIFA_FUERA_ZONA, ZONAS_TARIFA
+
+# Etiqueta para puntos con coordenadas fuera de todas las zonas
+FUERA_DE_ZONA = 'Fuera'
+
+
+def _bounds_from_coords(coords: list[list[float]]):
+    """Devuelve (sw, ne) bounds a partir de una lista de [lat, lon]."""
+    if not coords:
+        return None
+    lats = [c[0] for c in coords]
+    lons = [c[1] for c in coords]
+    sw = [min(lats), min(lons)]
+    ne = [max(lats), max(lons)]
+    return [sw, ne]
+
+
+def puntos_en_poligono(lat, lon, coords: list[list[float]]) -> np.ndarray:
+    """Máscara booleana de puntos dentro del polígono (regla par-impar).
+
+    Primero descarta con el bounding box y luego recorre las aristas una vez;
+    cada arista solo evalúa la franja de latitudes que cruza (búsqueda binaria
+    sobre los candidatos ordenados). NaN cuenta como fuera.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    dentro = np.zeros(lat.shape, dtype=bool)
+    bounds = _bounds_from_coords(coords)
+    if bounds is None:
+        return dentro
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    cand = np.flatnonzero((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+    if not len(cand):
+        return dentro
+
+    # Ordenar por latitud: los puntos que cruza cada arista forman un rango contiguo
+    orden = np.argsort(lat[cand], kind='stable')
+    cand = cand[orden]
+    y, x = lat[cand], lon[cand]
+    poly = np.asarray(coords, dtype=np.float64)
+    py, px = poly[:, 0], poly[:, 1]
+    res = np.zeros(len(cand), dtype=bool)
+    j = len(poly) - 1
+    for i in range(len(poly)):
+        y0, y1 = sorted((py[i], py[j]))
+        if y0 != y1:
+            # (py[i] > y) != (py[j] > y)  <=>  y0 <= y < y1
+            lo, hi = np.searchsorted(y, (y0, y1), side='left')
+            pendiente = (px[j] - px[i]) / (py[j] - py[i])
+            res[lo:hi] ^= x[lo:hi] < px[i] + pendiente * (y[lo:hi] - py[i])
+        j = i
+    dentro[cand] = res
+    return dentro
+
+
+def clasificar_zonas(df: pd.DataFrame, zonas: list[dict] = ZONAS_TARIFA,
+                     tarifa_fuera: float = TARIFA_FUERA_ZONA) -> pd.DataFrame:
+    """Agrega 'Zona', 'Tarifa_zona' y 'Pago_inconsistente' según Latitud/Longitud.
+
+    La primera zona que contiene el punto gana. Filas sin coordenadas quedan
+    sin zona ni tarifa y nunca se marcan como inconsistentes.
+    """
+    if not {'Latitud', 'Longitud'}.issubset(df.columns):
+        return df
+    lat = df['Latitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+    lon = df['Longitud'].to_numpy(dtype=np.float64, na_value=np.nan)
+    con_coords = ~(np.isnan(lat) | np.isnan(lon))
+
+    zona_idx = np.where(con_coords, len(zonas), -1)  # len(zonas) = fuera
+    pendiente = con_coords.copy()
+    for k, zona in enumerate(zonas):
+        sel = np.flatnonzero(pendiente)
+        if not len(sel):
+            break
+        hit = sel[puntos_en_poligono(lat[sel], lon[sel], zona['coords'])]
+        zona_idx[hit] = k
+        pendiente[hit] = False
+
+    nombres = [z['nombre'] for z in zonas] + [FUERA_DE_ZONA]
+    tarifas = np.array([float(z['tarifa']) for z in zonas] + [float(tarifa_fuera), np.nan])
+    tarifa = tarifas[zona_idx]  # -1 → último elemento (sin coordenadas)
+
+    out = df.assign(
+        Zona=pd.Categorical.from_codes(zona_idx, categories=nombres),
+        Tarifa_zona=tarifa,
+    )
+    if 'Pago' in df.columns:
+        pago = df['Pago'].to_numpy(dtype=np.float64, na_value=np.nan)
+        out['Pago_inconsistente'] = ~np.isnan(pago) & ~np.isnan(tarifa) & (pago != tarifa)
+    return out